@@ -0,0 +1,60 @@
+"""Asyncio runner benchmark: many concurrent flows with waits and offloaded finds in one loop.
+
+Usage: python benchmarks/bench_async_runner.py [flow_count] [delay_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flow_async import AsyncActionBackend, AsyncFlowRunner, compile_flow_async
+from flow_engine import StubActionBackend
+from flow_model import Node, Connection, Flow
+
+
+def wait_find_branch_flow(delay_ms):
+    """Start -> Delay/Wait -> Find Image -> If/Else -> Log Message / Log Message."""
+    flow = Flow()
+    nodes = [Node("Start"), Node("Delay/Wait", properties={"duration_ms": delay_ms}),
+             Node("Find Image", properties={"image_path": "button.png"}), Node("Conditional (If/Else)"),
+             Node("Log Message", properties={"message": "found"}), Node("Log Message", properties={"message": "missing"})]
+    for node in nodes:
+        flow.add_node(node)
+    start, delay, find, branch, found, missing = (node.id for node in nodes)
+    flow.add_connection(Connection(start, "out", delay, "in"))
+    flow.add_connection(Connection(delay, "out", find, "in"))
+    flow.add_connection(Connection(find, "out", branch, "in"))
+    flow.add_connection(Connection(branch, "true", found, "in"))
+    flow.add_connection(Connection(branch, "false", missing, "in"))
+    return flow
+
+
+async def bench(flow_count, delay_ms):
+    backend = AsyncActionBackend.from_sync(StubActionBackend({"button.png": (5, 5)}, record_calls=False))
+    runner = AsyncFlowRunner(backend, lag_interval=0.01)
+    plan = compile_flow_async(wait_find_branch_flow(delay_ms))
+
+    start = time.perf_counter()
+    for i in range(flow_count):
+        runner.start(plan, name=f"flow-{i}", timeout=60)
+    await runner.wait_all()
+    wall_s = time.perf_counter() - start
+    await runner.close()
+
+    metrics = runner.metrics()
+    print(f"flows={flow_count} delay={delay_ms}ms wall {wall_s:.2f}s  status={metrics['by_status']}")
+    print(f"latency mean {metrics['latency_mean_s'] * 1000:.1f}ms  p95 {metrics['latency_p95_s'] * 1000:.1f}ms  "
+          f"max {metrics['latency_max_s'] * 1000:.1f}ms")
+    print(f"loop lag mean {metrics['loop_lag_mean_s'] * 1000:.2f}ms  max {metrics['loop_lag_max_s'] * 1000:.2f}ms")
+
+
+def main():
+    flow_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(bench(flow_count, delay_ms))
+
+
+if __name__ == "__main__":
+    main()
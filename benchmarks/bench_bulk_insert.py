@@ -0,0 +1,83 @@
+"""Bulk insertion benchmark: MainWindow.insert_nodes against adding items one by one.
+
+Usage: python benchmarks/bench_bulk_insert.py [sizes] [--virtualized]
+
+For each size (default 1000,10000) a chain flow is generated and added to a fresh
+MainWindow twice: node by node through add_node_from_palette and
+handle_connection_dropped (as the palette and connection drags do), and in one
+call to insert_nodes. Each time includes the first repaint (processEvents).
+Uses the offscreen Qt platform unless QT_QPA_PLATFORM is already set.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import chain_flow
+
+from PyQt6.QtWidgets import QApplication, QListWidgetItem
+
+from main_app2 import MainWindow
+from tracing import WARNING, tracer
+
+
+def new_window(app, virtualized):
+    window = MainWindow(virtualized=virtualized)
+    window.resize(1600, 1000)
+    window.show()
+    window.build_deferred_ui()
+    app.processEvents()
+    return window
+
+
+def close_window(app, window):
+    window.move_batcher.discard()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def insert_per_item(app, window, flow):
+    nodes = window.current_flow.nodes
+    new_ids = {}
+    for node in flow.nodes.values():
+        window.add_node_from_palette(QListWidgetItem(node.node_type))
+        new_ids[node.id] = next(reversed(nodes))
+    for connection in flow.connections.values():
+        window.handle_connection_dropped(new_ids[connection.from_node_id], connection.from_port_name,
+                                         new_ids[connection.to_node_id], connection.to_port_name)
+    app.processEvents()
+
+
+def insert_bulk(app, window, flow):
+    window.insert_nodes(flow.nodes.values(), flow.connections.values())
+    app.processEvents()
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    sizes = [int(s) for s in (args[0] if args else "1000,10000").split(",")]
+    virtualized = "--virtualized" in sys.argv
+    tracer.set_level(WARNING)
+    app = QApplication(sys.argv[:1])
+
+    for size in sizes:
+        times = {}
+        for label, insert in (("per item", insert_per_item), ("insert_nodes", insert_bulk)):
+            flow = chain_flow(size)
+            window = new_window(app, virtualized)
+            started = time.perf_counter()
+            insert(app, window, flow)
+            times[label] = time.perf_counter() - started
+            assert len(window.current_flow.nodes) == size
+            assert len(window.current_flow.connections) == len(flow.connections)
+            close_window(app, window)
+        mode = " (virtualized)" if virtualized else ""
+        print(f"{size} nodes{mode}: per item {times['per item'] * 1000:.0f} ms, "
+              f"insert_nodes {times['insert_nodes'] * 1000:.0f} ms "
+              f"({times['per item'] / times['insert_nodes']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
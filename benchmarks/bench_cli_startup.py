@@ -0,0 +1,76 @@
+"""Headless runner startup benchmark: process start to first node executed.
+
+Usage: python benchmarks/bench_cli_startup.py [runs]
+
+Saves Start -> Log Message -> End, launches `python -u run_flow.py` on it
+repeatedly and times from launch until the Log Message line arrives on stdout,
+so interpreter startup, imports, loading and compiling are all included. Also
+checks with -X importtime that PyQt6 is never imported. Target: well under 100 ms.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_flows import chain_flow
+
+from flow_io import save_flow
+from flow_model import Node, Connection
+
+RUN_FLOW = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "run_flow.py")
+TARGET_MS = 100.0
+
+
+def first_node_flow():
+    flow = chain_flow(2) # Start -> End
+    start, end = list(flow.nodes)
+    flow.remove_node(end)
+    log = Node("Log Message", properties={"message": "first node executed"})
+    flow.add_node(log)
+    flow.add_connection(Connection(start, "out", log.id, "in"))
+    return flow
+
+
+def time_to_first_node(path):
+    launched = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-u", RUN_FLOW, path], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - launched
+    process.wait()
+    if line.strip() != "first node executed" or process.returncode != 0:
+        raise RuntimeError(f"run_flow failed: {line!r}, exit {process.returncode}")
+    return elapsed * 1000
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "first.flow")
+        save_flow(first_node_flow(), path)
+
+        imports = subprocess.run([sys.executable, "-X", "importtime", RUN_FLOW, path],
+                                 capture_output=True, text=True).stderr
+        modules = [line.rsplit("|", 1)[-1].strip() for line in imports.splitlines() if line.startswith("import time:")]
+        qt_modules = [m for m in modules if m.startswith("PyQt6")]
+
+        time_to_first_node(path) # Warm the OS file cache
+        samples = sorted(time_to_first_node(path) for _ in range(runs))
+
+        baseline = sorted(_python_startup() for _ in range(runs))
+    median = statistics.median(samples)
+    print(f"time to first node: median {median:.1f} ms, min {samples[0]:.1f} ms, max {samples[-1]:.1f} ms ({runs} runs)")
+    print(f"bare interpreter  : median {statistics.median(baseline):.1f} ms")
+    print(f"modules imported  : {len(modules)}, PyQt6 modules: {len(qt_modules)}")
+    print(f"target {TARGET_MS:.0f} ms: {'OK' if median < TARGET_MS and not qt_modules else 'MISSED'}")
+
+
+def _python_startup():
+    launched = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    return (time.perf_counter() - launched) * 1000
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Clipboard benchmark: copy, paste, duplicate and cut of large selections.
+
+Usage: python benchmarks/bench_clipboard.py [sizes] [--virtualized]
+
+For each size (default 1000,5000) a chain flow is inserted into a fresh MainWindow,
+all nodes are selected and copied, then pasted twice, duplicated and cut through
+the same MainWindow methods as the Edit menu. Paste and duplicate times include
+the first repaint (processEvents). Also reports the clipboard size per node.
+With --virtualized only the nodes realized around the viewport can be selected.
+Uses the offscreen Qt platform unless QT_QPA_PLATFORM is already set.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import chain_flow
+
+from PyQt6.QtWidgets import QApplication
+
+from flow_clipboard import MIME_TYPE
+from main_app2 import MainWindow
+from tracing import WARNING, tracer
+
+
+def timed(app, function):
+    started = time.perf_counter()
+    result = function()
+    app.processEvents()
+    return time.perf_counter() - started, result
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    sizes = [int(s) for s in (args[0] if args else "1000,5000").split(",")]
+    virtualized = "--virtualized" in sys.argv
+    tracer.set_level(WARNING)
+    app = QApplication(sys.argv[:1])
+
+    for size in sizes:
+        window = MainWindow(virtualized=virtualized)
+        window.resize(1600, 1000)
+        window.show()
+        window.build_deferred_ui()
+        flow = chain_flow(size)
+        window.insert_nodes(flow.nodes.values(), flow.connections.values())
+        app.processEvents()
+        window.select_nodes(list(window.current_flow.nodes))
+        selected = len(window.selected_node_ids())
+
+        copy_time, _ = timed(app, window.copy_selection)
+        clipboard_bytes = len(app.clipboard().mimeData().data(MIME_TYPE))
+        window.scene.clearSelection()
+        paste_time, pasted = timed(app, window.paste)
+        paste_again_time, _ = timed(app, window.paste)
+        duplicate_time, duplicated = timed(app, window.duplicate_selection)
+        window.select_nodes([node.id for node in pasted])
+        cut_time, _ = timed(app, window.cut_selection)
+
+        mode = " (virtualized)" if virtualized else ""
+        print(f"{size} nodes{mode}, {selected} selected: clipboard {clipboard_bytes / 1024:.0f} KiB "
+              f"({clipboard_bytes / max(selected, 1):.0f} B/node)")
+        print(f"  copy {copy_time * 1000:7.1f} ms   paste {paste_time * 1000:7.1f} ms ({len(pasted)} nodes)   "
+              f"paste again {paste_again_time * 1000:7.1f} ms")
+        print(f"  duplicate {duplicate_time * 1000:7.1f} ms ({len(duplicated)} nodes)   cut {cut_time * 1000:7.1f} ms   "
+              f"flow now {len(window.current_flow.nodes)} nodes, {len(window.current_flow.connections)} connections")
+        window.move_batcher.discard()
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Editor startup benchmark: import time and time to first frame.
+
+Usage: python benchmarks/bench_editor_startup.py [runs]
+
+Each run starts a fresh interpreter that imports main_app2, creates the
+QApplication and MainWindow, shows it and waits for the canvas viewport's first
+paint event. Reported per phase (median over runs), plus the number of modules
+imported by then and whether file I/O / NumPy modules were loaded. Uses the
+offscreen Qt platform unless QT_QPA_PLATFORM is already set.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, ROOT)
+import main_app2
+imported = time.perf_counter()
+from PyQt6.QtCore import QEvent, QObject
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+app_created = time.perf_counter()
+window = main_app2.MainWindow()
+constructed = time.perf_counter()
+times = {}
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "first_frame" not in times:
+            times["first_frame"] = time.perf_counter()
+            app.quit()
+        return False
+
+first_paint = FirstPaint()
+window.flow_canvas.viewport().installEventFilter(first_paint)
+window.show()
+app.exec()
+print(json.dumps({
+    "import_ms": 1000 * (imported - started),
+    "qapplication_ms": 1000 * (app_created - imported),
+    "construct_ms": 1000 * (constructed - app_created),
+    "first_frame_ms": 1000 * (times["first_frame"] - started),
+    "modules": len(sys.modules),
+    "lazy_loaded": sorted(m for m in ("flow_io", "flow_journal", "numpy", "properties_panel") if m in sys.modules),
+}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    launched = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", f"ROOT = {ROOT!r}\n" + CHILD], capture_output=True,
+                            text=True, env=env, check=True).stdout
+    wall = 1000 * (time.perf_counter() - launched)
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = wall
+    return result
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    run_once() # Warm the OS file cache and .pyc files
+    results = [run_once() for _ in range(runs)]
+    for key, label in (("import_ms", "import main_app2"), ("qapplication_ms", "create QApplication"),
+                       ("construct_ms", "build MainWindow"),
+                       ("first_frame_ms", "first frame (from interpreter start)"),
+                       ("process_ms", "whole process incl. exit")):
+        print(f"{label:<38} {statistics.median(r[key] for r in results):7.1f} ms")
+    print(f"{'modules loaded at first frame':<38} {results[-1]['modules']:7d}")
+    print(f"{'deferred modules already loaded':<38} {', '.join(results[-1]['lazy_loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Editor benchmark suite: large synthetic flows through the real MainWindow code paths.
+
+Usage: python benchmarks/bench_editor_suite.py [--shapes chain,fanout,ifelse] [--sizes 1000,10000]
+                                               [--virtualized] [--output FILE] [--compare FILE]
+
+For every shape (see synthetic_flows.GENERATORS) and size, a fresh MainWindow is
+shown on the offscreen Qt platform and the generated flow is rebuilt through the
+same methods the UI calls:
+
+  insert      MainWindow.add_node_from_palette, once per node
+  connect     MainWindow.handle_connection_dropped, once per connection
+  drag        moving nodes inside a NodeMoveBatcher transaction and flushing it per frame
+              (random nodes, and the node with the most connections)
+  select      MainWindow.update_properties_panel on nodes of every type
+  paint       a viewport repaint, and QGraphicsScene.render of the whole scene
+
+Results (and the perf_monitor counters of each case) are written as JSON to
+--output, default editor_bench_<timestamp>.json. --compare prints each metric
+against an earlier results file. Sizes of 100000 take minutes unless
+--virtualized is given.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import GENERATORS # Also puts the repo root on sys.path
+
+from PyQt6.QtCore import QT_VERSION_STR, QRectF
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QApplication, QListWidgetItem
+
+from main_app2 import MainWindow
+from perf_monitor import perf
+from tracing import WARNING, tracer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+def summary(samples):
+    """Per-call statistics in microseconds."""
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "total_ms": 1000 * sum(samples),
+        "mean_us": 1e6 * statistics.fmean(samples),
+        "median_us": 1e6 * statistics.median(samples),
+        "p99_us": 1e6 * samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max_us": 1e6 * samples[-1],
+    }
+
+
+def run_case(app, shape, size, virtualized, seed=1):
+    flow = GENERATORS[shape](size)
+    window = MainWindow(virtualized=virtualized)
+    window.resize(1600, 1000)
+    window.show()
+    window.build_deferred_ui()
+    app.processEvents()
+    perf.reset()
+    results = {"shape": shape, "size": size, "virtualized": virtualized,
+               "connections": len(flow.connections)}
+
+    # --- insert ---
+    new_ids = {}
+    items = {node_type: QListWidgetItem(node_type) for node_type in {n.node_type for n in flow.nodes.values()}}
+    samples = []
+    nodes = window.current_flow.nodes
+    for node in flow.nodes.values():
+        samples.append(timed(window.add_node_from_palette, items[node.node_type]))
+        new_ids[node.id] = next(reversed(nodes))
+    results["insert"] = summary(samples)
+
+    # Spread the nodes out as generated (palette placement stacks them), not timed
+    for old_id, new_id in new_ids.items():
+        node = nodes[new_id]
+        node.position = flow.nodes[old_id].position
+        graphics_node = window.graphics_nodes.get(new_id)
+        if graphics_node:
+            graphics_node.setPos(node.x, node.y)
+        if window.virtualizer:
+            window.virtualizer.node_added(node)
+            window.flow_canvas.port_index.update_node(new_id, node.node_type, node.x, node.y)
+    window.move_batcher.flush()
+    app.processEvents()
+
+    # --- connect ---
+    samples = [timed(window.handle_connection_dropped, new_ids[c.from_node_id], c.from_port_name,
+                     new_ids[c.to_node_id], c.to_port_name)
+               for c in flow.connections.values()]
+    results["connect"] = summary(samples)
+    app.processEvents()
+
+    # --- drag ---
+    rng = random.Random(seed)
+    realized = list(window.graphics_nodes)
+    hub = max(realized, key=lambda node_id: sum(1 for _ in window.current_flow.connections_for_node(node_id)))
+    for label, node_ids in (("drag_random", rng.sample(realized, min(100, len(realized)))), ("drag_hub", [hub] * 20)):
+        calls_before = perf.update_path_calls
+        samples = []
+        for node_id in node_ids:
+            graphics_node = window.graphics_nodes[node_id]
+            window.move_batcher.begin()
+            for step in range(10):
+                pos = graphics_node.pos()
+                graphics_node.setPos(pos.x() + (5 if step < 5 else -5), pos.y())
+                samples.append(timed(window.move_batcher.flush))
+            window.move_batcher.end()
+        results[label] = summary(samples)
+        results[label]["update_path_calls"] = perf.update_path_calls - calls_before
+    app.processEvents()
+
+    # --- select ---
+    by_type = {}
+    for node_id in realized:
+        by_type.setdefault(nodes[node_id].node_type, []).append(nodes[node_id])
+    selection = [by_type[t][i % len(by_type[t])] for i in range(200) for t in sorted(by_type)]
+    results["select"] = summary([timed(window.update_properties_panel, node) for node in selection])
+
+    # --- paint ---
+    viewport = window.flow_canvas.viewport()
+    results["paint_viewport"] = summary([timed(viewport.repaint) for _ in range(20)])
+    results["paint_viewport"]["item_paints_last_frame"] = perf.paints_last_frame
+    scene_rect = window.scene.itemsBoundingRect()
+    image = QImage(2000, 2000, QImage.Format.Format_ARGB32_Premultiplied)
+
+    def render_scene():
+        painter = QPainter(image)
+        window.scene.render(painter, QRectF(image.rect()), scene_rect)
+        painter.end()
+    results["paint_full_scene"] = summary([timed(render_scene) for _ in range(3)])
+
+    results["scene_items"] = len(window.scene.items())
+    results["perf"] = perf.stats()
+    window.move_batcher.discard()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+METRICS = ("insert", "connect", "drag_random", "drag_hub", "select", "paint_viewport", "paint_full_scene")
+
+
+def print_case(case, baseline=None):
+    mode = " virtualized" if case["virtualized"] else ""
+    print(f"{case['shape']} {case['size']} nodes, {case['connections']} connections{mode}:")
+    for metric in METRICS:
+        stats = case[metric]
+        line = f"  {metric:<17} median {stats['median_us']:10.1f} us  p99 {stats['p99_us']:10.1f} us  " \
+               f"total {stats['total_ms']:9.1f} ms"
+        if baseline and metric in baseline:
+            old = baseline[metric]["median_us"]
+            line += f"  ({(stats['median_us'] - old) / old * 100:+6.1f}% vs {old:.1f} us)" if old else ""
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", default="chain,fanout,ifelse")
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--virtualized", action="store_true", help="use the virtualized scene (SceneVirtualizer)")
+    parser.add_argument("--output", default=None, help="JSON results file")
+    parser.add_argument("--compare", default=None, help="earlier JSON results file to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for case in json.load(f)["cases"]:
+                baseline[(case["shape"], case["size"], case["virtualized"])] = case
+
+    tracer.set_level(WARNING)
+    app = QApplication(sys.argv[:1])
+    cases = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for shape in args.shapes.split(","):
+            case = run_case(app, shape, size, args.virtualized)
+            cases.append(case)
+            print_case(case, baseline.get((shape, size, args.virtualized)))
+
+    output = args.output or time.strftime("editor_bench_%Y%m%d_%H%M%S.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "qt": QT_VERSION_STR,
+                "platform": platform.platform(),
+                "qpa_platform": os.environ.get("QT_QPA_PLATFORM"),
+                "cpu_count": os.cpu_count(),
+            },
+            "cases": cases,
+        }, f, indent=1)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
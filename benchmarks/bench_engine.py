@@ -0,0 +1,62 @@
+"""Execution engine micro-benchmark: compile time and steps per second.
+
+Usage: python benchmarks/bench_engine.py [node_count] [total_steps]
+
+Each compiled plan is run repeatedly until total_steps steps have executed,
+against StubActionBackend with call recording off, so the numbers are the
+engine's own per-step overhead.
+"""
+import sys
+import time
+
+from synthetic_flows import chain_flow, if_else_tree_flow
+
+from flow_engine import StubActionBackend, compile_flow, run_plan
+from flow_model import Node, Connection
+
+
+def find_and_branch_flow(node_count):
+    """A chain of Find Image -> If/Else pairs; "true" continues, "false" goes to a Log Message."""
+    flow = chain_flow(2) # Start -> End
+    start, end = list(flow.nodes)
+    flow.remove_node(end)
+    previous, previous_port = start, "out"
+    for i in range((node_count - 1) // 3):
+        find = Node("Find Image", properties={"image_path": "missing.png" if i % 1000 == 999 else "button.png"})
+        branch = Node("Conditional (If/Else)")
+        fallback = Node("Log Message", properties={"message": f"not found {i}"})
+        for node in (find, branch, fallback):
+            flow.add_node(node)
+        flow.add_connection(Connection(previous, previous_port, find.id, "in"))
+        flow.add_connection(Connection(find.id, "out", branch.id, "in"))
+        flow.add_connection(Connection(branch.id, "false", fallback.id, "in"))
+        previous, previous_port = branch.id, "true"
+    return flow
+
+
+def bench(label, flow, total_steps):
+    start = time.perf_counter()
+    plan = compile_flow(flow)
+    compile_s = time.perf_counter() - start
+
+    backend = StubActionBackend(find_results={"button.png": (10, 10)}, record_calls=False)
+    steps = runs = 0
+    start = time.perf_counter()
+    while steps < total_steps:
+        steps += run_plan(plan, backend).steps_run
+        runs += 1
+    run_s = time.perf_counter() - start
+    print(f"{label:16s} nodes={len(plan):>7d}  compile {compile_s * 1000:7.1f}ms  "
+          f"runs={runs:>6d} steps={steps:>8d}  {steps / run_s:12,.0f} steps/s")
+
+
+def main():
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    total_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    bench("chain", chain_flow(node_count), total_steps)
+    bench("if/else tree", if_else_tree_flow(node_count), total_steps)
+    bench("find + branch", find_and_branch_flow(node_count), total_steps)
+
+
+if __name__ == "__main__":
+    main()
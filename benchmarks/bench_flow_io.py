@@ -0,0 +1,70 @@
+"""Save/load benchmark and round-trip check for the flow file format.
+
+Usage: python benchmarks/bench_flow_io.py [node_count ...]
+
+For each synthetic flow it reports save time, full load time, time until the
+first chunk (what the editor shows first) and the loader's peak extra memory,
+and checks that the loaded flow matches the original.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic_flows import GENERATORS
+
+from flow_io import FlowLoader, save_flow, load_flow
+
+
+def flow_signature(flow):
+    """Everything the file format is meant to preserve, keyed by stable uid."""
+    nodes = sorted((n.uid, n.node_type, n.name, n.x, n.y, sorted(n.properties.items())) for n in flow.nodes.values())
+    connections = sorted((c.uid, flow.nodes[c.from_node_id].uid, c.from_port_name,
+                          flow.nodes[c.to_node_id].uid, c.to_port_name) for c in flow.connections.values())
+    return nodes, connections
+
+
+def bench(kind, node_count, directory, suffix):
+    flow = GENERATORS[kind](node_count)
+    path = os.path.join(directory, f"{kind}_{node_count}{suffix}")
+
+    start = time.perf_counter()
+    save_flow(flow, path)
+    save_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loader = FlowLoader(path)
+    loader.load_chunk(1000)
+    first_chunk_s = time.perf_counter() - start
+    loader.close()
+
+    start = time.perf_counter()
+    loaded = load_flow(path)
+    load_s = time.perf_counter() - start
+
+    # Peak memory of a load beyond the flow it produces, i.e. the parser's own overhead
+    tracemalloc.start()
+    loaded_again = load_flow(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded_again
+
+    assert flow_signature(loaded) == flow_signature(flow), f"round trip mismatch for {path}"
+    size_mb = os.path.getsize(path) / 2**20
+    print(f"{kind:7s} {node_count:>7d} {suffix or '.flow':8s} {size_mb:7.1f} MiB  save {save_s:6.2f}s  "
+          f"load {load_s:6.2f}s  first chunk {first_chunk_s * 1000:6.1f}ms  "
+          f"loader overhead {(peak - retained) / 2**20:6.2f} MiB  round trip ok")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    with tempfile.TemporaryDirectory() as directory:
+        for node_count in sizes:
+            for kind in GENERATORS:
+                bench(kind, node_count, directory, ".flow")
+            bench("chain", node_count, directory, ".flow.gz")
+
+
+if __name__ == "__main__":
+    main()
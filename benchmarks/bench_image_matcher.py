@@ -0,0 +1,81 @@
+"""Find Image matcher benchmark: matches per second at several screen and template sizes.
+
+Usage: python benchmarks/bench_image_matcher.py [searches_per_case]
+
+Screens are synthetic "desktops" (random flat-coloured windows and buttons plus
+noise); each template is cut out of the screen at a random spot, so every search
+has exactly one right answer, which is checked. Each size is measured full screen
+and with a Rectangle region twice the template's size around the target, and once
+for a template that is not on screen (the early-reject path).
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_matcher import ImageMatcher
+
+SCREEN_SIZES = [(1280, 720), (1920, 1080), (2560, 1440)]
+TEMPLATE_SIZES = [32, 64, 128]
+
+
+def synthetic_screen(width, height, seed=0, windows=40):
+    """An RGB uint8 screenshot made of random rectangles over a gradient, with pixel noise."""
+    rng = np.random.default_rng(seed)
+    screen = np.empty((height, width, 3), dtype=np.uint8)
+    screen[:] = np.linspace(40, 90, width, dtype=np.uint8)[None, :, None]
+    for _ in range(windows):
+        w, h = rng.integers(20, width // 3), rng.integers(12, height // 3)
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        screen[y:y + h, x:x + w] = rng.integers(0, 256, 3)
+        # Small "glyphs" inside each window so templates have texture
+        for _ in range(w * h // 200):
+            lw, lh = rng.integers(2, 8), rng.integers(2, 10)
+            lx, ly = x + rng.integers(0, max(1, w - lw)), y + rng.integers(0, max(1, h - lh))
+            screen[ly:ly + lh, lx:lx + lw] = rng.integers(0, 256, 3)
+    noise = rng.integers(-6, 7, screen.shape)
+    return np.clip(screen.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def bench_case(matcher, screen, template_path, region, expected, searches):
+    start = time.perf_counter()
+    for _ in range(searches):
+        match = matcher.find(screen, template_path, 0.9, region)
+    elapsed = time.perf_counter() - start
+    found = (match.x, match.y) if match else None
+    if found != expected:
+        raise AssertionError(f"expected {expected}, got {match}")
+    return searches / elapsed
+
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = np.random.default_rng(1)
+    matcher = ImageMatcher()
+    print(f"{'screen':>10} {'template':>8} {'full screen':>14} {'region':>14} {'not found':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in SCREEN_SIZES:
+            screen = synthetic_screen(width, height, seed=width)
+            for size in TEMPLATE_SIZES:
+                x, y = int(rng.integers(0, width - size)), int(rng.integers(0, height - size))
+                path = os.path.join(directory, f"t{width}_{size}.npy")
+                np.save(path, screen[y:y + size, x:x + size])
+                missing_path = os.path.join(directory, f"m{width}_{size}.npy")
+                np.save(missing_path, rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+
+                region = (x - size // 2, y - size // 2, size * 2, size * 2)
+                full = bench_case(matcher, screen, path, None, (x, y), searches)
+                roi = bench_case(matcher, screen, path, region, (x, y), searches)
+                missing = bench_case(matcher, screen, missing_path, None, None, searches)
+                print(f"{width:>5}x{height:<4} {size:>6}px {full:>10.1f}/s {roi:>10.1f}/s {missing:>10.1f}/s")
+    cache = matcher.cache
+    print(f"template cache: {cache.hits} hits, {cache.misses} misses; "
+          f"early rejects: {matcher.early_rejects}/{matcher.searches} searches")
+
+
+if __name__ == "__main__":
+    main()
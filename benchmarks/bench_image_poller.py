@@ -0,0 +1,85 @@
+"""Wait-until-image-appears benchmark: change-detection polling vs. a full match per poll.
+
+Usage: python benchmarks/bench_image_poller.py [polls_before_target]
+
+A synthetic 1920x1080 screen is polled with the target absent. With 100 ms polls,
+a small "clock" area changes every 10th poll (once a second) and a window-sized
+area is redrawn every 25th poll. After polls_before_target polls the target is pasted far away
+from both. Sleeping between polls is replaced by those screen edits, so the
+timings are pure poll cost.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_image_matcher import synthetic_screen
+
+from image_matcher import ImageMatcher
+from image_poller import ImagePoller
+from screen_capture import ScreenCapture, SyntheticScreenBackend
+
+
+class ScriptedScreen:
+    """Edits the synthetic screen between polls, the way a busy desktop would."""
+    def __init__(self, backend, target, target_at, appear_after):
+        self.backend = backend
+        self.target = target
+        self.target_at = target_at
+        self.appear_after = appear_after
+        self.polls = 0
+        self.rng = np.random.default_rng(5)
+
+    def sleep(self, _seconds):
+        self.polls += 1
+        if self.polls % 10 == 0:
+            self.backend.paste(1800, 1050, self.rng.integers(0, 256, (16, 60, 3), dtype=np.uint8)) # Clock
+        if self.polls % 25 == 0:
+            self.backend.paste(200, 200, self.rng.integers(0, 256, (300, 400, 3), dtype=np.uint8)) # Window redraw
+        if self.polls == self.appear_after:
+            self.backend.paste(*self.target_at, self.target)
+
+
+def run(label, screen, target, template_path, appear_after, change_detection):
+    backend = SyntheticScreenBackend(screen.copy())
+    capture = ScreenCapture(backend, max_age=0.0)
+    matcher = ImageMatcher()
+    poller = ImagePoller(capture, matcher)
+    script = ScriptedScreen(backend, target, (1400, 600), appear_after)
+    start = time.perf_counter()
+    if change_detection:
+        match = poller.wait_for(template_path, 0.9, None, timeout=60.0, poll_interval=0.1, sleep=script.sleep)
+        stats = poller.stats()
+    else:
+        while True:
+            match = matcher.find(capture.frame(), template_path, 0.9, None)
+            if match is not None:
+                break
+            script.sleep(0.1)
+        stats = {"polls": script.polls + 1}
+    elapsed = time.perf_counter() - start
+    assert match is not None and (match.x, match.y) == (1400, 600), match
+    polls = stats["polls"]
+    print(f"{label:<18} {elapsed * 1000:8.1f} ms  {polls} polls  {elapsed * 1000 / polls:6.2f} ms/poll", end="")
+    if change_detection:
+        print(f"  skipped={stats['polls_skipped']} partial={stats['polls_partial']} full={stats['polls_full']} "
+              f"skip rate={stats['poll_skip_rate']:.0%}")
+    else:
+        print()
+
+
+def main():
+    appear_after = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    screen = synthetic_screen(1920, 1080, seed=9)
+    target = np.random.default_rng(2).integers(0, 256, (48, 48, 3), dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        template_path = os.path.join(directory, "target.npy")
+        np.save(template_path, target)
+        run("full match / poll", screen, target, template_path, appear_after, change_detection=False)
+        run("change detection", screen, target, template_path, appear_after, change_detection=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Auto-layout benchmark: layered layout of synthetic flows, and applying it in the editor.
+
+Usage: python benchmarks/bench_layout.py [sizes] [--virtualized]
+
+For each generator (chain, fanout, ifelse) and size (default 1000,10000):
+  layout   flow_layout.layout_flow on the plain model (no Qt)
+  apply    MainWindow.auto_layout on the same flow: layout plus the batched move,
+           including the first repaint (processEvents)
+  region   MainWindow.layout_around for one node in the middle of the flow
+Also reports the columns used and the connection crossings left by auto_layout.
+Uses the offscreen Qt platform unless QT_QPA_PLATFORM is already set.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import GENERATORS
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from flow_layout import layout_flow
+from main_app2 import MainWindow
+from tracing import WARNING, tracer
+
+
+def crossings(flow):
+    """Pairs of connections between the same two columns whose ends are in opposite order."""
+    by_columns = {}
+    for connection in flow.connections.values():
+        source, target = flow.nodes[connection.from_node_id], flow.nodes[connection.to_node_id]
+        by_columns.setdefault((source.x, target.x), []).append((source.y, target.y))
+    total = 0
+    for ends in by_columns.values():
+        ends = np.array(ends)
+        source_y, target_y = ends[:, 0], ends[:, 1]
+        total += int(((source_y[:, None] < source_y) & (target_y[:, None] > target_y)).sum())
+    return total
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    sizes = [int(s) for s in (args[0] if args else "1000,10000").split(",")]
+    virtualized = "--virtualized" in sys.argv
+    tracer.set_level(WARNING)
+    app = QApplication(sys.argv[:1])
+
+    print(f"{'flow':<8} {'nodes':>6} {'layout ms':>10} {'apply ms':>9} {'region ms':>10} {'columns':>8} {'crossings':>10}")
+    for name, generator in GENERATORS.items():
+        for size in sizes:
+            flow = generator(size)
+            started = time.perf_counter()
+            layout_flow(flow)
+            layout_time = time.perf_counter() - started
+
+            window = MainWindow(virtualized=virtualized)
+            window.resize(1600, 1000)
+            window.show()
+            window.build_deferred_ui()
+            window.insert_nodes(flow.nodes.values(), flow.connections.values())
+            app.processEvents()
+            started = time.perf_counter()
+            window.auto_layout()
+            app.processEvents()
+            apply_time = time.perf_counter() - started
+
+            model = window.current_flow
+            columns = len({node.x for node in model.nodes.values()})
+            left = crossings(model)
+            middle = list(model.nodes)[len(model.nodes) // 2]
+            started = time.perf_counter()
+            window.layout_around([middle])
+            app.processEvents()
+            region_time = time.perf_counter() - started
+
+            print(f"{name:<8} {size:>6} {layout_time * 1000:>10.1f} {apply_time * 1000:>9.1f} "
+                  f"{region_time * 1000:>10.1f} {columns:>8} {left:>10}")
+            window.move_batcher.discard()
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Memory benchmark: compact flow_model classes vs. the original dict/uuid-based model.
+
+Usage: python benchmarks/bench_model_memory.py [node_count]
+
+Measured with tracemalloc, so it only counts Python allocations. The legacy
+model also kept each position in a QPointF, whose C++ storage tracemalloc
+cannot see; the legacy numbers below are therefore a lower bound.
+"""
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flow_model import Node, Connection, Flow
+
+NODE_TYPES = ["Start", "Find Window", "Find Image", "Mouse Action", "Keyboard Action",
+              "Delay/Wait", "Conditional (If/Else)", "Log Message", "End"]
+
+
+# --- The data model as it was before flow_model.py ---
+class LegacyNode:
+    def __init__(self, node_type, name="New Node", position=(50, 50), properties=None):
+        self.id = str(uuid.uuid4())
+        self.node_type = node_type
+        self.name = name
+        self.position = (float(position[0]), float(position[1])) # Was a QPointF
+        self.properties = properties if properties is not None else {}
+        self.width = 150
+        self.height = 80
+        self.input_ports = []
+        self.output_ports = []
+        if self.node_type != "Start":
+            self.input_ports.append({"name": "in", "type": "input"})
+        if self.node_type != "End":
+            if self.node_type == "Conditional (If/Else)":
+                self.output_ports.append({"name": "true", "type": "output"})
+                self.output_ports.append({"name": "false", "type": "output"})
+            else:
+                self.output_ports.append({"name": "out", "type": "output"})
+        if self.node_type == "Log Message" and "message" not in self.properties:
+            self.properties["message"] = "Default log message"
+        if self.node_type == "Delay/Wait" and "duration_ms" not in self.properties:
+            self.properties["duration_ms"] = 1000
+
+
+class LegacyConnection:
+    def __init__(self, from_node_id, from_port_name, to_node_id, to_port_name):
+        self.id = str(uuid.uuid4())
+        self.from_node_id = from_node_id
+        self.from_port_name = from_port_name
+        self.to_node_id = to_node_id
+        self.to_port_name = to_port_name
+
+
+class LegacyFlow:
+    def __init__(self):
+        self.nodes = {}
+        self.connections = []
+
+
+def build_legacy(node_count):
+    flow = LegacyFlow()
+    previous = None
+    for i in range(node_count):
+        node_type = "".join(NODE_TYPES[i % len(NODE_TYPES)]) # Fresh string, like QListWidgetItem.text()
+        node = LegacyNode(node_type, name=node_type, position=(i * 50 % 500, (i // 10) * 100))
+        flow.nodes[node.id] = node
+        if previous is not None:
+            flow.connections.append(LegacyConnection(previous.id, "out", node.id, "in"))
+        previous = node
+    return flow
+
+
+def build_compact(node_count):
+    flow = Flow()
+    previous = None
+    for i in range(node_count):
+        node_type = "".join(NODE_TYPES[i % len(NODE_TYPES)])
+        node = Node(node_type, name=node_type, position=(i * 50 % 500, (i // 10) * 100))
+        flow.add_node(node)
+        if previous is not None:
+            flow.add_connection(Connection(previous.id, "out", node.id, "in"))
+        previous = node
+    return flow
+
+
+def measure(builder, node_count):
+    tracemalloc.start()
+    flow = builder(node_count)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del flow
+    return current
+
+
+def main():
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    legacy = measure(build_legacy, node_count)
+    compact = measure(build_compact, node_count)
+    print(f"nodes={node_count} (chain, {node_count - 1} connections)")
+    print(f"legacy : {legacy / 2**20:8.1f} MiB  ({legacy / node_count:6.0f} B/node)")
+    print(f"compact: {compact / 2**20:8.1f} MiB  ({compact / node_count:6.0f} B/node)")
+    print(f"ratio  : {legacy / compact:.2f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
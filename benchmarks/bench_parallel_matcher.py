@@ -0,0 +1,75 @@
+"""Parallel matching benchmark: one step looking for several templates on a 4K screen.
+
+Usage: python benchmarks/bench_parallel_matcher.py [searches] [max_processes]
+
+Compares the in-process ImageMatcher (templates one after another) with
+ParallelImageMatcher at 1, 2, 4, ... processes up to max_processes (default: all
+cores). Speed-up is relative to the in-process matcher; on a single-core machine
+expect none, only the pool's overhead.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_image_matcher import synthetic_screen
+
+from image_matcher import ImageMatcher
+from parallel_matcher import ParallelImageMatcher
+
+TEMPLATE_SIZE = 64
+TEMPLATE_COUNT = 4
+
+
+def serial_find_any(matcher, screen, paths):
+    best = None
+    for path in paths:
+        match = matcher.find(screen, path, 0.9)
+        if match is not None and (best is None or match.score > best[1].score):
+            best = (path, match)
+    return best
+
+
+def timed(find_any, searches):
+    result = find_any() # Warm-up: template caches, pool start
+    start = time.perf_counter()
+    for _ in range(searches):
+        result = find_any()
+    return (time.perf_counter() - start) / searches, result
+
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    screen = synthetic_screen(3840, 2160, seed=4, windows=80)
+    rng = np.random.default_rng(8)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(TEMPLATE_COUNT):
+            path = os.path.join(directory, f"t{i}.npy")
+            if i == TEMPLATE_COUNT - 1:
+                target = (3000, 1800) # Only the last template is on screen
+                np.save(path, screen[1800:1800 + TEMPLATE_SIZE, 3000:3000 + TEMPLATE_SIZE])
+            else:
+                np.save(path, rng.integers(0, 256, (TEMPLATE_SIZE, TEMPLATE_SIZE, 3), dtype=np.uint8))
+            paths.append(path)
+
+        print(f"3840x2160 screen, {TEMPLATE_COUNT} templates of {TEMPLATE_SIZE}px, cores={os.cpu_count()}")
+        serial_matcher = ImageMatcher()
+        serial, result = timed(lambda: serial_find_any(serial_matcher, screen, paths), searches)
+        assert result and (result[1].x, result[1].y) == target, result
+        print(f"{'in-process':<14} {serial * 1000:8.1f} ms/search")
+
+        processes = 1
+        while processes <= max_processes:
+            with ParallelImageMatcher(processes=processes) as matcher:
+                elapsed, result = timed(lambda: matcher.find_any(screen, paths, 0.9), searches)
+            assert result and (result[1].x, result[1].y) == target, result
+            print(f"{processes:>2} processes   {elapsed * 1000:8.1f} ms/search  speed-up {serial / elapsed:4.2f}x")
+            processes *= 2
+
+
+if __name__ == "__main__":
+    main()
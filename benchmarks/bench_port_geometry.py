@@ -0,0 +1,73 @@
+"""Port geometry benchmark: port position lookups and connection path updates.
+
+Usage: python benchmarks/bench_port_geometry.py [calls]
+
+Times Node.get_port_position, GraphicsNode.get_port_item_rect / get_port_at_pos
+and GraphicsConnectionItem.update_path for an If/Else node (two outputs), and
+checks that the model and the graphics items agree on where every port is.
+Uses the offscreen Qt platform unless QT_QPA_PLATFORM is already set.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import chain_flow # Also puts the repo root on sys.path
+
+from PyQt6.QtCore import QPointF
+from PyQt6.QtWidgets import QApplication, QGraphicsScene
+
+from canvas import GraphicsConnectionItem, GraphicsNode
+from flow_model import Connection, Node
+
+
+def per_call(function, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = QApplication(sys.argv)
+    scene = QGraphicsScene()
+    branch = Node("Conditional (If/Else)", position=(100, 100))
+    target = Node("Log Message", position=(400, 200))
+    g_branch, g_target = GraphicsNode(branch), GraphicsNode(target)
+    scene.addItem(g_branch)
+    scene.addItem(g_target)
+    connection = Connection(branch.id, "false", target.id, "in")
+    g_connection = GraphicsConnectionItem(connection, g_branch, g_target)
+    scene.addItem(g_connection)
+
+    mismatches = 0
+    for node, g_node in ((branch, g_branch), (target, g_target)):
+        for port in node.input_ports + node.output_ports:
+            center = g_node.mapToScene(g_node.get_port_item_rect(port).center())
+            if (center.x(), center.y()) != node.get_port_position(port["name"], port["type"]):
+                mismatches += 1
+    print(f"model/graphics port position mismatches: {mismatches}")
+
+    false_port = {"name": "false", "type": "output"}
+    hover = QPointF(150, 53) # Over the "false" output
+    for label, function in (
+        ("Node.get_port_position", lambda: branch.get_port_position("false", "output")),
+        ("GraphicsNode.get_port_item_rect", lambda: g_branch.get_port_item_rect(false_port)),
+        ("GraphicsNode.get_port_at_pos", lambda: g_branch.get_port_at_pos(hover)),
+        ("GraphicsConnectionItem.update_path", g_connection.update_path),
+    ):
+        print(f"{label:<36} {per_call(function, calls):8.0f} ns/call")
+
+    flow = chain_flow(10000)
+    started = time.perf_counter()
+    for node in flow.nodes.values():
+        for port in node.output_ports:
+            node.get_port_position(port["name"], "output")
+    print(f"all output ports of a 10k node chain: {(time.perf_counter() - started) * 1000:.1f} ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Port index benchmark: nearest-input-port queries for connection drops.
+
+Usage: python benchmarks/bench_port_index.py [node_count] [queries]
+
+Indexes every input port of a synthetic chain flow in canvas.PortIndex, then
+times random snap queries (24 px radius) against a linear scan over all ports,
+and the per-node update cost paid while dragging. No window is created.
+"""
+import random
+import sys
+import time
+
+from synthetic_flows import chain_flow # Also puts the repo root on sys.path
+
+from canvas import PortIndex
+from node_types import get_node_type
+
+
+def linear_nearest(ports, x, y, radius):
+    best, best_distance = None, radius * radius
+    for node_id, port_name, px, py in ports:
+        distance = (px - x) ** 2 + (py - y) ** 2
+        if distance <= best_distance:
+            best, best_distance = (node_id, port_name, px, py), distance
+    return best
+
+
+def main():
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    flow = chain_flow(node_count)
+    nodes = list(flow.nodes.values())
+
+    index = PortIndex()
+    started = time.perf_counter()
+    for node in nodes:
+        index.update_node(node.id, node.node_type, node.x, node.y)
+    build_s = time.perf_counter() - started
+
+    ports = []
+    for node in nodes:
+        for port in node.input_ports:
+            ox, oy = get_node_type(node.node_type).port_offsets[("input", port["name"])]
+            ports.append((node.id, port["name"], node.x + ox, node.y + oy))
+
+    rng = random.Random(1)
+    points = []
+    for _ in range(queries):
+        node = rng.choice(nodes)
+        points.append((node.x + rng.uniform(-30, 30), node.y + rng.uniform(0, node.height)))
+
+    started = time.perf_counter()
+    indexed = [index.nearest_input(x, y, 24) for x, y in points]
+    indexed_s = time.perf_counter() - started
+    scan_points = points[:max(1, queries // 20)]
+    started = time.perf_counter()
+    scanned = [linear_nearest(ports, x, y, 24) for x, y in scan_points]
+    scan_s = time.perf_counter() - started
+    agree = sum(1 for a, b in zip(indexed, scanned) if (a and a[:2]) == (b and b[:2]))
+
+    started = time.perf_counter()
+    for node in nodes[:10000]:
+        index.update_node(node.id, node.node_type, node.x + 5, node.y + 5)
+    update_s = time.perf_counter() - started
+
+    print(f"nodes={node_count}, input ports indexed={len(ports)}, build {build_s * 1000:.0f} ms")
+    print(f"nearest_input (index)   {indexed_s / queries * 1e6:9.1f} us/query, "
+          f"{sum(1 for hit in indexed if hit)} of {queries} snapped")
+    print(f"nearest (linear scan)   {scan_s / len(scan_points) * 1e6:9.1f} us/query, "
+          f"agrees with index on {agree}/{len(scan_points)}")
+    print(f"update_node (drag)      {update_s / min(10000, node_count) * 1e6:9.1f} us/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Properties panel benchmark: cost of changing the selection.
+
+Usage: python benchmarks/bench_properties_panel.py [selections]
+
+Selects nodes through MainWindow.handle_node_selection, first alternating
+between types (Find Image, Delay/Wait, Log Message, Mouse Action), then only
+Find Image nodes (the largest form), and reports the time per selection, as measured by perf_monitor around show_node, along with how many
+forms and widgets exist afterwards. Uses the offscreen Qt platform unless
+QT_QPA_PLATFORM is already set.
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import chain_flow
+
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from main_app2 import MainWindow
+from perf_monitor import perf
+
+SELECTED_TYPES = ("Find Image", "Delay/Wait", "Log Message", "Mouse Action")
+
+
+def main():
+    selections = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    window.build_deferred_ui()
+    flow = chain_flow(200)
+    nodes = [node for node in flow.nodes.values() if node.node_type in SELECTED_TYPES]
+
+    # First selection of each type builds its form
+    for node_type in SELECTED_TYPES:
+        perf.reset()
+        window.handle_node_selection(next(n for n in nodes if n.node_type == node_type))
+        print(f"first {node_type:<14} {perf.properties_rebuild_last * 1000:7.2f} ms (builds the form)")
+    widgets_before = len(window.properties_panel.findChildren(QWidget))
+
+    for label, pool in (("alternating types", nodes),
+                        ("Find Image only", [n for n in nodes if n.node_type == "Find Image"])):
+        times = []
+        started = time.perf_counter()
+        for i in range(selections):
+            window.handle_node_selection(pool[i % len(pool)])
+            times.append(perf.properties_rebuild_last)
+            if i % 100 == 0:
+                app.processEvents()
+        elapsed = time.perf_counter() - started
+        app.processEvents()
+
+        times.sort()
+        print(f"{label}: {selections} selections in {elapsed * 1000:.0f} ms, per selection: "
+              f"median {statistics.median(times) * 1e6:.0f} us, p99 {times[int(len(times) * 0.99)] * 1e6:.0f} us, "
+              f"max {times[-1] * 1e6:.0f} us")
+    print(f"forms built: {window.properties_panel.forms_built}, widgets in panel: "
+          f"{widgets_before} before, {len(window.properties_panel.findChildren(QWidget))} after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Shared screen capture benchmark: a chain of Find Image steps with and without frame reuse.
+
+Usage: python benchmarks/bench_screen_capture.py [find_steps] [capture_latency_ms]
+
+Runs Start -> Find Image x N -> End against a synthetic 1920x1080 screen whose
+grabs cost capture_latency_ms (default 30 ms, typical of a full-desktop grab).
+"grab per search" sets max_age=0, i.e. what every Find Image would do without a
+shared frame; "shared frame" uses the default freshness window. Each find uses
+a Rectangle region so matching itself stays cheap and the capture cost shows.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_image_matcher import synthetic_screen
+
+from flow_engine import compile_flow, run_plan
+from flow_model import Node, Connection, Flow
+from screen_capture import ScreenActionBackend, ScreenCapture, SyntheticScreenBackend
+
+
+def find_chain_flow(step_count, template_path, region):
+    flow = Flow()
+    start = Node("Start")
+    flow.add_node(start)
+    previous = start.id
+    x, y, w, h = region
+    for _ in range(step_count):
+        find = Node("Find Image", properties={"image_path": template_path, "confidence": 0.9,
+                                              "search_mode": "Rectangle", "search_rect_x": x,
+                                              "search_rect_y": y, "search_rect_w": w, "search_rect_h": h})
+        flow.add_node(find)
+        flow.add_connection(Connection(previous, "out", find.id, "in"))
+        previous = find.id
+    end = Node("End")
+    flow.add_node(end)
+    flow.add_connection(Connection(previous, "out", end.id, "in"))
+    return flow
+
+
+def bench(label, plan, screen, latency, max_age):
+    capture = ScreenCapture(SyntheticScreenBackend(screen, latency), max_age=max_age)
+    backend = ScreenActionBackend(capture)
+    start = time.perf_counter()
+    result = run_plan(plan, backend)
+    elapsed = time.perf_counter() - start
+    stats = result.stats
+    print(f"{label:<16} {elapsed * 1000:8.1f} ms  {elapsed * 1000 / len(plan):6.2f} ms/step  "
+          f"grabs={stats['capture_misses']} reused={stats['capture_hits']} "
+          f"frame age mean={stats['frame_age_mean_s'] * 1000:.2f} ms max={stats['frame_age_max_s'] * 1000:.2f} ms")
+
+
+def main():
+    step_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 30.0) / 1000.0
+    screen = synthetic_screen(1920, 1080, seed=3)
+    with tempfile.TemporaryDirectory() as directory:
+        template_path = os.path.join(directory, "button.npy")
+        np.save(template_path, screen[500:540, 900:980])
+        plan = compile_flow(find_chain_flow(step_count, template_path, (860, 460, 160, 120)))
+        print(f"{step_count} Find Image steps, capture latency {latency * 1000:.0f} ms")
+        bench("grab per search", plan, screen, latency, max_age=0.0)
+        bench("shared frame", plan, screen, latency, max_age=0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Tracing overhead benchmark: cost per call of disabled, buffered and printed trace records.
+
+Usage: python benchmarks/bench_tracing.py [calls]
+
+"print" is what the editor did before tracing.py (output sent to /dev/null, so
+terminal rendering is not even counted). "disabled" is a debug record below the
+category's level, the common case in hot paths; "guarded" is the same behind an
+enabled() check; "buffered" records into the ring buffer without printing.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tracing import DEBUG, INFO, Tracer
+
+
+def per_call_ns(function, calls):
+    start = time.perf_counter()
+    function(calls)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    p1, p2, name = (10.0, 20.0), (30.0, 40.0), "Find Image"
+    with open(os.devnull, "w") as devnull:
+        quiet = Tracer(level=INFO, stream=devnull)
+        buffered = Tracer(level=DEBUG, echo_level=100, ring_size=10_000, stream=devnull)
+
+        def with_print(n):
+            for i in range(n):
+                print(f"Conn {i}: Updating path from {p1} to {p2} for nodes {name} -> {name}", file=devnull)
+
+        def disabled(n):
+            for i in range(n):
+                quiet.debug("canvas", "Conn %s: path %s -> %s for %s -> %s", i, p1, p2, name, name)
+
+        def guarded(n):
+            for i in range(n):
+                if quiet.enabled(DEBUG, "canvas"):
+                    quiet.debug("canvas", "Conn %s: path %s -> %s for %s -> %s", i, p1, p2, name, name)
+
+        def ring(n):
+            for i in range(n):
+                buffered.debug("canvas", "Conn %s: path %s -> %s for %s -> %s", i, p1, p2, name, name)
+
+        def baseline(n):
+            for i in range(n):
+                pass
+
+        loop = per_call_ns(baseline, calls)
+        for label, function in (("print", with_print), ("disabled", disabled), ("guarded", guarded), ("buffered", ring)):
+            print(f"{label:<10} {per_call_ns(function, calls) - loop:8.0f} ns/call")
+        start = time.perf_counter()
+        dumped = buffered.dump(devnull)
+        print(f"dump of {dumped} buffered records: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
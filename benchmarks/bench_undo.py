@@ -0,0 +1,92 @@
+"""Undo history benchmark: memory per entry, merging, eviction and undo/redo latency.
+
+Usage: python benchmarks/bench_undo.py [nodes] [budget_mb]
+
+On a chain flow of `nodes` nodes (default 5000) in an offscreen MainWindow:
+types 1000 characters into a Log Message field, drags 100 random groups of 50
+nodes, then pastes a copy of the whole flow. Reports the history entries, their
+estimated size against the budget (default 64 MiB), and the time to undo and redo
+each step.
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_flows import chain_flow
+
+from PyQt6.QtWidgets import QApplication
+
+from flow_history import UndoStack
+from main_app2 import MainWindow
+from tracing import WARNING, tracer
+
+
+def report(label, window):
+    stats = window.history.stats()
+    print(f"{label:<22} entries {stats['undo_entries']:4}  estimated {stats['size_bytes'] / 1024:9.1f} KiB  "
+          f"merged {stats['merged']:5}  evicted {stats['evicted']}")
+
+
+def main():
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    budget_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 64
+    tracer.set_level(WARNING)
+    app = QApplication(sys.argv[:1])
+    window = MainWindow()
+    window.show()
+    window.build_deferred_ui()
+    flow = chain_flow(node_count)
+    window.insert_nodes(flow.nodes.values(), flow.connections.values())
+    app.processEvents()
+    window.history = UndoStack(int(budget_mb * 1024 * 1024)) # The load itself is not part of the measurement
+
+    # Typing: one property edit per keystroke, merged into one entry
+    node = next(n for n in window.current_flow.nodes.values() if n.node_type == "Log Message")
+    window.handle_node_selection(node)
+    text = ""
+    for i in range(1000):
+        text += "abcdefghij"[i % 10]
+        window.update_node_property(node, "message", text)
+    report("1000 keystrokes", window)
+
+    # Drags: each drag transaction is one entry of (node, old x, old y, new x, new y) deltas
+    rng = random.Random(1)
+    node_ids = list(window.graphics_nodes)
+    for _ in range(100):
+        group = rng.sample(node_ids, 50)
+        window.move_batcher.begin()
+        for step in range(10):
+            for node_id in group:
+                graphics_node = window.graphics_nodes[node_id]
+                graphics_node.setPos(graphics_node.x() + 3, graphics_node.y() + 1)
+            window.move_batcher.flush()
+        window.move_batcher.end()
+    report("+ 100 drags of 50", window)
+
+    window.select_nodes(node_ids)
+    window.duplicate_selection()
+    app.processEvents()
+    report(f"+ paste of {node_count}", window)
+
+    undo_times = []
+    while window.history.can_undo():
+        started = time.perf_counter()
+        window.undo()
+        undo_times.append(time.perf_counter() - started)
+    redo_times = []
+    while window.history.can_redo():
+        started = time.perf_counter()
+        window.redo()
+        redo_times.append(time.perf_counter() - started)
+    print(f"undo: {len(undo_times)} steps, first (the paste) {undo_times[0] * 1000:.0f} ms, "
+          f"others max {max(undo_times[1:], default=0) * 1000:.1f} ms")
+    print(f"redo: {len(redo_times)} steps, last (the paste) {redo_times[-1] * 1000:.0f} ms, "
+          f"others max {max(redo_times[:-1], default=0) * 1000:.1f} ms")
+    window.move_batcher.discard()
+
+
+if __name__ == "__main__":
+    main()
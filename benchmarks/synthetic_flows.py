@@ -0,0 +1,80 @@
+"""Synthetic flow generators shared by the benchmarks."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flow_model import Node, Connection, Flow
+
+ACTION_TYPES = ["Find Window", "Find Image", "Mouse Action", "Keyboard Action", "Delay/Wait", "Log Message"]
+GRID_COLUMNS = 100
+
+
+def _position(index):
+    return ((index % GRID_COLUMNS) * 200, (index // GRID_COLUMNS) * 120)
+
+
+def chain_flow(node_count):
+    """Start -> action -> action -> ... -> End."""
+    flow = Flow()
+    previous = None
+    for i in range(node_count):
+        if i == 0:
+            node_type = "Start"
+        elif i == node_count - 1:
+            node_type = "End"
+        else:
+            node_type = ACTION_TYPES[i % len(ACTION_TYPES)]
+        node = Node(node_type, name=f"{node_type} {i}", position=_position(i))
+        flow.add_node(node)
+        if previous is not None:
+            flow.add_connection(Connection(previous.id, "out", node.id, "in"))
+        previous = node
+    return flow
+
+
+def fan_out_flow(node_count, width=50):
+    """Each hub fans out to `width` Log Message leaves; hubs are chained together."""
+    flow = Flow()
+    hub = None
+    for i in range(node_count):
+        if i % (width + 1) == 0:
+            node = Node("Start" if hub is None else "Delay/Wait", name=f"hub {i}", position=_position(i))
+            flow.add_node(node)
+            if hub is not None:
+                flow.add_connection(Connection(hub.id, "out", node.id, "in"))
+            hub = node
+        else:
+            node = Node("Log Message", name=f"leaf {i}", position=_position(i))
+            flow.add_node(node)
+            flow.add_connection(Connection(hub.id, "out", node.id, "in"))
+    return flow
+
+
+def if_else_tree_flow(node_count):
+    """Start feeding a binary tree of Conditional (If/Else) nodes; the last level is Log Message leaves."""
+    flow = Flow()
+    start = Node("Start", name="Start", position=_position(0))
+    flow.add_node(start)
+    nodes = []
+    tree_size = node_count - 1
+    for i in range(tree_size):
+        has_children = 2 * i + 1 < tree_size
+        node_type = "Conditional (If/Else)" if has_children else "Log Message"
+        node = Node(node_type, name=f"{node_type} {i}", position=_position(i + 1))
+        flow.add_node(node)
+        nodes.append(node)
+        if i:
+            parent = nodes[(i - 1) // 2]
+            port = "true" if i % 2 else "false"
+            flow.add_connection(Connection(parent.id, port, node.id, "in"))
+        else:
+            flow.add_connection(Connection(start.id, "out", node.id, "in"))
+    return flow
+
+
+GENERATORS = {
+    "chain": chain_flow,
+    "fanout": fan_out_flow,
+    "ifelse": if_else_tree_flow,
+}
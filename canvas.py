@@ -0,0 +1,1014 @@
+# --- Flow Canvas ---
+# Graphics side of the editor: the QGraphicsView canvas, node and connection items,
+# and the helpers that keep large flows interactive (spatial grid, batched moves,
+# viewport virtualization, port snapping, the performance HUD). Imported by main_app2 at startup
+# since the canvas is part of the first frame.
+from PyQt6.QtWidgets import (
+    QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsObject, QGraphicsSimpleTextItem,
+    QGraphicsSceneHoverEvent, QGraphicsSceneMouseEvent, QGraphicsPathItem, QGraphicsLineItem
+)
+from PyQt6.QtCore import Qt, QPointF, QRectF, QRect, pyqtSignal, pyqtSlot, QObject, QTimer
+from PyQt6.QtGui import QPainter, QColor, QBrush, QPen, QFont, QPainterPath
+
+from flow_history import MoveCommand
+from flow_model import Node, Connection
+from node_types import PORT_RADIUS, get_node_type
+from perf_monitor import perf
+from tracing import DEBUG, tracer
+
+
+# --- Spatial index for viewport queries ---
+class SpatialGrid:
+    """Uniform grid that buckets item ids by the scene rectangle they cover."""
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self._cells = {} # (cell_x, cell_y) -> set of item ids
+        self._item_cells = {} # item id -> tuple of cell keys it occupies
+
+    def _cell_ranges(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return range(int(x0 // size), int(x1 // size) + 1), range(int(y0 // size), int(y1 // size) + 1)
+
+    def insert(self, item_id, x, y, width, height):
+        self.remove(item_id)
+        cols, rows = self._cell_ranges(x, y, x + width, y + height)
+        keys = tuple((cx, cy) for cx in cols for cy in rows)
+        for key in keys:
+            self._cells.setdefault(key, set()).add(item_id)
+        self._item_cells[item_id] = keys
+
+    def remove(self, item_id):
+        for key in self._item_cells.pop(item_id, ()):
+            bucket = self._cells[key]
+            bucket.discard(item_id)
+            if not bucket:
+                del self._cells[key]
+
+    def query(self, x0, y0, x1, y1):
+        """Returns the ids of all items whose cells overlap the given rectangle."""
+        cols, rows = self._cell_ranges(x0, y0, x1, y1)
+        found = set()
+        if len(cols) * len(rows) > len(self._cells):
+            # Zoomed far out: cheaper to walk the occupied cells than the empty ones
+            for (cx, cy), bucket in self._cells.items():
+                if cx in cols and cy in rows:
+                    found |= bucket
+        else:
+            for cx in cols:
+                for cy in rows:
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        found |= bucket
+        return found
+
+    def __len__(self):
+        return len(self._item_cells)
+
+
+# --- Spatial index for connection drops ---
+class PortIndex:
+    """Scene positions of every input port, bucketed in a uniform grid.
+
+    Updated per node as nodes are added or moved. nearest_input() only looks at the
+    cells within the snap radius, so its cost does not grow with the flow.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {} # (cell_x, cell_y) -> {(node_id, port_name): (x, y)}
+        self._node_ports = {} # node_id -> ((node_id, port_name), cell key) pairs it occupies
+
+    def update_node(self, node_id, node_type, x, y):
+        """(Re-)indexes the input ports of a node whose top-left corner is at scene (x, y)."""
+        if node_id in self._node_ports:
+            self.remove_node(node_id)
+        info = get_node_type(node_type)
+        if not info.input_ports:
+            return
+        size = self.cell_size
+        cells = self._cells
+        entries = []
+        for port in info.input_ports:
+            ox, oy = info.port_offsets[("input", port["name"])]
+            px, py = x + ox, y + oy
+            key = (node_id, port["name"])
+            cell = (int(px // size), int(py // size))
+            bucket = cells.get(cell)
+            if bucket is None:
+                bucket = cells[cell] = {}
+            bucket[key] = (px, py)
+            entries.append((key, cell))
+        self._node_ports[node_id] = entries
+
+    def remove_node(self, node_id):
+        for key, cell in self._node_ports.pop(node_id, ()):
+            bucket = self._cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self._cells[cell]
+
+    def nearest_input(self, x, y, radius, exclude_node_id=None):
+        """Returns (node_id, port_name, port_x, port_y) of the closest input port within radius, or None."""
+        size = self.cell_size
+        best = None
+        best_distance = radius * radius
+        for cx in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            for cy in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                bucket = self._cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for key, (px, py) in bucket.items():
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance <= best_distance and key[0] != exclude_node_id:
+                        best_distance = distance
+                        best = (key[0], key[1], px, py)
+        return best
+
+    def clear(self):
+        self._cells = {}
+        self._node_ports = {}
+
+    def __len__(self):
+        return len(self._node_ports)
+
+
+def nodes_bounding_rect(nodes):
+    """The scene rect covering all nodes (None if there are none)."""
+    if not nodes:
+        return None
+    x0 = min(node.x for node in nodes)
+    y0 = min(node.y for node in nodes)
+    x1 = max(node.x + node.width for node in nodes)
+    y1 = max(node.y + node.height for node in nodes)
+    return QRectF(x0, y0, x1 - x0, y1 - y0)
+
+
+# --- Level of detail ---
+# Below this scale nodes are drawn as plain boxes (no title, no ports) and
+# connections as straight lines.
+LOD_DETAIL_THRESHOLD = 0.4
+
+
+class NodeTitleItem(QGraphicsSimpleTextItem):
+    """Title text that is skipped entirely when its node is drawn at low level of detail.
+
+    A simple text item: a QGraphicsTextItem builds a whole QTextDocument per node,
+    which made it the most expensive part of creating a node.
+    """
+    def paint(self, painter, option, widget=None):
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < LOD_DETAIL_THRESHOLD:
+            return
+        super().paint(painter, option, widget)
+
+
+# --- Port geometry ---
+# QRectF versions of each node type's precomputed port rectangles, shared by all items of the type
+_port_rect_tables = {} # node_type -> (((port_info, QRectF), ...), {(port type, port name): QRectF})
+
+
+def port_rect_table(node_type):
+    table = _port_rect_tables.get(node_type)
+    if table is None:
+        rects = tuple((port, QRectF(*rect)) for port, rect in get_node_type(node_type).port_rects)
+        table = (rects, {(port["type"], port["name"]): rect for port, rect in rects})
+        _port_rect_tables[node_type] = table
+    return table
+
+
+# --- Phase 3: Visual Node Item ---
+# itemChange() runs about a dozen times while a node is created, and PyQt6 enum attribute
+# lookups are slow, so the changes it reacts to are looked up once
+_POSITION_CHANGED = QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged
+_SELECTED_CHANGED = QGraphicsItem.GraphicsItemChange.ItemSelectedHasChanged
+
+
+class GraphicsNode(QGraphicsObject): # QGraphicsObject allows signals/slots
+    # Signal emitted when the node is selected
+    node_selected = pyqtSignal(object) # Will pass the data_node object
+    
+    # --- NEW: Signals for port interaction ---
+    port_drag_started = pyqtSignal(object, str, QPointF) # self, port_name, scene_pos
+    port_drag_ended_on_port = pyqtSignal(object, str, object, str) # from_graphics_node, from_port_name, to_graphics_node, to_port_name
+    port_drag_ended_on_nothing = pyqtSignal()
+    node_moved = pyqtSignal(int) # NEW SIGNAL: Pass node_id (data_node.id)
+
+    # Cache mode applied to new nodes; FlowCanvas.set_cached_rendering() switches it
+    cache_mode = QGraphicsItem.CacheMode.DeviceCoordinateCache
+
+    def __init__(self, data_node: Node, parent=None):
+        super().__init__(parent)
+        self.data_node = None
+
+        if GraphicsNode._body_brush is None:
+            GraphicsNode._build_style()
+        self.port_radius = PORT_RADIUS  # Visual size of the port (port geometry comes from node_types)
+        self.hovered_port_name = None
+        self.hovered_port_type = None
+
+        self.title_item = NodeTitleItem(self)
+        self.title_item.setBrush(self._text_brush)
+        self.title_item.setFont(self.font)
+
+        self.bind(data_node)
+        self.apply_cache_mode(GraphicsNode.cache_mode)
+
+        # One setFlags call, after the initial setPos: every flag and (with ItemSendsGeometryChanges)
+        # position change is a round trip through itemChange
+        self.setFlags(QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+                      | QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+                      | QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
+
+        self.setAcceptHoverEvents(True) # To detect mouse hovering over ports
+
+        self._dragging_from_port = None # Stores {'name': str, 'type': str, 'item': GraphicsPortItem (optional)}
+
+    # Colors, pens, brushes and the title font are the same for every node, so they are
+    # class attributes built with the first node instead of per item
+    _body_brush = None
+
+    @classmethod
+    def _build_style(cls):
+        cls.color = QColor("#5DADE2")
+        cls.border_color = QColor("#1B4F72")
+        cls.text_color = QColor(Qt.GlobalColor.black)
+        cls._text_brush = QBrush(cls.text_color)
+        cls.font = QFont("Arial", 10)
+        cls.port_color_input = QColor("#2ECC71") # Green for input
+        cls.port_color_output = QColor("#E74C3C") # Red for output
+
+        # Paint resources are built once instead of on every paint
+        cls._body_pen = QPen(cls.border_color, 1)
+        cls._port_pen = QPen(Qt.GlobalColor.black, 1)
+        cls._selection_pen = QPen(QColor(Qt.GlobalColor.yellow), 2)
+        cls._port_brushes = {
+            "input": (QBrush(cls.port_color_input), QBrush(cls.port_color_input.lighter(130))),
+            "output": (QBrush(cls.port_color_output), QBrush(cls.port_color_output.lighter(130))),
+        }
+        cls._body_brush = QBrush(cls.color)
+
+    def bind(self, data_node: Node):
+        """Points this item at data_node, so pooled items can be reused for other nodes."""
+        self.prepareGeometryChange()
+        self.data_node = data_node
+        self._type_info = get_node_type(data_node.node_type)
+        self.width = data_node.width # Ensure these are set from data_node
+        self.height = data_node.height
+        self.hovered_port_name = None
+        self.hovered_port_type = None
+
+        # Ports and the selection outline stick out of the body, so include them in the bounds
+        margin = self.port_radius + 1
+        self._bounding_rect = QRectF(0, 0, self.width, self.height).adjusted(-margin, -margin, margin, margin)
+
+        # Port geometry only depends on the node type and is shared by every node of that type
+        self._port_rects, self._port_rect_index = port_rect_table(data_node.node_type)
+
+        # Placing the item is not a user move, so don't report it through node_moved
+        was_blocked = self.blockSignals(True)
+        self.setPos(data_node.x, data_node.y)
+        self.blockSignals(was_blocked)
+
+        self.update_display_text()
+
+    def update_display_text(self):
+        # Updates the text displayed on the node (e.g., type or name)
+        # You can choose to display node_type, name, or a combination
+        display_text = f"{self.data_node.name}" # Or self.data_node.node_type
+        if len(display_text) > 18: # Simple truncation
+            display_text = display_text[:17] + "..."
+
+        self.title_item.setText(display_text)
+
+        # Recenter title (9 = the 5 px top gap plus the 4 px margin the former text item had)
+        title_rect = self.title_item.boundingRect()
+        self.title_item.setPos((self.width - title_rect.width()) / 2, 9)
+        self.update() # Request a repaint of the node
+
+    def boundingRect(self):
+        # Defines the outer boundary of the item, important for collision detection and redraws
+        return self._bounding_rect
+
+    def apply_cache_mode(self, cache_mode):
+        self.setCacheMode(cache_mode)
+        self.title_item.setCacheMode(cache_mode)
+
+
+    def get_port_item_rect(self, port_info):
+        """Returns the QRectF of a port (port_info is a {"name", "type"} dict) in local coordinates."""
+        rect = self._port_rect_index.get((port_info["type"], port_info["name"]))
+        return QRectF(rect) if rect is not None else QRectF() # A copy, the shared one must not be modified
+
+    def paint(self, painter: QPainter, option, widget=None):
+        perf.item_paints += 1
+        path_outline = QRectF(0, 0, self.width, self.height)
+
+        # Zoomed far out: a plain box is all that can be seen, skip ports and outline
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < LOD_DETAIL_THRESHOLD:
+            painter.fillRect(path_outline, self.border_color if self.isSelected() else self.color)
+            return
+
+        # Draw the node's background (existing code)
+        painter.setBrush(self._body_brush)
+        painter.setPen(self._body_pen)
+        painter.drawRoundedRect(path_outline, 5, 5)
+
+        # Draw Title (NodeTitleItem handles this, already added as child)
+
+        # --- NEW: Draw Ports ---
+        painter.setPen(self._port_pen)
+        for port_info, rect in self._port_rects:
+            normal_brush, hover_brush = self._port_brushes[port_info["type"]]
+            if self.hovered_port_name == port_info["name"] and self.hovered_port_type == port_info["type"]:
+                painter.setBrush(hover_brush)
+            else:
+                painter.setBrush(normal_brush)
+            painter.drawEllipse(rect)
+            
+        # Highlight if selected (existing code)
+        if self.isSelected():
+            painter.setPen(self._selection_pen)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRoundedRect(path_outline.adjusted(-1,-1,1,1), 5, 5)
+
+    def get_port_at_pos(self, pos: QPointF):
+        """Checks if a point (in local coords) is over any port."""
+        return self._type_info.port_at(pos.x(), pos.y())
+
+    def set_highlighted_port(self, port_name, port_type):
+        """Highlights a port like hovering does (None clears it)."""
+        if self.hovered_port_name != port_name or self.hovered_port_type != port_type:
+            self.hovered_port_name = port_name
+            self.hovered_port_type = port_type
+            self.update()
+
+    def hoverMoveEvent(self, event: QGraphicsSceneHoverEvent):
+        pos = event.pos() # Position in local coordinates of the node
+        hovered_port = self.get_port_at_pos(pos)
+        if hovered_port:
+            self.set_highlighted_port(hovered_port["name"], hovered_port["type"])
+        else:
+            self.set_highlighted_port(None, None)
+        super().hoverMoveEvent(event)
+
+    def hoverLeaveEvent(self, event: QGraphicsSceneHoverEvent):
+        if self.hovered_port_name is not None:
+            self.hovered_port_name = None
+            self.hovered_port_type = None
+            self.update() # Trigger repaint to remove hover effect
+        super().hoverLeaveEvent(event)
+        
+    def mousePressEvent(self, event: QGraphicsSceneMouseEvent):
+        pos = event.pos()
+        port_info = self.get_port_at_pos(pos)
+
+        if port_info and port_info["type"] == "output": # Start dragging from an output port
+            self._dragging_from_port = port_info
+            scene_pos = self.mapToScene(self.get_port_item_rect(port_info).center())
+            self.port_drag_started.emit(self, port_info["name"], scene_pos)
+            event.accept() # Consume event so node doesn't move
+            return 
+        elif port_info and port_info["type"] == "input": # Clicked on input port (for completing a drag)
+            # This case will be handled by the FlowCanvas when a drag is active
+            event.accept()
+            return
+
+        self._dragging_from_port = None # Reset if not dragging from port
+        super().mousePressEvent(event) # Default behavior (select/move node)
+
+
+    def mouseMoveEvent(self, event: QGraphicsSceneMouseEvent):
+        if self._dragging_from_port:
+            # The actual line drawing will be handled by FlowCanvas/MainWindow
+            # This event is consumed if we started dragging from a port
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event: QGraphicsSceneMouseEvent):
+        if self._dragging_from_port:
+            # Check if mouse is over another port on release
+            # This logic will primarily be in FlowCanvas which has access to all items
+            # For now, emit a generic "ended on nothing" if we just release here
+            # More robust: FlowCanvas checks itemAt(event.scenePos())
+            
+            # To find target item/port properly, FlowCanvas needs to handle this release
+            # For simplicity here, we assume FlowCanvas will handle the drop check
+            # The GraphicsNode itself doesn't know about other nodes.
+            self.port_drag_ended_on_nothing.emit() # Placeholder
+            self._dragging_from_port = None
+            event.accept()
+            return
+        super().mouseReleaseEvent(event)
+
+
+    def itemChange(self, change, value):
+        if change == _POSITION_CHANGED:
+            # data_node.position is written back by NodeMoveBatcher once the move is committed
+            self.node_moved.emit(self.data_node.id) # EMIT THE NEW SIGNAL
+            
+        elif change == _SELECTED_CHANGED:
+            if value:
+                self.node_selected.emit(self.data_node)
+        return super().itemChange(change, value)
+
+    def mouseDoubleClickEvent(self, event):
+        tracer.debug("canvas", "Node '%s' double-clicked", self.data_node.name)
+        super().mouseDoubleClickEvent(event)
+
+
+# --- Phase 3: Flow Canvas (QGraphicsView & QGraphicsScene) ---
+class FlowCanvas(QGraphicsView):
+    view_changed = pyqtSignal() # Emitted after zooming or resizing (scrolling is covered by the scroll bars)
+
+    def __init__(self, scene: QGraphicsScene, main_window_ref, parent=None): # Added main_window_ref
+        super().__init__(scene, parent)
+        self.main_window_ref = main_window_ref # Store the reference
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
+        self.set_cached_rendering(True)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+
+        # Initialize the missing attribute
+        self._middle_mouse_pressed = False # <--- ADD THIS LINE
+        # --- NEW: For Connection Drawing ---
+        self.temp_connection_line = None
+        self.dragging_connection_from_node = None # The GraphicsNode instance
+        self.dragging_connection_from_port_name = None # Name of the output port
+        self.start_drag_scene_pos = None
+        # Input ports of all nodes, for snapping connection drops to the nearest one
+        self.port_index = PortIndex()
+        self.snap_radius_px = 24 # In viewport pixels, so snapping feels the same at any zoom
+        self._snap_target = None # (node_id, port_name) highlighted while dragging a connection
+
+        # --- Performance HUD (off by default) ---
+        self.hud_visible = False
+        self._hud_font = None
+        self._hud_scene_items = 0 # Refreshed by the HUD timer, counting items every frame would cost more than the frame
+        self._hud_timer = QTimer(self)
+        self._hud_timer.setInterval(500)
+        self._hud_timer.timeout.connect(self._refresh_hud)
+
+    def set_cached_rendering(self, enabled: bool):
+        """Switches between per-item pixmap caching with partial viewport updates and full repaints."""
+        self.cached_rendering = enabled
+        if enabled:
+            self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+            self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+            cache_mode = QGraphicsItem.CacheMode.DeviceCoordinateCache
+        else:
+            self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+            self.setCacheMode(QGraphicsView.CacheModeFlag.CacheNone)
+            cache_mode = QGraphicsItem.CacheMode.NoCache
+        # Item bounding rects already include their pen/port margins
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, enabled)
+
+        GraphicsNode.cache_mode = cache_mode
+        if self.scene():
+            for item in self.scene().items():
+                if isinstance(item, GraphicsNode):
+                    item.apply_cache_mode(cache_mode)
+
+    # --- Performance HUD ---
+    def set_hud_visible(self, visible: bool):
+        """Shows frame time, item paints per frame, scene size, update_path rate and properties rebuild time."""
+        self.hud_visible = visible
+        if visible:
+            self._refresh_hud()
+            self._hud_timer.start()
+        else:
+            self._hud_timer.stop()
+        self.viewport().update()
+
+    def perf_stats(self):
+        """The perf_monitor counters plus this canvas's scene size (cheap enough for tests, not for every frame)."""
+        return {**perf.stats(), "scene_items": len(self.scene().items())}
+
+    def hud_lines(self):
+        stats = perf.stats()
+        return [
+            f"frame {stats['frame_time_last_ms']:6.2f} ms  max {stats['frame_time_max_recent_ms']:6.2f} ms  "
+            f"{stats['frames_per_s']:4.0f} fps",
+            f"paints/frame {stats['paints_last_frame']:6d}   scene items {self._hud_scene_items:7d}",
+            f"update_path/s {stats['update_path_per_s']:8.0f}",
+            f"properties {stats['properties_rebuild_last_ms']:6.2f} ms  max {stats['properties_rebuild_max_ms']:6.2f} ms",
+        ]
+
+    def _refresh_hud(self):
+        self._hud_scene_items = len(self.scene().items())
+        self.viewport().update(self._hud_rect())
+
+    def _hud_rect(self):
+        return QRect(8, 8, 420, 78)
+
+    def paintEvent(self, event):
+        perf.frame_started()
+        super().paintEvent(event)
+        perf.frame_finished()
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if not self.hud_visible:
+            return
+        if self._hud_font is None:
+            self._hud_font = QFont("Monospace", 9)
+            self._hud_font.setStyleHint(QFont.StyleHint.TypeWriter)
+        hud_rect = self._hud_rect()
+        painter.save()
+        painter.resetTransform() # Draw in viewport pixels, unaffected by zoom and scrolling
+        painter.fillRect(hud_rect, QColor(0, 0, 0, 170))
+        painter.setPen(QColor("#7CFC00"))
+        painter.setFont(self._hud_font)
+        line_height = (hud_rect.height() - 8) // 4
+        for i, line in enumerate(self.hud_lines()):
+            painter.drawText(hud_rect.left() + 6, hud_rect.top() + 4 + line_height * (i + 1) - 4, line)
+        painter.restore()
+
+    def wheelEvent(self, event):
+        # Zoom functionality
+        zoom_in_factor = 1.15
+        zoom_out_factor = 1 / zoom_in_factor
+
+        if event.angleDelta().y() > 0:
+            self.scale(zoom_in_factor, zoom_in_factor)
+        else:
+            self.scale(zoom_out_factor, zoom_out_factor)
+        self.view_changed.emit()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.view_changed.emit()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+            self._middle_mouse_pressed = True
+            self._last_middle_mouse_pos = event.pos()
+        elif event.button() == Qt.MouseButton.LeftButton:
+            # A left-drag may move many selected nodes; group their moves into one transaction
+            self.main_window_ref.move_batcher.begin()
+        super().mousePressEvent(event)
+
+    @pyqtSlot(object, str, QPointF) # A decorated slot makes each node's connect() much cheaper
+    def start_connection_drag(self, source_graphics_node: GraphicsNode, port_name: str, port_scene_pos: QPointF):
+        if self.temp_connection_line: # Should not happen, but cleanup if it does
+            self.scene().removeItem(self.temp_connection_line)
+            self.temp_connection_line = None
+
+        self.dragging_connection_from_node = source_graphics_node
+        self.dragging_connection_from_port_name = port_name
+        self.start_drag_scene_pos = port_scene_pos
+
+        # Create a temporary line for visual feedback; moves only update its end point
+        start = self.start_drag_scene_pos
+        self.temp_connection_line = QGraphicsLineItem(start.x(), start.y(), start.x(), start.y())
+        self.temp_connection_line.setPen(QPen(Qt.GlobalColor.cyan, 2, Qt.PenStyle.DashLine))
+        self.scene().addItem(self.temp_connection_line)
+        tracer.debug("canvas", "Connection drag started from %s.%s", source_graphics_node.data_node.name, port_name)
+
+    def find_drop_target(self, scene_pos: QPointF):
+        """Returns (node_id, port_name, port_x, port_y) of the input port a connection dropped at
+        scene_pos would snap to, or None. Ports of the dragged-from node are not candidates."""
+        radius = self.snap_radius_px / max(self.transform().m11(), 1e-6)
+        source = self.dragging_connection_from_node
+        return self.port_index.nearest_input(scene_pos.x(), scene_pos.y(), radius,
+                                             source.data_node.id if source else None)
+
+    def _set_snap_target(self, target):
+        key = (target[0], target[1]) if target else None
+        if key == self._snap_target:
+            return
+        graphics_nodes = self.main_window_ref.graphics_nodes
+        if self._snap_target:
+            previous = graphics_nodes.get(self._snap_target[0])
+            if previous:
+                previous.set_highlighted_port(None, None)
+        if key:
+            graphics_node = graphics_nodes.get(key[0])
+            if graphics_node:
+                graphics_node.set_highlighted_port(key[1], "input")
+        self._snap_target = key
+
+    def mouseMoveEvent(self, event: QGraphicsSceneMouseEvent): # Make sure this is QGraphicsSceneMouseEvent
+        if self.temp_connection_line:
+            # We are dragging a connection: snap the line's end to the nearest input port
+            current_scene_pos = self.mapToScene(event.pos()) # Map viewport pos to scene pos
+            target = self.find_drop_target(current_scene_pos)
+            self._set_snap_target(target)
+            end_x, end_y = (target[2], target[3]) if target else (current_scene_pos.x(), current_scene_pos.y())
+            start = self.start_drag_scene_pos
+            self.temp_connection_line.setLine(start.x(), start.y(), end_x, end_y)
+            event.accept() # Consume event
+            return
+        
+        # Handle middle mouse panning if not dragging connection
+        if self._middle_mouse_pressed and event.buttons() & Qt.MouseButton.MiddleButton:
+            delta = event.pos() - self._last_middle_mouse_pos
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+            self._last_middle_mouse_pos = event.pos()
+            event.accept() # Consume event
+            return
+
+        super().mouseMoveEvent(event) # Default behavior for other cases
+
+    def mouseReleaseEvent(self, event: QGraphicsSceneMouseEvent): # Make sure this is QGraphicsSceneMouseEvent
+        if self.temp_connection_line and self.dragging_connection_from_node:
+            # We were dragging a connection
+            current_scene_pos = self.mapToScene(event.pos())
+            self.scene().removeItem(self.temp_connection_line)
+            self.temp_connection_line = None
+
+            # Dropping near an input port connects to it, even if the cursor is not exactly over it
+            self._set_snap_target(None)
+            target = self.find_drop_target(current_scene_pos)
+            target_graphics_node = self.main_window_ref.graphics_nodes.get(target[0]) if target else None
+            target_port_name = target[1] if target else None
+
+            if target_graphics_node and target_port_name:
+                tracer.debug("canvas", "Connection attempt from %s.%s to %s.%s",
+                             self.dragging_connection_from_node.data_node.name, self.dragging_connection_from_port_name,
+                             target_graphics_node.data_node.name, target_port_name)
+                self.main_window_ref.handle_connection_dropped(
+                    self.dragging_connection_from_node.data_node.id,
+                    self.dragging_connection_from_port_name,
+                    target_graphics_node.data_node.id,
+                    target_port_name
+                )
+
+            else:
+                tracer.debug("canvas", "Connection drag ended on nothing valid")
+
+            self.dragging_connection_from_node = None
+            self.dragging_connection_from_port_name = None
+            self.start_drag_scene_pos = None
+            self.main_window_ref.move_batcher.end()
+            event.accept()
+            return
+
+        # Handle middle mouse release
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
+            self._middle_mouse_pressed = False
+            event.accept()
+            return
+
+        super().mouseReleaseEvent(event)
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.main_window_ref.move_batcher.end()
+
+
+class GraphicsConnectionItem(QGraphicsPathItem):
+    def __init__(self, connection_data: Connection, 
+                 source_graphics_node: GraphicsNode, 
+                 target_graphics_node: GraphicsNode, 
+                 parent=None):
+        super().__init__(parent)
+        self.connection_data = connection_data
+        self.source_gnode = source_graphics_node
+        self.target_gnode = target_graphics_node
+
+        if GraphicsConnectionItem._pen is None:
+            GraphicsConnectionItem._build_style()
+        self.setPen(self._pen)
+
+        # Port end points of the current path, used for the low-detail straight line
+        self._p1 = QPointF()
+        self._p2 = QPointF()
+
+        self.setZValue(-1) # Draw connections behind nodes
+
+        self.update_path() # Initial path calculation
+
+    # Shared by every connection, like GraphicsNode's paint resources
+    _pen = None
+    line_width = 2
+
+    @classmethod
+    def _build_style(cls):
+        cls.line_color = QColor(Qt.GlobalColor.white) # Or another visible color
+        cls._pen = QPen(cls.line_color, cls.line_width, Qt.PenStyle.SolidLine)
+
+    def bind(self, connection_data: Connection, source_graphics_node: GraphicsNode, target_graphics_node: GraphicsNode):
+        """Reuses this item for another connection (see SceneVirtualizer)."""
+        self.connection_data = connection_data
+        self.source_gnode = source_graphics_node
+        self.target_gnode = target_graphics_node
+        self.update_path()
+
+    def get_port_scene_pos(self, graphics_node: GraphicsNode, port_name: str, port_type: str):
+        """Helper to get the scene position of a port on a given graphics node."""
+        offset = get_node_type(graphics_node.data_node.node_type).port_offsets.get((port_type, port_name))
+        if offset is None:
+            tracer.warning("canvas", "Unknown port for %s, port %s (%s)", graphics_node.data_node.name, port_name, port_type)
+            return graphics_node.scenePos() # Fallback to node's origin
+
+        # Nodes are top-level and untransformed, so local -> scene is a translation
+        pos = graphics_node.pos()
+        return QPointF(pos.x() + offset[0], pos.y() + offset[1])
+
+    def update_path(self):
+        perf.update_path_calls += 1
+        if not self.source_gnode or not self.target_gnode:
+            tracer.debug("canvas", "update_path: missing source or target node")
+            return
+
+        # Get scene positions of the source and target ports
+        p1 = self.get_port_scene_pos(self.source_gnode, 
+                                     self.connection_data.from_port_name, 
+                                     "output")
+        p2 = self.get_port_scene_pos(self.target_gnode, 
+                                     self.connection_data.to_port_name, 
+                                     "input")
+        
+        if tracer.enabled(DEBUG, "canvas"): # Runs for every edge on every move; skip building arguments when off
+            tracer.debug("canvas", "Conn %s: path %s -> %s for %s -> %s", self.connection_data.id, p1, p2,
+                         self.source_gnode.data_node.name, self.target_gnode.data_node.name)
+
+        path = QPainterPath(p1)
+        
+        dx = abs(p2.x() - p1.x()) * 0.5 
+        if abs(p2.y() - p1.y()) < self.source_gnode.height / 2 :
+             dx = abs(p2.x() - p1.x()) * 0.25
+
+        c1 = QPointF(p1.x() + dx, p1.y())
+        c2 = QPointF(p2.x() - dx, p2.y())
+        path.cubicTo(c1, c2, p2)
+        
+        self._p1 = p1
+        self._p2 = p2
+        self.setPath(path) # setPath() schedules the repaint itself
+
+
+    def paint(self, painter, option, widget=None):
+        perf.item_paints += 1
+        # Zoomed far out: the curve is indistinguishable from a straight line
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < LOD_DETAIL_THRESHOLD:
+            painter.setPen(self.pen())
+            painter.drawLine(self._p1, self._p2)
+            return
+        # If you want selection highlight for connections:
+        # if self.isSelected():
+        #     selection_pen = QPen(Qt.GlobalColor.yellow, self.line_width + 2)
+        #     painter.setPen(selection_pen)
+        #     painter.drawPath(self.path())
+        #     # Then reset pen for actual drawing or let superclass handle it with current pen
+        super().paint(painter, option, widget)
+
+
+# --- Batched Node Moves ---
+class NodeMoveBatcher(QObject):
+    """Coalesces node_moved signals so each affected connection path is rebuilt at most once per frame.
+
+    Between begin() and end() (a mouse drag), node positions are only written back
+    to the data nodes when the transaction ends.
+    """
+    def __init__(self, main_window, frame_interval_ms=16, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self._dirty_node_ids = set() # Nodes whose connection paths are stale
+        self._moved_node_ids = set() # Nodes whose data_node.position is stale
+        self._in_transaction = False
+        self._drag_ended = False # The next commit ends a drag transaction
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(frame_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def begin(self):
+        self._in_transaction = True
+
+    def end(self):
+        self._in_transaction = False
+        self._drag_ended = True
+        self.flush()
+
+    @pyqtSlot(int)
+    def mark_dirty(self, node_id):
+        self._dirty_node_ids.add(node_id)
+        self._moved_node_ids.add(node_id)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if self._dirty_node_ids:
+            flow = self.main_window.current_flow
+            graphics_nodes = self.main_window.graphics_nodes
+            port_index = self.main_window.flow_canvas.port_index
+            affected_connection_ids = set()
+            for node_id in self._dirty_node_ids:
+                graphics_node = graphics_nodes.get(node_id)
+                if graphics_node:
+                    pos = graphics_node.pos()
+                    port_index.update_node(node_id, graphics_node.data_node.node_type, pos.x(), pos.y())
+                elif node_id in flow.nodes: # Not realized (virtualized scene), moved by MainWindow.move_nodes
+                    node = flow.nodes[node_id]
+                    port_index.update_node(node_id, node.node_type, node.x, node.y)
+                for connection in flow.connections_for_node(node_id):
+                    affected_connection_ids.add(connection.id)
+            self._dirty_node_ids.clear()
+
+            graphics_connections = self.main_window.graphics_connections
+            for connection_id in affected_connection_ids:
+                g_conn_item = graphics_connections.get(connection_id)
+                if g_conn_item:
+                    g_conn_item.update_path()
+
+        if not self._in_transaction:
+            self.commit_positions()
+
+    def refresh(self, node_ids):
+        """Updates the port index and connection paths of nodes whose positions were set directly."""
+        self._dirty_node_ids.update(node_ids)
+        self.flush()
+
+    def discard(self):
+        """Forgets pending work, e.g. when the whole flow is replaced."""
+        self._flush_timer.stop()
+        self._dirty_node_ids.clear()
+        self._moved_node_ids.clear()
+        self._in_transaction = False
+        self._drag_ended = False
+
+    def commit_positions(self):
+        """Writes the graphics positions of all moved nodes back to the data model in one pass."""
+        graphics_nodes = self.main_window.graphics_nodes
+        journal = self.main_window.journal
+        moves = [] # (node, old x, old y, new x, new y) for the undo history
+        for node_id in self._moved_node_ids:
+            graphics_node = graphics_nodes.get(node_id)
+            if graphics_node:
+                pos = graphics_node.pos()
+                data_node = graphics_node.data_node
+                x, y = pos.x(), pos.y()
+                if x == data_node.x and y == data_node.y:
+                    continue
+                moves.append((data_node, data_node.x, data_node.y, x, y))
+                data_node.position = (x, y)
+                if journal:
+                    journal.node_moved(data_node)
+        if self.main_window.virtualizer:
+            self.main_window.virtualizer.update_node_positions(self._moved_node_ids)
+        self._moved_node_ids.clear()
+        if moves:
+            # A drag is one entry; moves outside a drag (one per flush) merge while they move the same nodes
+            self.main_window.history.record(MoveCommand(moves, mergeable=not self._drag_ended))
+        self._drag_ended = False
+
+
+# --- Viewport Virtualization ---
+class SceneVirtualizer(QObject):
+    """Keeps graphics items only for the part of the flow around the visible viewport.
+
+    Flow/Node/Connection stay the source of truth for everything off-screen.
+    GraphicsNode and GraphicsConnectionItem instances are recycled from pools
+    as the view pans and zooms.
+    """
+    def __init__(self, main_window, margin=300, max_pool_size=500, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.margin = margin # Extra scene units realized around the viewport
+        self.max_pool_size = max_pool_size
+        self.grid = SpatialGrid()
+        self._node_pool = []
+        self._connection_pool = []
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(0)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+        canvas = main_window.flow_canvas
+        canvas.horizontalScrollBar().valueChanged.connect(self.schedule_refresh)
+        canvas.verticalScrollBar().valueChanged.connect(self.schedule_refresh)
+        canvas.view_changed.connect(self.schedule_refresh)
+
+        for node in main_window.current_flow.nodes.values():
+            self._index_node(node)
+        self.schedule_refresh()
+
+    def schedule_refresh(self, *args):
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def reset(self):
+        """Forgets all indexed nodes and pooled items (their scene was cleared)."""
+        self._refresh_timer.stop()
+        self.grid = SpatialGrid()
+        self._node_pool = []
+        self._connection_pool = []
+
+    def _index_node(self, node):
+        self.grid.insert(node.id, node.x, node.y, node.width, node.height)
+        # Grow the scene so the scroll bars can reach nodes that are not realized yet
+        self.main_window.grow_scene_rect(QRectF(node.x, node.y, node.width, node.height))
+
+    def node_added(self, node):
+        self._index_node(node)
+        self.schedule_refresh()
+
+    def nodes_added(self, nodes):
+        """Indexes many nodes, growing the scene rect once for all of them."""
+        for node in nodes:
+            self.grid.insert(node.id, node.x, node.y, node.width, node.height)
+        bounds = nodes_bounding_rect(nodes)
+        if bounds is not None:
+            self.main_window.grow_scene_rect(bounds)
+        self.schedule_refresh()
+
+    def node_removed(self, node_id):
+        self.grid.remove(node_id)
+        if node_id in self.main_window.graphics_nodes:
+            self.release_node(node_id)
+
+    def update_node_positions(self, node_ids):
+        nodes = self.main_window.current_flow.nodes
+        for node_id in node_ids:
+            node = nodes.get(node_id)
+            if node:
+                self._index_node(node)
+
+    def connection_added(self, connection):
+        graphics_nodes = self.main_window.graphics_nodes
+        if connection.from_node_id in graphics_nodes and connection.to_node_id in graphics_nodes:
+            self.acquire_connection(connection)
+        else:
+            self.schedule_refresh()
+
+    def refresh(self):
+        """Realizes items for everything near the viewport and returns the rest to the pools."""
+        main_window = self.main_window
+        flow = main_window.current_flow
+        canvas = main_window.flow_canvas
+
+        visible = canvas.mapToScene(canvas.viewport().rect()).boundingRect()
+        wanted_nodes = self.grid.query(visible.left() - self.margin, visible.top() - self.margin,
+                                       visible.right() + self.margin, visible.bottom() + self.margin)
+        # Selected nodes stay realized so drags and the properties panel keep their item
+        for node_id, graphics_node in main_window.graphics_nodes.items():
+            if graphics_node.isSelected():
+                wanted_nodes.add(node_id)
+
+        # Edges touching a visible node are shown, which needs both of their end nodes
+        wanted_connections = {}
+        for node_id in wanted_nodes:
+            for connection in flow.connections_for_node(node_id):
+                wanted_connections[connection.id] = connection
+        for connection in wanted_connections.values():
+            wanted_nodes.add(connection.from_node_id)
+            wanted_nodes.add(connection.to_node_id)
+
+        for connection_id in [c for c in main_window.graphics_connections if c not in wanted_connections]:
+            self.release_connection(connection_id)
+        for node_id in [n for n in main_window.graphics_nodes if n not in wanted_nodes]:
+            self.release_node(node_id)
+
+        for node_id in wanted_nodes:
+            if node_id not in main_window.graphics_nodes:
+                self.acquire_node(flow.nodes[node_id])
+        for connection_id, connection in wanted_connections.items():
+            if connection_id not in main_window.graphics_connections:
+                self.acquire_connection(connection)
+
+    def acquire_node(self, node):
+        main_window = self.main_window
+        if self._node_pool:
+            graphics_node = self._node_pool.pop()
+            graphics_node.bind(node)
+            graphics_node.show()
+            main_window.graphics_nodes[node.id] = graphics_node
+        else:
+            graphics_node = main_window.create_graphics_node(node)
+        return graphics_node
+
+    def release_node(self, node_id):
+        graphics_node = self.main_window.graphics_nodes.pop(node_id)
+        graphics_node.setSelected(False)
+        graphics_node.hide()
+        if len(self._node_pool) < self.max_pool_size:
+            self._node_pool.append(graphics_node)
+        else:
+            self.main_window.scene.removeItem(graphics_node)
+
+    def acquire_connection(self, connection):
+        main_window = self.main_window
+        source_gnode = main_window.graphics_nodes[connection.from_node_id]
+        target_gnode = main_window.graphics_nodes[connection.to_node_id]
+        if self._connection_pool:
+            graphics_conn = self._connection_pool.pop()
+            graphics_conn.bind(connection, source_gnode, target_gnode)
+            graphics_conn.show()
+        else:
+            graphics_conn = GraphicsConnectionItem(connection, source_gnode, target_gnode)
+            main_window.scene.addItem(graphics_conn)
+        main_window.graphics_connections[connection.id] = graphics_conn
+        return graphics_conn
+
+    def release_connection(self, connection_id):
+        graphics_conn = self.main_window.graphics_connections.pop(connection_id)
+        graphics_conn.hide()
+        if len(self._connection_pool) < self.max_pool_size:
+            self._connection_pool.append(graphics_conn)
+        else:
+            self.main_window.scene.removeItem(graphics_conn)
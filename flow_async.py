@@ -0,0 +1,341 @@
+# --- Asyncio Flow Runner ---
+# Runs compiled flows as asyncio tasks so many flows can share one event loop:
+#   - Delay/Wait becomes `await asyncio.sleep()` instead of blocking a thread
+#   - Find Image / Find Window are awaitables; AsyncActionBackend.from_sync() offloads a
+#     blocking ActionBackend's finds to an executor
+#   - when an output port fans out, each branch runs as its own task; cancelling the run
+#     (or its time limit) cancels every branch, and a failing branch cancels the others
+#   - each run can be cancelled or given a time limit
+#   - FlowRun records per-flow latency and LoopLagMonitor measures event loop lag
+import asyncio
+import time
+
+from flow_engine import (
+    END, ActionBackend, ExecutionContext, NODE_HANDLERS, compile_flow, float_property, fork_index, int_property,
+    search_region, wait_settings
+)
+
+
+class AsyncActionBackend:
+    """Async counterpart of ActionBackend. Quick actions stay synchronous; waits and finds are awaitable."""
+    def log(self, message):
+        print(message)
+
+    async def wait(self, seconds):
+        await asyncio.sleep(seconds)
+
+    async def find_window(self, title):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    async def find_image(self, image_path, confidence, region):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    async def wait_for_image(self, image_path, confidence, region, timeout, poll_interval):
+        polls = max(1, int(timeout / poll_interval) + 1) if poll_interval > 0 else 1
+        for i in range(polls):
+            location = await self.find_image(image_path, confidence, region)
+            if location is not None or i == polls - 1:
+                return location
+            await self.wait(poll_interval)
+
+    def mouse_action(self, action, x, y, button):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    def keyboard_action(self, text):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    @staticmethod
+    def from_sync(backend, executor=None):
+        return ExecutorActionBackend(backend, executor)
+
+
+class ExecutorActionBackend(AsyncActionBackend):
+    """Wraps a blocking ActionBackend: finds run in an executor, waits become asyncio sleeps.
+
+    If the wrapped backend has an ImagePoller (`poller`, e.g. ScreenActionBackend),
+    wait_for_image polls through it, so unchanged frames are not matched again; each
+    poll runs in the executor and the pauses between polls are asyncio sleeps.
+    """
+    def __init__(self, backend: ActionBackend, executor=None):
+        self.backend = backend
+        self.executor = executor # None means the loop's default thread pool
+
+    def log(self, message):
+        self.backend.log(message)
+
+    async def find_window(self, title):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.backend.find_window, title)
+
+    async def find_image(self, image_path, confidence, region):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.backend.find_image, image_path, confidence, region)
+
+    async def wait_for_image(self, image_path, confidence, region, timeout, poll_interval):
+        poller = getattr(self.backend, "poller", None)
+        if poller is None:
+            return await super().wait_for_image(image_path, confidence, region, timeout, poll_interval)
+        loop = asyncio.get_running_loop()
+        wait = await loop.run_in_executor(self.executor, poller.start, image_path, confidence, region, timeout,
+                                          poll_interval)
+        delay = await loop.run_in_executor(self.executor, wait.poll)
+        while delay is not None:
+            await self.wait(delay)
+            delay = await loop.run_in_executor(self.executor, wait.poll)
+        return wait.match.center if wait.match else None
+
+    def mouse_action(self, action, x, y, button):
+        self.backend.mouse_action(action, x, y, button)
+
+    def keyboard_action(self, text):
+        self.backend.keyboard_action(text)
+
+
+# --- Async node handlers ---
+# Only node types that wait on something need an async step; the rest reuse NODE_HANDLERS.
+ASYNC_NODE_HANDLERS = {}
+
+
+def register_async_handler(node_type):
+    def decorator(factory):
+        ASYNC_NODE_HANDLERS[node_type] = factory
+        return factory
+    return decorator
+
+
+@register_async_handler("Delay/Wait")
+def _compile_async_delay(node):
+    seconds = int_property(node.properties, "duration_ms", 1000) / 1000.0
+    async def step(ctx):
+        await ctx.backend.wait(seconds)
+        return 0
+    return step
+
+
+@register_async_handler("Find Window")
+def _compile_async_find_window(node):
+    title = str(node.properties.get("window_title", ""))
+    async def step(ctx):
+        ctx.last_result = await ctx.backend.find_window(title)
+        return 0
+    return step
+
+
+@register_async_handler("Find Image")
+def _compile_async_find_image(node):
+    image_path = str(node.properties.get("image_path", ""))
+    confidence = float_property(node.properties, "confidence", 0.8)
+    region = search_region(node.properties)
+    timeout, poll_interval = wait_settings(node.properties)
+    if timeout > 0:
+        async def step(ctx):
+            ctx.last_result = await ctx.backend.wait_for_image(image_path, confidence, region, timeout, poll_interval)
+            return 0
+        return step
+    async def step(ctx):
+        ctx.last_result = await ctx.backend.find_image(image_path, confidence, region)
+        return 0
+    return step
+
+
+class AsyncExecutionPlan:
+    """An ExecutionPlan plus, per step, whether the step has to be awaited."""
+    __slots__ = ("plan", "awaits")
+
+    def __init__(self, plan, awaits):
+        self.plan = plan
+        self.awaits = awaits
+
+    def __len__(self):
+        return len(self.plan)
+
+
+def compile_flow_async(flow):
+    plan = compile_flow(flow, {**NODE_HANDLERS, **ASYNC_NODE_HANDLERS})
+    return AsyncExecutionPlan(plan, tuple(asyncio.iscoroutinefunction(step) for step in plan.steps))
+
+
+# --- Runs ---
+class FlowRun:
+    """One execution of a plan as an asyncio task, with its latency statistics."""
+    PENDING, RUNNING, COMPLETED, CANCELLED, TIMED_OUT, FAILED = (
+        "pending", "running", "completed", "cancelled", "timed_out", "failed")
+
+    def __init__(self, async_plan, backend, name=None, timeout=None, yield_every=100):
+        self.async_plan = async_plan
+        self.backend = backend
+        self.name = name
+        self.timeout = timeout # Seconds, or None for no limit
+        self.yield_every = yield_every # Steps between forced yields so long runs can't starve other flows
+        self.status = FlowRun.PENDING
+        self.error = None
+        self.steps_run = 0
+        self.branches = 0 # Branch tasks started at forks
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def duration(self):
+        """Wall time from start to finish (or until now while running)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at if self.finished_at is not None else time.perf_counter()) - self.started_at
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+        return self
+
+    def cancel(self):
+        if self.task:
+            self.task.cancel()
+
+    def __await__(self):
+        return self.task.__await__()
+
+    async def _run(self):
+        self.started_at = time.perf_counter()
+        self.status = FlowRun.RUNNING
+        try:
+            if self.timeout is None:
+                await self._execute()
+            else:
+                await asyncio.wait_for(self._execute(), self.timeout)
+            self.status = FlowRun.COMPLETED
+        except asyncio.TimeoutError:
+            self.status = FlowRun.TIMED_OUT
+        except asyncio.CancelledError:
+            self.status = FlowRun.CANCELLED
+            raise
+        except Exception as e:
+            self.status = FlowRun.FAILED
+            self.error = e
+        finally:
+            self.finished_at = time.perf_counter()
+        return self
+
+    async def _execute(self):
+        await self._execute_from(self.async_plan.plan.start_index, None)
+
+    async def _execute_from(self, index, last_result):
+        """Runs steps from index to the end of the path; a fork's branches run as concurrent tasks."""
+        plan = self.async_plan.plan
+        awaits = self.async_plan.awaits
+        steps = plan.steps
+        successors = plan.successors
+        yield_every = self.yield_every
+        ctx = ExecutionContext(self.backend)
+        ctx.last_result = last_result # Each branch starts from the Find result of its fork
+        since_yield = 0
+        while index != END:
+            if index < END:
+                await self._run_branches(plan.forks[fork_index(index)], ctx.last_result)
+                return
+            if awaits[index]:
+                port = await steps[index](ctx)
+                since_yield = 0
+            else:
+                port = steps[index](ctx)
+                since_yield += 1
+                if since_yield >= yield_every:
+                    await asyncio.sleep(0)
+                    since_yield = 0
+            index = successors[index][port]
+            self.steps_run += 1
+
+    async def _run_branches(self, branches, last_result):
+        loop = asyncio.get_running_loop()
+        tasks = [loop.create_task(self._execute_from(branch, last_result)) for branch in branches]
+        self.branches += len(tasks)
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Cancelled, timed out or a branch failed: stop the branches still running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def __repr__(self):
+        return f"FlowRun(name={self.name!r}, status={self.status}, steps_run={self.steps_run}, duration={self.duration:.3f}s)"
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task, i.e. how long callbacks block it."""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.last_lag = 0.0
+        self._task = None
+
+    @property
+    def mean_lag(self):
+        return self.total_lag / self.samples if self.samples else 0.0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+        return self
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, time.perf_counter() - expected)
+            self.samples += 1
+            self.total_lag += self.last_lag
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+
+class AsyncFlowRunner:
+    """Starts flows concurrently in the running event loop and keeps their FlowRun records."""
+    def __init__(self, backend: AsyncActionBackend, lag_interval=0.05):
+        self.backend = backend
+        self.runs = []
+        self.lag_monitor = LoopLagMonitor(lag_interval)
+
+    def start(self, flow_or_plan, name=None, timeout=None):
+        if self.lag_monitor._task is None:
+            self.lag_monitor.start()
+        async_plan = flow_or_plan if isinstance(flow_or_plan, AsyncExecutionPlan) else compile_flow_async(flow_or_plan)
+        run = FlowRun(async_plan, self.backend, name=name, timeout=timeout).start()
+        self.runs.append(run)
+        return run
+
+    def cancel_all(self):
+        for run in self.runs:
+            run.cancel()
+
+    async def wait_all(self):
+        await asyncio.gather(*(run.task for run in self.runs), return_exceptions=True)
+
+    async def close(self):
+        self.cancel_all()
+        await self.wait_all()
+        await self.lag_monitor.stop()
+
+    def metrics(self):
+        """Summary of all runs so far plus event loop lag, as a plain dict."""
+        finished = [run for run in self.runs if run.finished_at is not None]
+        durations = sorted(run.duration for run in finished)
+        by_status = {}
+        for run in self.runs:
+            by_status[run.status] = by_status.get(run.status, 0) + 1
+        return {
+            "runs": len(self.runs),
+            "by_status": by_status,
+            "latency_mean_s": sum(durations) / len(durations) if durations else 0.0,
+            "latency_p95_s": durations[int(0.95 * (len(durations) - 1))] if durations else 0.0,
+            "latency_max_s": durations[-1] if durations else 0.0,
+            "loop_lag_mean_s": self.lag_monitor.mean_lag,
+            "loop_lag_max_s": self.lag_monitor.max_lag,
+        }
@@ -0,0 +1,80 @@
+# --- Clipboard Format ---
+# Copied nodes and the connections among them, as one compact JSON document:
+#
+#   {"format": "visual-bot-clipboard", "version": 1, "types": ["Start", "Log Message"],
+#    "nodes": [[type index, "name", x, y, {properties that differ from the type's defaults}], ...],
+#    "conns": [[from node index, "out", to node index, "in"], ...]}
+#
+# Node types are stored once in "types", and nodes are referenced by their index in
+# "nodes" instead of by id or uid. Pasting remaps ids in the same pass that creates
+# the nodes (a connection's ends are list lookups), and the pasted nodes and
+# connections get new ids and uids. Plain Python (no PyQt6), like flow_io.
+import json
+
+from flow_model import Node, Connection
+from node_types import get_node_type
+
+FORMAT_NAME = "visual-bot-clipboard"
+FORMAT_VERSION = 1
+MIME_TYPE = "application/x-visual-bot-flow"
+
+_MISSING = object()
+
+
+class ClipboardFormatError(ValueError):
+    pass
+
+
+def _item(items, i):
+    """items[i] for a non-negative int index (a negative index would silently wrap around)."""
+    if not isinstance(i, int) or i < 0:
+        raise IndexError(f"bad index: {i!r}")
+    return items[i]
+
+
+def serialize_subgraph(flow, node_ids):
+    """Returns the clipboard text for the given nodes of flow and the connections between them."""
+    nodes = [flow.nodes[node_id] for node_id in node_ids if node_id in flow.nodes]
+    index = {node.id: i for i, node in enumerate(nodes)}
+    type_index = {}
+    node_rows = []
+    for node in nodes:
+        defaults = get_node_type(node.node_type).defaults
+        props = {key: value for key, value in node.properties.items() if defaults.get(key, _MISSING) != value}
+        node_rows.append([type_index.setdefault(node.node_type, len(type_index)), node.name, node.x, node.y, props])
+    connection_rows = [
+        [index[connection.from_node_id], connection.from_port_name, index[connection.to_node_id], connection.to_port_name]
+        for node in nodes
+        for connection in flow.outgoing_connections(node.id)
+        if connection.to_node_id in index
+    ]
+    return json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION, "types": list(type_index),
+                       "nodes": node_rows, "conns": connection_rows},
+                      separators=(",", ":"), ensure_ascii=False)
+
+
+def deserialize_subgraph(text, offset=(0.0, 0.0)):
+    """Creates new nodes and connections from clipboard text, shifted by offset. Returns (nodes, connections)."""
+    try:
+        document = json.loads(text)
+    except ValueError as e:
+        raise ClipboardFormatError(f"Invalid clipboard data: {e}") from e
+    if not isinstance(document, dict) or document.get("format") != FORMAT_NAME:
+        raise ClipboardFormatError("Not visual bot clipboard data")
+    version = document.get("version", 0)
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise ClipboardFormatError(f"Unsupported clipboard version: {version!r}")
+
+    dx, dy = offset
+    try:
+        types = document["types"]
+        nodes = []
+        for type_i, name, x, y, props in document["nodes"]:
+            if not isinstance(props, dict):
+                raise TypeError(f"node properties must be an object, not {type(props).__name__}")
+            nodes.append(Node(_item(types, type_i), name=name, position=(x + dx, y + dy), properties=props))
+        connections = [Connection(_item(nodes, from_i).id, from_port, _item(nodes, to_i).id, to_port)
+                       for from_i, from_port, to_i, to_port in document["conns"]]
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ClipboardFormatError(f"Invalid clipboard data: {e}") from e
+    return nodes, connections
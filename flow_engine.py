@@ -0,0 +1,394 @@
+# --- Flow Execution Engine ---
+# Validates a Flow and compiles it once into a flat ExecutionPlan:
+#   - every node becomes a step (a callable built by the handler registered for its node_type,
+#     with its properties already parsed)
+#   - every step has a successor table indexed by output port position ("out", or "true"/"false")
+# Running a plan is then a tight loop over list indexes: no Flow.connections scans and no
+# string comparisons per step.
+#
+# An output port may have several connections (the editor only limits inputs to one). Such a
+# port's successor is a fork, encoded as a negative index into ExecutionPlan.forks, so plain
+# steps pay nothing for it. run_plan runs the branches of a fork one after another, in
+# connection order; each branch starts from the context (last Find result) of the fork.
+#
+# Actions that touch the desktop go through an ActionBackend, so flows can run headless
+# against a stub backend in tests and benchmarks.
+import time
+
+from node_types import NODE_HANDLERS, get_node_type
+
+END = -1 # Successor index meaning "no next step"
+
+
+def fork_index(successor):
+    """Index into ExecutionPlan.forks of a successor below END."""
+    return END - 1 - successor
+
+
+class FlowValidationError(ValueError):
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+# --- Action backends ---
+class ActionBackend:
+    """Interface between flows and the desktop. The base class only knows how to log and wait."""
+    def log(self, message):
+        print(message)
+
+    def wait(self, seconds):
+        time.sleep(seconds)
+
+    def find_window(self, title):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    def find_image(self, image_path, confidence, region):
+        """Returns the match location (x, y) or None. region is (x, y, w, h) or None for the full screen."""
+        raise NotImplementedError("No desktop automation backend configured")
+
+    def wait_for_image(self, image_path, confidence, region, timeout, poll_interval):
+        """Like find_image, but keeps looking every poll_interval seconds for up to timeout seconds."""
+        polls = max(1, int(timeout / poll_interval) + 1) if poll_interval > 0 else 1
+        for i in range(polls):
+            location = self.find_image(image_path, confidence, region)
+            if location is not None or i == polls - 1:
+                return location
+            self.wait(poll_interval)
+
+    def mouse_action(self, action, x, y, button):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    def keyboard_action(self, text):
+        raise NotImplementedError("No desktop automation backend configured")
+
+    def run_started(self):
+        """Called by run_plan before the first step; backends reset their per-run counters here."""
+
+    def run_stats(self):
+        """Per-run counters reported in ExecutionResult.stats."""
+        return {}
+
+    def close(self):
+        """Releases whatever the backend holds open (devices, worker processes)."""
+
+
+class StubActionBackend(ActionBackend):
+    """Headless backend that records every call and returns scripted results.
+
+    find_results maps an image path or window title to what find_image/find_window return.
+    """
+    def __init__(self, find_results=None, record_calls=True):
+        self.find_results = find_results or {}
+        self.record_calls = record_calls
+        self.calls = []
+
+    def _record(self, *call):
+        if self.record_calls:
+            self.calls.append(call)
+
+    def log(self, message):
+        self._record("log", message)
+
+    def wait(self, seconds):
+        self._record("wait", seconds)
+
+    def find_window(self, title):
+        self._record("find_window", title)
+        return self.find_results.get(title)
+
+    def find_image(self, image_path, confidence, region):
+        self._record("find_image", image_path, confidence, region)
+        return self.find_results.get(image_path)
+
+    def mouse_action(self, action, x, y, button):
+        self._record("mouse_action", action, x, y, button)
+
+    def keyboard_action(self, text):
+        self._record("keyboard_action", text)
+
+
+class ExecutionContext:
+    __slots__ = ("backend", "last_result")
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.last_result = None # Outcome of the last Find step, read by Conditional (If/Else)
+
+
+# --- Node handlers ---
+# A handler factory takes a Node and returns step(ctx) -> output port index.
+# NODE_HANDLERS is the node type registry's handler table (plugins can also pass
+# handler= to node_types.register_node_type).
+
+
+def register_handler(node_type):
+    def decorator(factory):
+        NODE_HANDLERS[node_type] = factory
+        return factory
+    return decorator
+
+
+def int_property(properties, name, default):
+    """Reads a whole-number property; raises ValueError naming the property if it is not one."""
+    value = properties.get(name, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number, not {value!r}") from None
+
+
+def float_property(properties, name, default):
+    value = properties.get(name, default)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, not {value!r}") from None
+
+
+def search_region(properties):
+    if properties.get("search_mode", "FullScreen") != "Rectangle":
+        return None
+    return (int_property(properties, "search_rect_x", 0), int_property(properties, "search_rect_y", 0),
+            int_property(properties, "search_rect_w", 100), int_property(properties, "search_rect_h", 100))
+
+
+@register_handler("Start")
+def _compile_start(node):
+    def step(ctx):
+        return 0
+    return step
+
+
+@register_handler("End")
+def _compile_end(node):
+    def step(ctx):
+        return 0
+    return step
+
+
+@register_handler("Log Message")
+def _compile_log(node):
+    message = str(node.properties.get("message", ""))
+    def step(ctx):
+        ctx.backend.log(message)
+        return 0
+    return step
+
+
+@register_handler("Delay/Wait")
+def _compile_delay(node):
+    seconds = int_property(node.properties, "duration_ms", 1000) / 1000.0
+    def step(ctx):
+        ctx.backend.wait(seconds)
+        return 0
+    return step
+
+
+@register_handler("Find Window")
+def _compile_find_window(node):
+    title = str(node.properties.get("window_title", ""))
+    def step(ctx):
+        ctx.last_result = ctx.backend.find_window(title)
+        return 0
+    return step
+
+
+def wait_settings(properties):
+    """Returns (timeout, poll_interval) in seconds for a Find Image node; a timeout of 0 means search once."""
+    return (int_property(properties, "wait_timeout_ms", 0) / 1000.0,
+            int_property(properties, "poll_interval_ms", 100) / 1000.0)
+
+
+@register_handler("Find Image")
+def _compile_find_image(node):
+    image_path = str(node.properties.get("image_path", ""))
+    confidence = float_property(node.properties, "confidence", 0.8)
+    region = search_region(node.properties)
+    timeout, poll_interval = wait_settings(node.properties)
+    if timeout > 0:
+        def step(ctx):
+            ctx.last_result = ctx.backend.wait_for_image(image_path, confidence, region, timeout, poll_interval)
+            return 0
+        return step
+    def step(ctx):
+        ctx.last_result = ctx.backend.find_image(image_path, confidence, region)
+        return 0
+    return step
+
+
+@register_handler("Mouse Action")
+def _compile_mouse(node):
+    action = str(node.properties.get("action", "click"))
+    x = node.properties.get("x")
+    y = node.properties.get("y")
+    button = str(node.properties.get("button", "left"))
+    def step(ctx):
+        ctx.backend.mouse_action(action, x, y, button)
+        return 0
+    return step
+
+
+@register_handler("Keyboard Action")
+def _compile_keyboard(node):
+    text = str(node.properties.get("text", ""))
+    def step(ctx):
+        ctx.backend.keyboard_action(text)
+        return 0
+    return step
+
+
+@register_handler("Conditional (If/Else)")
+def _compile_conditional(node):
+    # Output ports are ("true", "false"): index 0 when the last Find step matched
+    def step(ctx):
+        return 0 if ctx.last_result else 1
+    return step
+
+
+# --- Validation and compilation ---
+def _port_names(node_type):
+    """Returns (input port names, output port name -> index) for a node type."""
+    info = get_node_type(node_type)
+    return info.input_names, info.output_index
+
+
+def validate_flow(flow, handlers=None):
+    """Returns a list of problems that prevent the flow from running (empty if it is runnable)."""
+    handlers = handlers if handlers is not None else NODE_HANDLERS
+    problems = []
+    start_nodes = [node for node in flow.nodes.values() if node.node_type == "Start"]
+    if not start_nodes:
+        problems.append("Flow has no Start node")
+    elif len(start_nodes) > 1:
+        problems.append(f"Flow has {len(start_nodes)} Start nodes")
+
+    for node in flow.nodes.values():
+        if node.node_type not in handlers:
+            problems.append(f"No handler for node type '{node.node_type}' ({node.name})")
+
+    for connection in flow.connections.values():
+        from_node = flow.nodes.get(connection.from_node_id)
+        to_node = flow.nodes.get(connection.to_node_id)
+        if from_node is None or to_node is None:
+            problems.append(f"{connection} refers to a missing node")
+            continue
+        if connection.from_port_name not in _port_names(from_node.node_type)[1]:
+            problems.append(f"'{from_node.name}' has no output port '{connection.from_port_name}'")
+        if connection.to_port_name not in _port_names(to_node.node_type)[0]:
+            problems.append(f"'{to_node.name}' has no input port '{connection.to_port_name}'")
+    return problems
+
+
+class ExecutionPlan:
+    """A compiled flow: parallel lists of step callables and successor tables, indexed by step.
+
+    successors[i][port] is the next step, END, or for a port with several connections a
+    value below END whose fork_index() selects the tuple of next steps in forks.
+    """
+    __slots__ = ("steps", "successors", "forks", "node_ids", "start_index")
+
+    def __init__(self, steps, successors, node_ids, start_index, forks=()):
+        self.steps = steps
+        self.successors = successors
+        self.forks = forks
+        self.node_ids = node_ids
+        self.start_index = start_index
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def compile_flow(flow, handlers=None):
+    """Compiles flow into an ExecutionPlan using `handlers` (node type -> factory, default NODE_HANDLERS).
+
+    Raises FlowValidationError for the problems validate_flow reports, and for node
+    properties the handler factories cannot parse (e.g. a non-numeric duration_ms).
+    """
+    handlers = handlers if handlers is not None else NODE_HANDLERS
+    problems = validate_flow(flow, handlers)
+    if problems:
+        raise FlowValidationError(problems)
+
+    index_of = {node_id: i for i, node_id in enumerate(flow.nodes)}
+    steps = []
+    successors = []
+    forks = []
+    start_index = END
+    for i, node in enumerate(flow.nodes.values()):
+        if node.node_type == "Start":
+            start_index = i
+        try:
+            steps.append(handlers[node.node_type](node))
+        except (ValueError, TypeError) as e:
+            problems.append(f"'{node.name}' has an invalid property: {e}")
+            continue
+
+        port_index = _port_names(node.node_type)[1]
+        if not port_index:
+            successors.append((END,))
+            continue
+        targets = [[] for _ in port_index]
+        for connection in flow.outgoing_connections(node.id):
+            targets[port_index[connection.from_port_name]].append(index_of[connection.to_node_id])
+        table = []
+        for port_targets in targets:
+            if len(port_targets) > 1:
+                table.append(END - 1 - len(forks)) # See fork_index()
+                forks.append(tuple(port_targets))
+            else:
+                table.append(port_targets[0] if port_targets else END)
+        successors.append(tuple(table))
+
+    if problems:
+        raise FlowValidationError(problems)
+    return ExecutionPlan(steps, successors, list(flow.nodes), start_index, forks)
+
+
+class ExecutionResult:
+    __slots__ = ("steps_run", "last_node_id", "completed", "stats")
+
+    def __init__(self, steps_run, last_node_id, completed, stats=None):
+        self.steps_run = steps_run
+        self.last_node_id = last_node_id
+        self.completed = completed # False when max_steps stopped the run
+        self.stats = stats or {} # Backend counters for this run (see ActionBackend.run_stats)
+
+    def __repr__(self):
+        return f"ExecutionResult(steps_run={self.steps_run}, completed={self.completed})"
+
+
+def run_plan(plan, backend=None, max_steps=None):
+    """Runs a compiled plan from its Start node until no successor remains (or max_steps).
+
+    The branches of a fork run one after another (depth first, in connection order).
+    """
+    ctx = ExecutionContext(backend if backend is not None else ActionBackend())
+    ctx.backend.run_started()
+    steps = plan.steps
+    successors = plan.successors
+    forks = plan.forks
+    pending = [] # (step index, last_result at the fork) of branches still to run, next one last
+    index = plan.start_index
+    last_index = index
+    steps_run = 0
+    limit = max_steps if max_steps is not None else -1
+    while steps_run != limit:
+        if index < 0:
+            if index == END:
+                if not pending:
+                    break
+                index, ctx.last_result = pending.pop()
+            else:
+                branches = forks[fork_index(index)]
+                pending.extend((branch, ctx.last_result) for branch in reversed(branches[1:]))
+                index = branches[0]
+        last_index = index
+        index = successors[index][steps[index](ctx)]
+        steps_run += 1
+    return ExecutionResult(steps_run, plan.node_ids[last_index] if last_index != END else None,
+                           index == END and not pending, ctx.backend.run_stats())
+
+
+def run_flow(flow, backend=None, max_steps=None):
+    return run_plan(compile_flow(flow), backend, max_steps)
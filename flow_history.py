@@ -0,0 +1,260 @@
+# --- Undo History ---
+# Command-based undo/redo for the editor. Every MainWindow mutation records a
+# command holding only the delta it made (the nodes it added, one property's old
+# and new value, the positions of the nodes a drag moved), never a snapshot of the
+# flow. Commands are applied through the same MainWindow methods the UI uses, so
+# graphics items, indexes and the journal stay in sync; nothing is recorded while
+# a command is being applied.
+#
+# Consecutive edits of the same target (keystrokes in a property field, the frames
+# of a programmatic move) merge into one entry until the entry is closed: by undo,
+# redo, another kind of edit or MainWindow changing the selection.
+#
+# The history is bounded by a memory budget (VBB_UNDO_BUDGET_MB, default 64 MiB):
+# each command estimates its size, and the oldest entries are evicted when the total
+# exceeds the budget. The newest entry is always kept, however large.
+import collections
+import os
+import sys
+
+DEFAULT_BUDGET_BYTES = int(float(os.environ.get("VBB_UNDO_BUDGET_MB", "64")) * 1024 * 1024)
+
+# Rough per-object costs (object, slots, dict/tuple entries) used by the size estimates
+_NODE_BYTES = 400
+_CONNECTION_BYTES = 200
+_MOVE_BYTES = 150
+_EDIT_BYTES = 150
+
+
+def _value_bytes(value):
+    return sys.getsizeof(value)
+
+
+# --- Commands ---
+class Command:
+    """One undoable change. merge_key identifies edits that may merge with the next one (None: never)."""
+    __slots__ = ("size", "open")
+    label = ""
+    merge_key = None
+
+    def undo(self, editor):
+        raise NotImplementedError
+
+    def redo(self, editor):
+        raise NotImplementedError
+
+    def merge(self, other):
+        """Folds other (a later command with the same merge_key) into this one."""
+        raise NotImplementedError
+
+
+class InsertCommand(Command):
+    """Nodes and connections that were added, and the connections they replaced on input ports."""
+    __slots__ = ("nodes", "connections", "replaced")
+    label = "Insert"
+
+    def __init__(self, nodes, connections=(), replaced=()):
+        self.nodes = tuple(nodes)
+        self.connections = tuple(connections)
+        self.replaced = tuple(replaced)
+        self.size = (_NODE_BYTES * len(self.nodes)
+                     + sum(_value_bytes(node.properties) for node in self.nodes)
+                     + _CONNECTION_BYTES * (len(self.connections) + len(self.replaced)))
+
+    def undo(self, editor):
+        # Removing the nodes also removes the connections touching them
+        node_ids = {node.id for node in self.nodes}
+        editor.delete_nodes(node_ids)
+        editor.remove_connections(c for c in self.connections
+                                  if c.from_node_id not in node_ids and c.to_node_id not in node_ids)
+        if self.replaced:
+            editor.insert_nodes((), self.replaced)
+
+    def redo(self, editor):
+        editor.insert_nodes(self.nodes, self.connections)
+
+
+class RemoveCommand(Command):
+    """Nodes and connections that were removed (connections include those of the removed nodes)."""
+    __slots__ = ("nodes", "connections")
+    label = "Delete"
+
+    def __init__(self, nodes, connections=()):
+        self.nodes = tuple(nodes)
+        self.connections = tuple(connections)
+        self.size = (_NODE_BYTES * len(self.nodes)
+                     + sum(_value_bytes(node.properties) for node in self.nodes)
+                     + _CONNECTION_BYTES * len(self.connections))
+
+    def undo(self, editor):
+        editor.insert_nodes(self.nodes, self.connections)
+
+    def redo(self, editor):
+        editor.delete_nodes([node.id for node in self.nodes])
+        editor.remove_connections(self.connections)
+
+
+class MoveCommand(Command):
+    """Positions before and after a move: ((node, old x, old y, new x, new y), ...)."""
+    __slots__ = ("moves", "merge_key")
+    label = "Move"
+
+    def __init__(self, moves, mergeable=False):
+        self.moves = tuple(moves)
+        # Moves outside a drag transaction merge while they keep moving the same nodes
+        self.merge_key = ("move", frozenset(move[0].id for move in self.moves)) if mergeable else None
+        self.size = _MOVE_BYTES * len(self.moves)
+
+    def undo(self, editor):
+        editor.move_nodes([(node, old_x, old_y) for node, old_x, old_y, _, _ in self.moves])
+
+    def redo(self, editor):
+        editor.move_nodes([(node, x, y) for node, _, _, x, y in self.moves])
+
+    def merge(self, other):
+        new_positions = {move[0].id: move[3:] for move in other.moves}
+        self.moves = tuple(move[:3] + new_positions[move[0].id] for move in self.moves)
+
+
+class RenameCommand(Command):
+    __slots__ = ("node", "old", "new")
+    label = "Rename"
+
+    def __init__(self, node, old, new):
+        self.node = node
+        self.old = old
+        self.new = new
+        self.size = _EDIT_BYTES + _value_bytes(old) + _value_bytes(new)
+
+    @property
+    def merge_key(self):
+        return ("rename", self.node.id)
+
+    def undo(self, editor):
+        editor.update_node_name(self.node, self.old)
+
+    def redo(self, editor):
+        editor.update_node_name(self.node, self.new)
+
+    def merge(self, other):
+        self.new = other.new
+        self.size = _EDIT_BYTES + _value_bytes(self.old) + _value_bytes(self.new)
+
+
+class PropertyCommand(Command):
+    __slots__ = ("node", "key", "old", "new")
+    label = "Edit Property"
+
+    def __init__(self, node, key, old, new):
+        self.node = node
+        self.key = key
+        self.old = old
+        self.new = new
+        self.size = _EDIT_BYTES + _value_bytes(old) + _value_bytes(new)
+
+    @property
+    def merge_key(self):
+        return ("prop", self.node.id, self.key)
+
+    def undo(self, editor):
+        editor.update_node_property(self.node, self.key, self.old)
+
+    def redo(self, editor):
+        editor.update_node_property(self.node, self.key, self.new)
+
+    def merge(self, other):
+        self.new = other.new
+        self.size = _EDIT_BYTES + _value_bytes(self.old) + _value_bytes(self.new)
+
+
+# --- Stack ---
+class UndoStack:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._undo = collections.deque() # Oldest first
+        self._redo = []                  # Next to redo last
+        self.size = 0 # Estimated bytes held by both stacks
+        self.applying = False # True while a command is undone/redone; record() ignores the resulting edits
+        self.merged = 0
+        self.evicted = 0
+
+    def record(self, command):
+        """Adds a command made by an edit, merging it into the newest entry when both edit the same target."""
+        if self.applying:
+            return
+        self._clear_redo()
+        top = self._undo[-1] if self._undo else None
+        key = command.merge_key
+        if top is not None and top.open and key is not None and top.merge_key == key:
+            self.size -= top.size
+            top.merge(command)
+            self.size += top.size
+            self.merged += 1
+            return
+        if top is not None:
+            top.open = False
+        command.open = True
+        self._undo.append(command)
+        self.size += command.size
+        self._evict()
+
+    def close(self):
+        """Ends merging: the next edit starts a new entry."""
+        if self._undo:
+            self._undo[-1].open = False
+
+    def undo(self, editor):
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.open = False
+        self._apply(command.undo, editor)
+        self._redo.append(command)
+        return command
+
+    def redo(self, editor):
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        self._apply(command.redo, editor)
+        command.open = False
+        self._undo.append(command)
+        return command
+
+    def _apply(self, action, editor):
+        self.applying = True
+        try:
+            action(editor)
+        finally:
+            self.applying = False
+
+    def _clear_redo(self):
+        for command in self._redo:
+            self.size -= command.size
+        self._redo.clear()
+
+    def _evict(self):
+        while self.size > self.budget_bytes and len(self._undo) > 1:
+            self.size -= self._undo.popleft().size
+            self.evicted += 1
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.size = 0
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def stats(self):
+        return {
+            "undo_entries": len(self._undo),
+            "redo_entries": len(self._redo),
+            "size_bytes": self.size,
+            "budget_bytes": self.budget_bytes,
+            "merged": self.merged,
+            "evicted": self.evicted,
+        }
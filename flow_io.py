@@ -0,0 +1,223 @@
+# --- Flow File Format ---
+# A flow file is JSON Lines: one header record, then one record per node,
+# then one record per connection, then an "end" trailer with the counts.
+#
+#   {"format": "visual-bot-flow", "version": 1}
+#   {"t": "node", "uid": "...", "type": "Log Message", "name": "...", "x": 0.0, "y": 0.0, "props": {...}}
+#   {"t": "conn", "uid": "...", "from": "<node uid>", "from_port": "out", "to": "<node uid>", "to_port": "in"}
+#   {"t": "end", "nodes": 1, "connections": 0}
+#
+# Records are written and read one at a time, so saving and loading never hold
+# more than one record's text in memory. Nodes always come before connections,
+# which lets a reader show nodes before the rest of the file is parsed.
+# Files ending in ".gz" are gzip-compressed.
+import gzip
+import json
+import os
+import zlib
+
+from flow_model import Node, Connection, Flow
+
+FORMAT_NAME = "visual-bot-flow"
+FORMAT_VERSION = 1
+
+
+class FlowFormatError(ValueError):
+    pass
+
+
+def _open(path, mode, compressed=None):
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8")
+    return open(path, mode, encoding="utf-8", newline="\n")
+
+
+def node_record(node):
+    return {"t": "node", "uid": node.uid, "type": node.node_type, "name": node.name,
+            "x": node.x, "y": node.y, "props": node.properties}
+
+
+def connection_record(connection, flow):
+    return {"t": "conn", "uid": connection.uid,
+            "from": flow.nodes[connection.from_node_id].uid, "from_port": connection.from_port_name,
+            "to": flow.nodes[connection.to_node_id].uid, "to_port": connection.to_port_name}
+
+
+class FlowWriter:
+    """Writes a flow file record by record. Use as a context manager.
+
+    Extra header fields (e.g. the journal position a snapshot includes) can be passed as `header`.
+    """
+    def __init__(self, path, header=None):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._file = _open(self._tmp_path, "w", compressed=path.endswith(".gz"))
+        self._encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        self.node_count = 0
+        self.connection_count = 0
+        self._write(dict(header or {}, format=FORMAT_NAME, version=FORMAT_VERSION))
+
+    def _write(self, record):
+        self._file.write(self._encode(record))
+        self._file.write("\n")
+
+    def write_node(self, node):
+        if self.connection_count:
+            raise FlowFormatError("Nodes must be written before connections")
+        self._write(node_record(node))
+        self.node_count += 1
+
+    def write_connection(self, connection, flow):
+        self._write(connection_record(connection, flow))
+        self.connection_count += 1
+
+    def close(self):
+        """Writes the trailer and atomically replaces the target file."""
+        self._write({"t": "end", "nodes": self.node_count, "connections": self.connection_count})
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_flow(flow, path, header=None):
+    with FlowWriter(path, header) as writer:
+        for node in flow.nodes.values():
+            writer.write_node(node)
+        for connection in flow.connections.values():
+            writer.write_connection(connection, flow)
+
+
+def _read_header(f, path):
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        raise FlowFormatError(f"{path}: not a flow file") from None
+    if not isinstance(header, dict) or header.get("format") != FORMAT_NAME:
+        raise FlowFormatError(f"{path}: not a flow file")
+    version = header.get("version", 0)
+    if not isinstance(version, int):
+        raise FlowFormatError(f"{path}:1: format version must be an integer, not {version!r}")
+    if version > FORMAT_VERSION:
+        raise FlowFormatError(f"{path}: format version {version} is newer than supported ({FORMAT_VERSION})")
+    return header
+
+
+def read_header(path):
+    with _open(path, "r") as f:
+        return _read_header(f, path)
+
+
+def iter_records(path):
+    """Yields (line number, record) for the records of a flow file after checking its header."""
+    with _open(path, "r") as f:
+        try:
+            _read_header(f, path)
+
+            decode = json.JSONDecoder().decode
+            for line_number, line in enumerate(f, start=2):
+                if not line.strip():
+                    continue
+                try:
+                    record = decode(line)
+                except ValueError as e:
+                    raise FlowFormatError(f"{path}:{line_number}: {e}") from None
+                if not isinstance(record, dict):
+                    raise FlowFormatError(f"{path}:{line_number}: expected a JSON object, got {type(record).__name__}")
+                yield line_number, record
+        except (EOFError, zlib.error) as e: # A compressed file cut short (e.g. by a crash while saving)
+            raise FlowFormatError(f"{path}: file is truncated ({e})") from None
+
+
+class FlowLoader:
+    """Loads a flow file into a Flow a chunk of records at a time.
+
+    The editor calls load_chunk() from a timer so the canvas can show nodes
+    while the rest of the file is still being read.
+    """
+    def __init__(self, path, flow=None):
+        self.path = path
+        self.flow = flow if flow is not None else Flow()
+        self.done = False
+        self._records = iter_records(path)
+        self._node_ids_by_uid = {} # Only needed while loading; dropped when done
+        self._connection_count = 0
+
+    def load_chunk(self, max_records=5000):
+        """Reads up to max_records records. Returns the (nodes, connections) added."""
+        nodes = []
+        connections = []
+        if self.done:
+            return nodes, connections
+
+        flow = self.flow
+        node_ids_by_uid = self._node_ids_by_uid
+        for _ in range(max_records):
+            line_number, record = next(self._records, (None, None))
+            if record is None:
+                raise FlowFormatError(f"{self.path}: file is truncated (no end record)")
+
+            where = f"{self.path}:{line_number}"
+            try:
+                kind = record.get("t")
+                if kind == "node":
+                    properties = record.get("props") or {}
+                    if not isinstance(properties, dict):
+                        raise TypeError(f"props must be an object, not {type(properties).__name__}")
+                    node = Node(record["type"], name=record.get("name", record["type"]),
+                                position=(record.get("x", 0.0), record.get("y", 0.0)),
+                                properties=properties, uid=record["uid"])
+                    flow.add_node(node)
+                    node_ids_by_uid[node.uid] = node.id
+                    nodes.append(node)
+                elif kind == "conn":
+                    try:
+                        from_node_id = node_ids_by_uid[record["from"]]
+                        to_node_id = node_ids_by_uid[record["to"]]
+                    except KeyError as e:
+                        raise FlowFormatError(f"{where}: connection {record.get('uid')} refers to unknown node {e}") from None
+                    connection = Connection(from_node_id, record["from_port"], to_node_id, record["to_port"], uid=record["uid"])
+                    flow.add_connection(connection)
+                    self._connection_count += 1
+                    connections.append(connection)
+                elif kind == "end":
+                    if record.get("nodes") != len(node_ids_by_uid):
+                        raise FlowFormatError(f"{where}: expected {record.get('nodes')} nodes, read {len(node_ids_by_uid)}")
+                    if record.get("connections") != self._connection_count:
+                        raise FlowFormatError(f"{where}: expected {record.get('connections')} connections, "
+                                              f"read {self._connection_count}")
+                    self.close()
+                    break
+                # Unknown record kinds are skipped so newer minor additions stay readable
+            except FlowFormatError:
+                raise
+            except KeyError as e:
+                raise FlowFormatError(f"{where}: {kind} record has no {e} field") from None
+            except (TypeError, ValueError, AttributeError) as e:
+                raise FlowFormatError(f"{where}: invalid {kind} record ({e})") from None
+        return nodes, connections
+
+    def close(self):
+        self.done = True
+        self._records.close()
+        self._node_ids_by_uid = {}
+
+
+def load_flow(path):
+    loader = FlowLoader(path)
+    while not loader.done:
+        loader.load_chunk()
+    return loader.flow
@@ -0,0 +1,251 @@
+# --- Edit Journal ---
+# Append-only log of model edits next to a flow file (<flow>.journal), so an
+# autosave costs O(edit) instead of rewriting the whole flow.
+#
+# Each line is one small JSON record tagged with an increasing "seq":
+#   {"seq": 7, "op": "set_prop", "uid": "...", "key": "message", "value": "hi"}
+#
+# Records are queued on the UI thread and written + fsync'ed in batches by a
+# background thread. Every `compact_every` records (and on close) the same
+# thread folds the journal into the flow file: it loads the flow file into a
+# private Flow, replays the journal, writes a new snapshot whose header holds
+# the last folded seq, and deletes the journal. Because the snapshot records
+# which seq it includes, a crash at any point can be recovered by replaying
+# snapshot + journal again (see compact()).
+import json
+import os
+import threading
+
+from flow_io import load_flow, read_header, save_flow
+from flow_model import Node, Connection
+from tracing import tracer
+
+
+def journal_path(flow_path):
+    return flow_path + ".journal"
+
+
+def iter_journal(path):
+    """Yields journal records; a torn last line (crash mid-write) is ignored."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+class JournalReplayer:
+    """Applies journal records to a Flow, looking nodes and connections up by uid."""
+    def __init__(self, flow):
+        self.flow = flow
+        self._connections_by_uid = {c.uid: c for c in flow.connections.values()}
+
+    def apply(self, record):
+        flow = self.flow
+        op = record["op"]
+        if op == "add_node":
+            if flow.node_for_uid(record["uid"]) is None:
+                flow.add_node(Node(record["type"], name=record["name"], position=(record["x"], record["y"]),
+                                   properties=record["props"], uid=record["uid"]))
+        elif op == "add_conn":
+            from_node = flow.node_for_uid(record["from"])
+            to_node = flow.node_for_uid(record["to"])
+            if from_node and to_node and record["uid"] not in self._connections_by_uid:
+                connection = Connection(from_node.id, record["from_port"], to_node.id, record["to_port"], uid=record["uid"])
+                replaced = flow.add_connection(connection)
+                if replaced is not None:
+                    self._connections_by_uid.pop(replaced.uid, None)
+                self._connections_by_uid[connection.uid] = connection
+        elif op == "remove_conn":
+            connection = self._connections_by_uid.pop(record["uid"], None)
+            if connection is not None:
+                flow.remove_connection(connection.id)
+        else:
+            node = flow.node_for_uid(record["uid"])
+            if node is None:
+                return
+            if op == "move":
+                node.position = (record["x"], record["y"])
+            elif op == "rename":
+                node.name = record["name"]
+            elif op == "set_prop":
+                node.properties[record["key"]] = record["value"]
+            elif op == "remove_node":
+                for connection in flow.remove_node(node.id):
+                    self._connections_by_uid.pop(connection.uid, None)
+
+
+def compact(flow_path):
+    """Folds <flow>.journal into the flow file. Returns the number of records applied.
+
+    Also used at startup to recover edits left behind by a crash.
+    """
+    path = journal_path(flow_path)
+    if not os.path.exists(path):
+        return 0
+    last_seq = read_header(flow_path).get("journal_seq", 0)
+    flow = load_flow(flow_path)
+    replayer = JournalReplayer(flow)
+    applied = 0
+    for record in iter_journal(path):
+        if record["seq"] <= last_seq:
+            continue # Already folded into the snapshot before a crash
+        replayer.apply(record)
+        last_seq = record["seq"]
+        applied += 1
+    save_flow(flow, flow_path, header={"journal_seq": last_seq})
+    os.remove(path)
+    return applied
+
+
+class FlowJournal:
+    """Records edits of one flow file and writes them from a background thread."""
+    def __init__(self, flow_path, flush_interval=0.5, compact_every=20000):
+        self.flow_path = flow_path
+        self.path = journal_path(flow_path)
+        self.flush_interval = flush_interval # Seconds between batched writes
+        self.compact_every = compact_every
+
+        self._seq = read_header(flow_path).get("journal_seq", 0)
+        if os.path.exists(self.path):
+            for record in iter_journal(self.path):
+                self._seq = max(self._seq, record["seq"])
+
+        self._cond = threading.Condition()
+        self._pending = [] # Records not yet handed to the writer thread
+        self._coalesce = {} # (op, uid[, key]) -> pending record that later edits overwrite
+        self._stopping = False
+        self._compact_on_stop = True
+        self._file = None
+        self._records_since_compaction = 0
+
+        # Counters for diagnostics
+        self.records_written = 0
+        self.batches_written = 0
+        self.compactions = 0
+
+        self._thread = threading.Thread(target=self._run, name="flow-journal", daemon=True)
+        self._thread.start()
+
+    # --- Recording (UI thread) ---
+    def _append(self, record, coalesce_key=None):
+        with self._cond:
+            if coalesce_key is not None:
+                pending = self._coalesce.get(coalesce_key)
+                if pending is not None:
+                    # Same field edited again before the last flush: keep only the newest value
+                    pending.update(record)
+                    return
+            self._seq += 1
+            record["seq"] = self._seq
+            self._pending.append(record)
+            if coalesce_key is not None:
+                self._coalesce[coalesce_key] = record
+            else:
+                # Adds and removals end coalescing: a later edit folded into an earlier record would
+                # be replayed before them (e.g. an undone delete re-adds the node with its old position)
+                self._coalesce.clear()
+
+    def _append_many(self, records):
+        with self._cond:
+            for record in records:
+                self._seq += 1
+                record["seq"] = self._seq
+            self._pending.extend(records)
+            self._coalesce.clear()
+
+    @staticmethod
+    def _node_record(node):
+        return {"op": "add_node", "uid": node.uid, "type": node.node_type, "name": node.name,
+                "x": node.x, "y": node.y, "props": dict(node.properties)}
+
+    @staticmethod
+    def _connection_record(connection, flow):
+        return {"op": "add_conn", "uid": connection.uid,
+                "from": flow.nodes[connection.from_node_id].uid, "from_port": connection.from_port_name,
+                "to": flow.nodes[connection.to_node_id].uid, "to_port": connection.to_port_name}
+
+    def node_added(self, node):
+        self._append(self._node_record(node))
+
+    def nodes_added(self, nodes, connections=(), flow=None):
+        """Records a bulk insertion (nodes first, then the connections between them) under one lock."""
+        records = [self._node_record(node) for node in nodes]
+        records.extend(self._connection_record(connection, flow) for connection in connections)
+        self._append_many(records)
+
+    def node_removed(self, node):
+        self._append({"op": "remove_node", "uid": node.uid})
+
+    def node_moved(self, node):
+        self._append({"op": "move", "uid": node.uid, "x": node.x, "y": node.y}, ("move", node.uid))
+
+    def node_renamed(self, node):
+        self._append({"op": "rename", "uid": node.uid, "name": node.name}, ("rename", node.uid))
+
+    def property_changed(self, node, key, value):
+        self._append({"op": "set_prop", "uid": node.uid, "key": key, "value": value}, ("set_prop", node.uid, key))
+
+    def connection_added(self, connection, flow):
+        self._append(self._connection_record(connection, flow))
+
+    def connection_removed(self, connection):
+        self._append({"op": "remove_conn", "uid": connection.uid})
+
+    def close(self, compact_on_stop=True):
+        """Writes what is pending and stops the thread, folding the journal into the flow file by default."""
+        with self._cond:
+            self._stopping = True
+            self._compact_on_stop = compact_on_stop
+            self._cond.notify()
+        self._thread.join()
+
+    def delete(self):
+        """Removes the journal file of a closed journal (its flow was just saved in full)."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # --- Writer thread ---
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+                self._coalesce = {}
+                stopping = self._stopping
+                compact_on_stop = self._compact_on_stop
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if self._records_since_compaction >= self.compact_every or (stopping and compact_on_stop):
+                    self._compact()
+            except OSError as e:
+                tracer.error("journal", "Flow journal %s: %s", self.path, e)
+
+            if stopping:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write_batch(self, batch):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8", newline="\n")
+        encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        self._file.write("".join(encode(record) + "\n" for record in batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records_written += len(batch)
+        self.batches_written += 1
+        self._records_since_compaction += len(batch)
+
+    def _compact(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if compact(self.flow_path):
+            self.compactions += 1
+        self._records_since_compaction = 0
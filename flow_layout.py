@@ -0,0 +1,348 @@
+# --- Auto-Layout ---
+# Layered (Sugiyama-style) left-to-right layout of a flow, following connections from
+# output ports (out, true, false) to input ports. Imported by the editor on first use.
+#
+#   1. cycles are broken by reversing the back edges of a depth-first search that
+#      visits each node's outputs in port order (so "true" comes before "false")
+#   2. every node gets the layer of its longest path from a source (columns)
+#   3. edges spanning several layers are split by dummy nodes, one per layer crossed
+#   4. crossing reduction: barycenter sweeps, down the layers by predecessors then back
+#      up by successors; each layer is sorted with NumPy against its already placed
+#      neighbour layer, and layers holding a single node are skipped; the order with
+#      the fewest crossings is kept (counted with a vectorized merge sort)
+#   5. y coordinates: each node moves towards the mean y of its neighbours, then
+#      overlaps in a layer are removed with a grouped running max (top down) and min
+#      (bottom up) whose average keeps the spacing
+#
+# Only phase 1 and 2 walk the graph node by node in Python (linear time); ordering
+# loops over layers, and coordinates are array operations over all nodes and dummy nodes. layout_region() re-lays out
+# only the nodes a few connections away from an edit, inside the area they already
+# cover. It reads only those nodes and their connections, so its cost does not grow
+# with the rest of the flow.
+import numpy as np
+
+from node_types import get_node_type
+
+COLUMN_GAP = 80 # Horizontal space between layers
+ROW_GAP = 30    # Vertical space between nodes of a layer
+MIN_COLUMN_GAP = 20 # Narrowest column gap layout_region() uses to fit a region into its area
+ORDER_SWEEPS = 8
+COORDINATE_SWEEPS = 4
+
+
+# --- Graph ---
+def _subgraph(flow, node_ids):
+    """Returns (node ids, src, dst, port rank) arrays for the connections among node_ids.
+
+    Only the outgoing connections of node_ids are visited.
+    """
+    ids = list(node_ids)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    src, dst, rank = [], [], []
+    nodes = flow.nodes
+    for i, node_id in enumerate(ids):
+        connections = flow.outgoing_connections(node_id)
+        if not connections:
+            continue
+        output_index = get_node_type(nodes[node_id].node_type).output_index
+        for connection in connections:
+            j = index.get(connection.to_node_id)
+            if j is None or j == i:
+                continue
+            src.append(i)
+            dst.append(j)
+            rank.append(output_index.get(connection.from_port_name, 0))
+    return ids, np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), np.array(rank, dtype=np.int64)
+
+
+def _csr(count, src, dst, rank):
+    """Successor lists in port order, as Python lists (offsets, targets, edge numbers)."""
+    order = np.lexsort((rank, src))
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=count), out=offsets[1:])
+    return offsets.tolist(), dst[order].tolist(), order.tolist()
+
+
+# --- Phase 1 and 2: acyclic orientation and layers ---
+def _break_cycles(count, src, dst, rank):
+    """Returns (src, dst, visit order): edges closing a cycle are reversed."""
+    offsets, targets, edge_numbers = _csr(count, src, dst, rank)
+    state = [0] * count # 0 unvisited, 1 on the DFS stack, 2 done
+    reversed_edges = []
+    visit_order = []
+    # Sources first, so the DFS roots are where the flow starts
+    roots = np.argsort(np.bincount(dst, minlength=count) > 0, kind="stable").tolist()
+    for root in roots:
+        if state[root]:
+            continue
+        state[root] = 1
+        visit_order.append(root)
+        stack = [(root, offsets[root])]
+        while stack:
+            node, k = stack[-1]
+            if k == offsets[node + 1]:
+                state[node] = 2
+                stack.pop()
+                continue
+            stack[-1] = (node, k + 1)
+            target = targets[k]
+            if state[target] == 1:
+                reversed_edges.append(edge_numbers[k])
+            elif state[target] == 0:
+                state[target] = 1
+                visit_order.append(target)
+                stack.append((target, offsets[target]))
+    if reversed_edges:
+        src, dst = src.copy(), dst.copy()
+        src[reversed_edges], dst[reversed_edges] = dst[reversed_edges], src[reversed_edges]
+    return src, dst, visit_order
+
+
+def _longest_path_layers(count, src, dst):
+    """Layer of every node: the length of the longest path reaching it (sources are layer 0)."""
+    offsets, targets, _ = _csr(count, src, dst, np.zeros_like(src))
+    indegree = np.bincount(dst, minlength=count).tolist()
+    layer = [0] * count
+    ready = [node for node in range(count) if indegree[node] == 0]
+    while ready:
+        node = ready.pop()
+        next_layer = layer[node] + 1
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            if layer[target] < next_layer:
+                layer[target] = next_layer
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                ready.append(target)
+    return np.array(layer, dtype=np.int64)
+
+
+def _split_long_edges(count, src, dst, layer):
+    """Adds a dummy node per layer crossed by a long edge. Returns (node count, src, dst, layer)."""
+    span = layer[dst] - layer[src]
+    long = span > 1
+    if not long.any():
+        return count, src, dst, layer
+    short_src, short_dst = src[~long], dst[~long]
+    long_src, long_dst, dummies_per_edge = src[long], dst[long], span[long] - 1
+    total = int(dummies_per_edge.sum())
+    dummy = np.arange(count, count + total)
+    first = count + np.concatenate(([0], np.cumsum(dummies_per_edge)[:-1]))
+    last = first + dummies_per_edge - 1
+    # Dummy k of an edge sits k + 1 layers after the edge's source
+    edge_of_dummy = np.repeat(np.arange(len(long_src)), dummies_per_edge)
+    dummy_layer = layer[long_src][edge_of_dummy] + 1 + (dummy - first[edge_of_dummy])
+    next_node = dummy + 1
+    next_node[last - count] = long_dst
+    return (count + total,
+            np.concatenate((short_src, long_src, dummy)),
+            np.concatenate((short_dst, first, next_node)),
+            np.concatenate((layer, dummy_layer)))
+
+
+# --- Phase 4 and 5: order and coordinates ---
+def _ranks(layer, key):
+    """Rank of every node within its layer when sorted by key (ties keep the previous order)."""
+    order = np.lexsort((key, layer))
+    sorted_layer = layer[order]
+    layer_start = np.searchsorted(sorted_layer, sorted_layer, side="left")
+    rank = np.empty_like(layer)
+    rank[order] = np.arange(len(layer)) - layer_start
+    return rank
+
+
+def _barycenters(values, count, from_nodes, to_nodes):
+    """Mean of values[from_nodes] per node of to_nodes; NaN for nodes without such neighbours."""
+    total = np.bincount(to_nodes, weights=values[from_nodes], minlength=count)
+    degree = np.bincount(to_nodes, minlength=count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / degree
+
+
+def _inversions(values):
+    """Number of pairs i < j with values[i] > values[j] (bottom-up merge sort, one array pass per level)."""
+    values = np.asarray(values, dtype=np.int64)
+    n = len(values)
+    if n < 2:
+        return 0
+    bound = int(values.max()) + 1
+    index = np.arange(n)
+    inversions = 0
+    width = 1
+    while width < n:
+        # Blocks of `width` are sorted; pair block 2k (left) with block 2k + 1 (right)
+        block = index // width
+        pair = block // 2
+        keyed = pair * bound + values
+        is_left = block % 2 == 0
+        left = keyed[is_left]
+        right = ~is_left
+        # For each right element: left elements of its pair greater than it
+        left_end = np.searchsorted(left, (pair[right] + 1) * bound)
+        not_greater = np.searchsorted(left, keyed[right], side="right")
+        inversions += int((left_end - not_greater).sum())
+        values = np.sort(keyed) - pair * bound
+        width *= 2
+    return inversions
+
+
+def _crossings(src, dst, layer, rank):
+    """Edge crossings between adjacent layers (every edge joins a layer to the next one)."""
+    if not len(src):
+        return 0
+    order = np.lexsort((rank[dst], rank[src], layer[src]))
+    # Within a layer, edges sorted by source cross where their target ranks are inverted;
+    # the layer term keeps edges of different layers from being compared
+    return _inversions(layer[src][order] * (int(rank.max()) + 1) + rank[dst][order])
+
+
+def _order(count, src, dst, layer, initial):
+    """Rank of every node within its layer after the crossing reduction sweeps."""
+    layer_count = int(layer.max()) + 1
+    layer_size = np.bincount(layer, minlength=layer_count)
+    layer_start = np.zeros(layer_count + 1, dtype=np.int64)
+    np.cumsum(layer_size, out=layer_start[1:])
+    by_layer = np.argsort(layer, kind="stable")
+    local = np.empty(count, dtype=np.int64) # Index of a node within its layer's slice of by_layer
+    local[by_layer] = np.arange(count) - layer_start[layer[by_layer]]
+    # Every edge joins adjacent layers: group them by the layer of their target and source
+    into = np.argsort(layer[dst], kind="stable")
+    into_start = np.searchsorted(layer[dst][into], np.arange(layer_count + 1))
+    out_of = np.argsort(layer[src], kind="stable")
+    out_of_start = np.searchsorted(layer[src][out_of], np.arange(layer_count + 1))
+    # Positions are fractions of the layer's height, so a node without neighbours on the
+    # swept side (which keeps its own position) sorts consistently among the others
+    position = (_ranks(layer, initial) + 0.5) / layer_size[layer]
+    # A layer holding a single node never changes (chains are skipped entirely)
+    busy = np.flatnonzero(layer_size > 1).tolist()
+    best_rank = _ranks(layer, position)
+    best = _crossings(src, dst, layer, best_rank)
+
+    for sweep in range(ORDER_SWEEPS):
+        if not best:
+            break
+        # Even sweeps go down the layers ordering by predecessors, odd sweeps go back up by successors
+        if sweep % 2 == 0:
+            layers, edges, edge_start, from_nodes, to_nodes = busy, into, into_start, src, dst
+        else:
+            layers, edges, edge_start, from_nodes, to_nodes = reversed(busy), out_of, out_of_start, dst, src
+        for current_layer in layers:
+            nodes = by_layer[layer_start[current_layer]:layer_start[current_layer + 1]]
+            layer_edges = edges[edge_start[current_layer]:edge_start[current_layer + 1]]
+            size = len(nodes)
+            targets = local[to_nodes[layer_edges]]
+            total = np.bincount(targets, weights=position[from_nodes[layer_edges]], minlength=size)
+            degree = np.bincount(targets, minlength=size)
+            current = position[nodes]
+            barycenter = np.where(degree > 0, total / np.maximum(degree, 1), current)
+            # Ties keep the current order, so nodes only swap for a reason
+            position[nodes[np.lexsort((current, barycenter))]] = (np.arange(size) + 0.5) / size
+        # Sweeps can also add crossings: the best order seen so far wins
+        rank = _ranks(layer, position)
+        crossings = _crossings(src, dst, layer, rank)
+        if crossings < best:
+            best_rank, best = rank, crossings
+    return best_rank.astype(np.float64)
+
+
+def _remove_overlaps(y, rank, layer, pitch):
+    """Closest y (in each layer, keeping rank order) with at least pitch between neighbours."""
+    order = np.lexsort((rank, layer))
+    sorted_layer = layer[order]
+    offset = rank[order] * pitch
+    z = y[order] - offset
+    big = (np.ptp(z) + 1.0) * (sorted_layer + 1) # Separates the layers in the running max/min
+    down = np.maximum.accumulate(z + big) - big
+    up = (np.minimum.accumulate((z + big)[::-1]) - big[::-1])[::-1]
+    result = np.empty_like(y)
+    result[order] = (down + up) / 2 + offset
+    return result
+
+
+def _coordinates(count, src, dst, layer, rank, pitch):
+    y = rank * pitch
+    neighbours_from = np.concatenate((src, dst))
+    neighbours_to = np.concatenate((dst, src))
+    for _ in range(COORDINATE_SWEEPS):
+        target = _barycenters(y, count, neighbours_from, neighbours_to)
+        keep = np.isnan(target)
+        target[keep] = y[keep]
+        y = _remove_overlaps(target, rank, layer, pitch)
+    return y - y.min() if count else y
+
+
+# --- Public API ---
+def layered_layout(flow, node_ids=None):
+    """Lays out node_ids (default: all nodes) by their connections among each other.
+
+    Returns {node id: (x, y)} with the layout's top-left corner at (0, 0).
+    """
+    ids, src, dst, rank = _subgraph(flow, flow.nodes if node_ids is None else node_ids)
+    count = len(ids)
+    if not count:
+        return {}
+    nodes = flow.nodes
+    width = max(nodes[node_id].width for node_id in ids)
+    height = max(nodes[node_id].height for node_id in ids)
+
+    src, dst, visit_order = _break_cycles(count, src, dst, rank)
+    layer = _longest_path_layers(count, src, dst)
+    total, src, dst, layer = _split_long_edges(count, src, dst, layer)
+    initial = np.empty(total, dtype=np.float64)
+    initial[visit_order] = np.arange(count)
+    initial[count:] = np.arange(count, total) # Dummy nodes start after the real ones of their layer
+    rank = _order(total, src, dst, layer, initial)
+    y = _coordinates(total, src, dst, layer, rank, height + ROW_GAP)
+    x = layer[:count] * float(width + COLUMN_GAP)
+    return dict(zip(ids, zip(x.tolist(), y[:count].tolist())))
+
+
+def layout_flow(flow):
+    """Positions for every node, placed where the flow's top-left corner currently is."""
+    positions = layered_layout(flow)
+    if not positions:
+        return positions
+    x0 = min(node.x for node in flow.nodes.values())
+    y0 = min(node.y for node in flow.nodes.values())
+    return {node_id: (x + x0, y + y0) for node_id, (x, y) in positions.items()}
+
+
+def region_around(flow, node_ids, hops=2):
+    """node_ids and every node at most `hops` connections away from one of them (either direction)."""
+    region = set(node_id for node_id in node_ids if node_id in flow.nodes)
+    frontier = list(region)
+    for _ in range(hops):
+        reached = []
+        for node_id in frontier:
+            for connection in flow.connections_for_node(node_id):
+                for neighbour in (connection.from_node_id, connection.to_node_id):
+                    if neighbour not in region:
+                        region.add(neighbour)
+                        reached.append(neighbour)
+        frontier = reached
+    return region
+
+
+def layout_region(flow, node_ids, hops=2):
+    """Re-lays out only the nodes around node_ids (e.g. just added or connected); the rest stay put.
+
+    The new layout keeps the region's current top-left corner. Its columns are moved
+    closer together (down to MIN_COLUMN_GAP) when they would not fit the region's
+    current width, so the region does not spread into the columns beside it.
+    Returns {node id: (x, y)} for the region's nodes.
+    """
+    region = region_around(flow, node_ids, hops)
+    positions = layered_layout(flow, region)
+    if not positions:
+        return positions
+    region_nodes = [flow.nodes[node_id] for node_id in positions]
+    left = min(node.x for node in region_nodes)
+    top = min(node.y for node in region_nodes)
+    right = max(node.x + node.width for node in region_nodes)
+    width = max(node.width for node in region_nodes)
+
+    pitch = width + COLUMN_GAP # Column spacing used by layered_layout
+    last_column = round(max(x for x, _ in positions.values()) / pitch)
+    scale = 1.0
+    if last_column and left + last_column * pitch + width > right:
+        scale = max(width + MIN_COLUMN_GAP, (right - left - width) / last_column) / pitch
+    return {node_id: (left + x * scale, top + y) for node_id, (x, y) in positions.items()}
@@ -0,0 +1,240 @@
+# --- Flow Data Model ---
+# Plain-Python (no PyQt6) representation of a flow: Node, Connection and Flow.
+# Objects use __slots__, integer ids and plain float coordinates so large
+# flows stay small in memory. Each object also has a stable external id
+# (`uid`) that is only generated when something needs it (saving, journaling).
+import itertools
+import sys
+
+from node_types import get_node_type
+
+
+_next_id = itertools.count(1).__next__ # Process-wide integer ids for nodes and connections
+
+
+def _new_uid():
+    import uuid # Deferred: importing uuid costs ~20 ms of startup, and headless runs rarely need new uids
+    return uuid.uuid4().hex
+
+
+def intern_node_type(node_type):
+    return sys.intern(node_type)
+
+
+def port_table(node_type):
+    """Returns the shared (input_ports, output_ports) tuples for a node type."""
+    info = get_node_type(node_type)
+    return info.input_ports, info.output_ports
+
+
+class Node:
+    __slots__ = ("id", "_uid", "node_type", "name", "x", "y", "properties")
+
+    def __init__(self, node_type, name="New Node", position=(50, 50), properties=None, uid=None):
+        self.id = _next_id()
+        self._uid = uid
+        self.node_type = intern_node_type(node_type)
+        self.name = name
+        self.x = float(position[0])
+        self.y = float(position[1])
+        self.properties = properties if properties is not None else {}
+
+        # Fill in the type's default properties (see node_types)
+        defaults = get_node_type(self.node_type).defaults
+        if defaults:
+            for key, value in defaults.items():
+                if key not in self.properties:
+                    self.properties[key] = value
+
+    @property
+    def uid(self):
+        """Stable external id, created on first use."""
+        if self._uid is None:
+            self._uid = _new_uid()
+        return self._uid
+
+    @property
+    def position(self):
+        return (self.x, self.y)
+
+    @position.setter
+    def position(self, position):
+        self.x = float(position[0])
+        self.y = float(position[1])
+
+    # Size and ports come from the node type, so they cost nothing per node
+    @property
+    def type_info(self):
+        return get_node_type(self.node_type)
+
+    @property
+    def width(self):
+        return get_node_type(self.node_type).width
+
+    @property
+    def height(self):
+        return get_node_type(self.node_type).height
+
+    @property
+    def input_ports(self):
+        return get_node_type(self.node_type).input_ports
+
+    @property
+    def output_ports(self):
+        return get_node_type(self.node_type).output_ports
+
+    def get_port_position(self, port_name, port_type):
+        """Returns the (x, y) scene position of a port (the node's position for unknown ports)."""
+        offset = get_node_type(self.node_type).port_offsets.get((port_type, port_name))
+        if offset is None:
+            return (self.x, self.y)
+        return (self.x + offset[0], self.y + offset[1])
+
+    def __repr__(self):
+        return f"Node(id={self.id}, type='{self.node_type}', name='{self.name}')"
+
+
+class Connection:
+    __slots__ = ("id", "_uid", "from_node_id", "from_port_name", "to_node_id", "to_port_name")
+
+    def __init__(self, from_node_id, from_port_name, to_node_id, to_port_name, uid=None):
+        self.id = _next_id()
+        self._uid = uid
+        self.from_node_id = from_node_id
+        self.from_port_name = sys.intern(from_port_name)
+        self.to_node_id = to_node_id
+        self.to_port_name = sys.intern(to_port_name)
+
+    @property
+    def uid(self):
+        """Stable external id, created on first use."""
+        if self._uid is None:
+            self._uid = _new_uid()
+        return self._uid
+
+    def __repr__(self):
+        return f"Connection(from={self.from_node_id}.{self.from_port_name} to {self.to_node_id}.{self.to_port_name})"
+
+
+class Flow:
+    def __init__(self):
+        self.nodes = {}
+        self.connections = {} # Connection by connection.id (insertion ordered)
+
+        # --- Adjacency indexes, kept in sync by add/remove below ---
+        # Per-node lists are only created once a node has a connection; they
+        # are as long as the node's degree, so list removal stays O(degree)
+        self._outgoing = {} # node_id -> [Connection, ...]
+        self._incoming = {} # node_id -> [Connection, ...]
+        self._input_ports = {} # (to_node_id, to_port_name) -> Connection
+        self._uid_index = None # uid -> Node, built on first node_for_uid() call
+
+    def add_node(self, node):
+        self.nodes[node.id] = node
+        if self._uid_index is not None:
+            self._uid_index[node.uid] = node
+
+    def add_nodes(self, nodes):
+        """Adds many nodes at once (bulk insertion, paste)."""
+        self.nodes.update((node.id, node) for node in nodes)
+        if self._uid_index is not None:
+            self._uid_index.update((node.uid, node) for node in nodes)
+
+    def remove_node(self, node_id):
+        """Removes a node and every connection touching it. Returns the removed connections."""
+        removed = list(self.connections_for_node(node_id))
+        for connection in removed:
+            self.remove_connection(connection.id)
+        self._outgoing.pop(node_id, None)
+        self._incoming.pop(node_id, None)
+        node = self.nodes.pop(node_id, None)
+        if node is not None and self._uid_index is not None:
+            self._uid_index.pop(node.uid, None)
+        return removed
+
+    def add_connection(self, connection):
+        """Adds a connection, replacing whatever already feeds the same input port.
+
+        Returns the replaced Connection, or None.
+        """
+        replaced = self._input_ports.get((connection.to_node_id, connection.to_port_name))
+        if replaced is not None:
+            self.remove_connection(replaced.id)
+
+        self.connections[connection.id] = connection
+        self._outgoing.setdefault(connection.from_node_id, []).append(connection)
+        self._incoming.setdefault(connection.to_node_id, []).append(connection)
+        self._input_ports[(connection.to_node_id, connection.to_port_name)] = connection
+        return replaced
+
+    def add_connections(self, connections):
+        """Adds many connections; like add_connection, each replaces what feeds its input port.
+
+        Returns the replaced connections that were already in the flow.
+        """
+        replaced = []
+        added = set()
+        for connection in connections:
+            previous = self.add_connection(connection)
+            if previous is not None and previous.id not in added:
+                replaced.append(previous)
+            added.add(connection.id)
+        return replaced
+
+    def remove_connection(self, connection_id):
+        connection = self.connections.pop(connection_id, None)
+        if connection is None:
+            return None
+        self._unlink(self._outgoing, connection.from_node_id, connection)
+        self._unlink(self._incoming, connection.to_node_id, connection)
+        port_key = (connection.to_node_id, connection.to_port_name)
+        if self._input_ports.get(port_key) is connection:
+            del self._input_ports[port_key]
+        return connection
+
+    @staticmethod
+    def _unlink(index, node_id, connection):
+        edges = index.get(node_id)
+        if edges is not None:
+            edges.remove(connection)
+            if not edges:
+                del index[node_id]
+
+    def get_node(self, node_id):
+        return self.nodes.get(node_id)
+
+    def node_for_uid(self, uid):
+        """Looks a node up by its stable external id."""
+        if self._uid_index is None:
+            self._uid_index = {node.uid: node for node in self.nodes.values()}
+        return self._uid_index.get(uid)
+
+    def get_connection(self, connection_id):
+        return self.connections.get(connection_id)
+
+    def outgoing_connections(self, node_id):
+        return self._outgoing.get(node_id, ())
+
+    def incoming_connections(self, node_id):
+        return self._incoming.get(node_id, ())
+
+    def connections_for_node(self, node_id):
+        """Yields every connection touching node_id once (self-loops are not repeated)."""
+        yield from self.outgoing_connections(node_id)
+        for connection in self.incoming_connections(node_id):
+            if connection.from_node_id != node_id:
+                yield connection
+
+    def connection_to_port(self, to_node_id, to_port_name):
+        """Returns the connection feeding an input port, or None."""
+        return self._input_ports.get((to_node_id, to_port_name))
+
+    def find_connection(self, from_node_id, from_port_name, to_node_id, to_port_name):
+        connection = self._input_ports.get((to_node_id, to_port_name))
+        if (connection is not None and connection.from_node_id == from_node_id
+                and connection.from_port_name == from_port_name):
+            return connection
+        return None
+
+    def __repr__(self):
+        return f"Flow(nodes={len(self.nodes)}, connections={len(self.connections)})"
@@ -0,0 +1,274 @@
+# --- Image Matcher ---
+# NumPy template matching for Find Image nodes.
+#
+# Scores are normalized cross-correlation (1.0 = identical up to brightness/contrast),
+# computed on grayscale float32 images:
+#   - the search is cropped to the node's Rectangle region first
+#   - screen and template are reduced into an image pyramid (2x2 mean per level) until the
+#     template would get smaller than min_template_size; the full score map is only computed
+#     at the coarsest level (via FFT), finer levels just refine a few candidates in a
+#     small window around where the coarser level found them
+#   - candidates are refined best-first and the search stops at the first one that reaches
+#     `confidence` at full resolution
+# Decoded templates and their pyramids are kept in an LRU cache keyed by path and mtime.
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class Match:
+    __slots__ = ("x", "y", "width", "height", "score")
+
+    def __init__(self, x, y, width, height, score):
+        self.x = x # Top-left corner in screen coordinates
+        self.y = y
+        self.width = width
+        self.height = height
+        self.score = score
+
+    @property
+    def center(self):
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def __repr__(self):
+        return f"Match(x={self.x}, y={self.y}, width={self.width}, height={self.height}, score={self.score:.3f})"
+
+
+# --- Image helpers ---
+def to_gray(image):
+    """(H, W) or (H, W, 3/4) uint8/float array -> (H, W) float32 grayscale."""
+    image = np.asarray(image)
+    if image.ndim == 3:
+        return image[..., :3].astype(np.float32) @ GRAY_WEIGHTS
+    return image.astype(np.float32, copy=False)
+
+
+def downsample(image):
+    """Halves both dimensions by averaging 2x2 blocks (an odd last row/column is dropped)."""
+    h, w = image.shape[0] // 2, image.shape[1] // 2
+    top, bottom = image[0:h * 2:2], image[1:h * 2:2]
+    return (top[:, 0:w * 2:2] + top[:, 1:w * 2:2] + bottom[:, 0:w * 2:2] + bottom[:, 1:w * 2:2]) * np.float32(0.25)
+
+
+def load_image(path):
+    """Decodes an image file into a NumPy array. .npy files need nothing else; other
+    formats are decoded with Pillow, which is only imported when needed."""
+    if path.endswith(".npy"):
+        return np.load(path)
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError(f"Pillow is required to decode {os.path.basename(path)} (pip install Pillow)") from None
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _fast_len(n):
+    """Smallest 2^a * 3^b * 5^c >= n, a size NumPy's FFT handles quickly."""
+    best = 1 << (n - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            size = p35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _window_sums(image, h, w):
+    """Sums of every h x w window of image (and of image squared), via integral images."""
+    def box(values):
+        integral = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.float64)
+        np.cumsum(np.cumsum(values, axis=0, dtype=np.float64), axis=1, out=integral[1:, 1:])
+        return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+    return box(image), box(np.square(image, dtype=np.float64))
+
+
+class Template:
+    """A decoded template: one zero-mean grayscale image per pyramid level, finest first."""
+    __slots__ = ("path", "mtime", "levels", "norms", "means")
+
+    def __init__(self, image, path=None, mtime=None, max_levels=4, min_template_size=12):
+        self.path = path
+        self.mtime = mtime
+        gray = to_gray(image)
+        grays = [gray]
+        while len(grays) < max_levels and min(grays[-1].shape) // 2 >= min_template_size:
+            grays.append(downsample(grays[-1]))
+        self.means = [float(g.mean()) for g in grays]
+        self.levels = [g - m for g, m in zip(grays, self.means)]
+        self.norms = [float(np.sqrt(np.square(t, dtype=np.float64).sum())) for t in self.levels]
+
+    @property
+    def shape(self):
+        return self.levels[0].shape
+
+
+class TemplateCache:
+    """LRU cache of Templates keyed by path; an entry is reloaded when the file's mtime changes."""
+    def __init__(self, max_entries=32, loader=load_image, max_levels=4, min_template_size=12):
+        self.max_entries = max_entries
+        self.loader = loader
+        self.max_levels = max_levels
+        self.min_template_size = min_template_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        template = self._entries.get(path)
+        if template is not None and template.mtime == mtime:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return template
+        self.misses += 1
+        template = Template(self.loader(path), path, mtime, self.max_levels, self.min_template_size)
+        self._entries[path] = template
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return template
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# --- Scoring ---
+def score_map(image, template, template_norm, template_mean=0.0):
+    """Normalized cross-correlation of a zero-mean template at every position of image.
+
+    Returns an array of shape (H - h + 1, W - w + 1) with scores in [-1, 1].
+    """
+    h, w = template.shape
+    H, W = image.shape
+    fft_shape = (_fast_len(H), _fast_len(W))
+    correlation = np.fft.irfft2(np.fft.rfft2(image, fft_shape) * np.conj(np.fft.rfft2(template, fft_shape)),
+                                fft_shape)[:H - h + 1, :W - w + 1]
+    sums, square_sums = _window_sums(image, h, w)
+    return _normalize(correlation, sums, square_sums, h * w, template_norm, template_mean)
+
+
+def _normalize(correlation, sums, square_sums, n, template_norm, template_mean):
+    window_norm = np.sqrt(np.maximum(square_sums - sums * sums / n, 0.0))
+    if template_norm < 1e-3:
+        # Flat template: only flat windows of the same brightness match
+        return np.where((window_norm < 1e-3) & (np.abs(sums / n - template_mean) < 1.0), 1.0, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = correlation / (window_norm * template_norm)
+    scores[window_norm < 1e-3] = 0.0
+    return scores
+
+
+def score_window(image, template, template_norm, template_mean, x0, y0, x1, y1):
+    """Scores of template at positions x0..x1, y0..y1 (inclusive, already clipped), computed directly."""
+    h, w = template.shape
+    patch = image[y0:y1 + h, x0:x1 + w]
+    windows = np.lib.stride_tricks.sliding_window_view(patch, (h, w))
+    correlation = np.einsum("ijkl,kl->ij", windows, template, dtype=np.float64)
+    sums = windows.sum(axis=(2, 3), dtype=np.float64)
+    square_sums = np.einsum("ijkl,ijkl->ij", windows, windows, dtype=np.float64)
+    return _normalize(correlation, sums, square_sums, h * w, template_norm, template_mean)
+
+
+# --- Matcher ---
+class ImageMatcher:
+    """Finds templates in screenshots. One instance is meant to be shared by all Find Image steps."""
+    def __init__(self, cache=None, max_candidates=5, coarse_margin=0.25, refine_radius=2):
+        self.cache = cache if cache is not None else TemplateCache()
+        self.max_candidates = max_candidates
+        self.coarse_margin = coarse_margin # Coarse scores this far below confidence are still refined
+        self.refine_radius = refine_radius # Search radius (pixels) around a candidate at each finer level
+
+        # Counters for diagnostics
+        self.searches = 0
+        self.matches = 0
+        self.early_rejects = 0 # Searches abandoned at the coarsest level
+
+    def find(self, screen, image_path, confidence=0.8, region=None):
+        """Looks for the image at image_path on screen. Returns a Match or None.
+
+        screen is an (H, W[, C]) array; region is (x, y, w, h) in screen pixels or None for all of it.
+        """
+        return self.find_template(screen, self.cache.get(image_path), confidence, region)
+
+    def find_template(self, screen, template, confidence=0.8, region=None):
+        self.searches += 1
+        ox, oy, roi = self.crop(screen, region)
+        th, tw = template.shape
+        if roi.shape[0] < th or roi.shape[1] < tw:
+            return None
+
+        # Screen pyramid, only as deep as the template's and only over the region
+        pyramid = [to_gray(roi)]
+        for level in range(1, len(template.levels)):
+            t = template.levels[level]
+            smaller = downsample(pyramid[-1])
+            if smaller.shape[0] < t.shape[0] or smaller.shape[1] < t.shape[1]:
+                break
+            pyramid.append(smaller)
+
+        top = len(pyramid) - 1
+        scores = score_map(pyramid[top], template.levels[top], template.norms[top], template.means[top])
+        threshold = confidence - self.coarse_margin if top else confidence
+        candidates = self._candidates(scores, threshold, template.levels[top].shape)
+        if not candidates:
+            self.early_rejects += 1
+            return None
+
+        for x, y in candidates:
+            score = float(scores[y, x])
+            for level in range(top - 1, -1, -1):
+                x, y, score = self._refine(pyramid[level], template, level, x * 2, y * 2)
+            if score >= confidence:
+                self.matches += 1
+                return Match(ox + x, oy + y, tw, th, score)
+        return None
+
+    @staticmethod
+    def crop(screen, region):
+        """Returns (x, y, pixels): the part of screen inside region (clipped) and its offset."""
+        if region is None:
+            return 0, 0, screen
+        x, y, w, h = region
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = min(screen.shape[1], int(x + w)), min(screen.shape[0], int(y + h))
+        return x0, y0, screen[y0:max(y0, y1), x0:max(x0, x1)]
+
+    def _candidates(self, scores, threshold, template_shape):
+        """Best positions above threshold, best first, at most one per template-sized neighbourhood."""
+        flat = scores.ravel()
+        pool = min(flat.size, self.max_candidates * 16)
+        best = np.argpartition(flat, flat.size - pool)[flat.size - pool:]
+        best = best[np.argsort(flat[best])[::-1]]
+        min_dy, min_dx = max(1, template_shape[0] // 2), max(1, template_shape[1] // 2)
+        candidates = []
+        for index in best:
+            if flat[index] < threshold:
+                break
+            y, x = divmod(int(index), scores.shape[1])
+            if all(abs(x - cx) >= min_dx or abs(y - cy) >= min_dy for cx, cy in candidates):
+                candidates.append((x, y))
+                if len(candidates) == self.max_candidates:
+                    break
+        return candidates
+
+    def _refine(self, image, template, level, x, y):
+        t = template.levels[level]
+        r = self.refine_radius
+        max_x, max_y = image.shape[1] - t.shape[1], image.shape[0] - t.shape[0]
+        x0, y0 = min(max_x, max(0, x - r)), min(max_y, max(0, y - r))
+        x1, y1 = min(max_x, x + r), min(max_y, y + r)
+        scores = score_window(image, t, template.norms[level], template.means[level], x0, y0, x1, y1)
+        dy, dx = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        return x0 + int(dx), y0 + int(dy), float(scores[dy, dx])
@@ -0,0 +1,183 @@
+# --- Image Polling ---
+# "Wait until image appears" for Find Image steps with a wait timeout.
+#
+# Between polls the search region is compared tile by tile with a copy of the region
+# as it was at the previous poll:
+#   - same frame, or no tile changed: the previous "not found" still holds, skip matching
+#   - some tiles changed: only positions where the template overlaps a changed tile can
+#     score differently, so only the bounding boxes of the changed tiles (grown by the
+#     template size) are matched again
+#   - otherwise (first poll, region or template changed): full match
+# The region is clipped to the frame first; if what is left is smaller than the
+# template, the poll is a miss without any diffing or matching.
+#
+# A wait is an ImageWait advanced one poll at a time, so the asyncio runner can sleep
+# between polls without holding a thread (see flow_async.ExecutorActionBackend). Each
+# wait has its own TileDiff, so concurrent waits through one poller stay independent.
+import time
+
+import numpy as np
+
+
+class TileDiff:
+    """Remembers a region between polls and reports which tiles of it changed."""
+    def __init__(self, tile_size=64):
+        self.tile_size = tile_size
+        self._previous = None # Copy of the region at the last poll (buffer reused between polls)
+
+    def reset(self):
+        self._previous = None
+
+    def changed_tiles(self, region_pixels):
+        """Returns a (rows, cols) bool array of changed tiles, or None when there is nothing to compare with."""
+        previous = self._previous
+        if previous is None or previous.shape != region_pixels.shape:
+            self._previous = np.array(region_pixels, copy=True)
+            return None
+        t = self.tile_size
+        h, w = region_pixels.shape[:2]
+        differs = np.not_equal(region_pixels, previous).reshape(h, -1)
+        # OR rows into tile rows first, 8 bytes at a time when rows allow it: this is the only full pass
+        word = np.uint64 if differs.shape[1] % 8 == 0 else np.uint8
+        rows = np.bitwise_or.reduceat(differs.view(word), np.arange(0, h, t), axis=0).view(np.bool_)
+        rows = rows.reshape(rows.shape[0], w, -1).any(axis=2)
+        dirty = np.logical_or.reduceat(rows, np.arange(0, w, t), axis=1)
+        if dirty.any():
+            np.copyto(previous, region_pixels)
+        return dirty
+
+
+def dirty_boxes(dirty, tile_size):
+    """Groups changed tiles into connected components. Returns their (x0, y0, x1, y1) pixel boxes."""
+    rows, cols = dirty.shape
+    seen = np.zeros_like(dirty)
+    boxes = []
+    for row, col in zip(*np.nonzero(dirty)):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(row, col)]
+        r0, c0, r1, c1 = row, col, row, col
+        while stack:
+            r, c = stack.pop()
+            r0, c0, r1, c1 = min(r0, r), min(c0, c), max(r1, r), max(c1, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < rows and 0 <= nc < cols and dirty[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    stack.append((nr, nc))
+        boxes.append((int(c0) * tile_size, int(r0) * tile_size, (int(c1) + 1) * tile_size, (int(r1) + 1) * tile_size))
+    return boxes
+
+
+class ImagePoller:
+    """Polls a ScreenCapture until a template appears, skipping matches on unchanged frames."""
+    def __init__(self, capture, matcher, tile_size=64):
+        self.capture = capture
+        self.matcher = matcher
+        self.tile_size = tile_size
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.waits = 0
+        self.found = 0
+        self.timeouts = 0
+        self.polls = 0
+        self.skipped = 0 # Polls that needed no matching at all
+        self.partial = 0 # Polls that re-matched only changed tiles
+        self.full = 0 # Polls that matched the whole region
+        self.wait_time = 0.0
+
+    def stats(self):
+        return {
+            "image_waits": self.waits,
+            "image_waits_found": self.found,
+            "image_waits_timed_out": self.timeouts,
+            "polls": self.polls,
+            "polls_skipped": self.skipped,
+            "polls_partial": self.partial,
+            "polls_full": self.full,
+            "poll_skip_rate": self.skipped / self.polls if self.polls else 0.0,
+            "wait_time_s": self.wait_time,
+        }
+
+    def start(self, image_path, confidence=0.8, region=None, timeout=5.0, poll_interval=0.1):
+        """Starts waiting for an image. Returns an ImageWait; call its poll() until it returns None."""
+        return ImageWait(self, self.matcher.cache.get(image_path), confidence, region, timeout, poll_interval)
+
+    def wait_for(self, image_path, confidence=0.8, region=None, timeout=5.0, poll_interval=0.1, sleep=time.sleep):
+        """Polls until the image is found (returns the Match) or timeout seconds pass (returns None)."""
+        wait = self.start(image_path, confidence, region, timeout, poll_interval)
+        delay = wait.poll()
+        while delay is not None:
+            sleep(delay)
+            delay = wait.poll()
+        return wait.match
+
+    def _poll(self, frame, template, confidence, region, diff, same_frame):
+        self.polls += 1
+        if same_frame:
+            self.skipped += 1
+            return None
+        ox, oy, pixels = self.matcher.crop(frame, region) # Clipped to the frame
+        th, tw = template.shape
+        height, width = pixels.shape[:2]
+        if height < th or width < tw: # Region (partly) off-screen or smaller than the template: cannot match
+            self.skipped += 1
+            return None
+        dirty = diff.changed_tiles(pixels)
+        if dirty is None:
+            self.full += 1
+            return self.matcher.find_template(frame, template, confidence, region)
+        if not dirty.any():
+            self.skipped += 1
+            return None
+
+        self.partial += 1
+        # Keep boxes aligned to the coarsest pyramid level, so they are reduced exactly as a full match would be
+        align = 1 << (len(template.levels) - 1)
+        best = None
+        for x0, y0, x1, y1 in dirty_boxes(dirty, diff.tile_size):
+            # Every template position overlapping the changed box
+            x0, y0 = max(0, x0 - tw + 1) // align * align, max(0, y0 - th + 1) // align * align
+            x1, y1 = min(width, x1 + tw - 1), min(height, y1 + th - 1)
+            match = self.matcher.find_template(frame, template, confidence, (ox + x0, oy + y0, x1 - x0, y1 - y0))
+            if match is not None and (best is None or match.score > best.score):
+                best = match
+        return best
+
+
+class ImageWait:
+    """One wait for an image, advanced by poll(). The Match (or None) is in `match` once it is over."""
+    def __init__(self, poller, template, confidence, region, timeout, poll_interval):
+        self.poller = poller
+        self.template = template
+        self.confidence = confidence
+        self.region = region
+        self.poll_interval = poll_interval
+        self.diff = TileDiff(poller.tile_size)
+        self.match = None
+        self._generation = None # Capture generation of the last poll
+        self._started = time.perf_counter()
+        self._deadline = self._started + timeout
+        poller.waits += 1
+
+    def poll(self):
+        """Polls once. Returns the seconds to sleep before the next poll, or None when the wait is over."""
+        poller = self.poller
+        with poller.capture.pinned() as (generation, frame):
+            match = poller._poll(frame, self.template, self.confidence, self.region, self.diff,
+                                 self._generation == generation)
+        self._generation = generation
+        if match is not None:
+            poller.found += 1
+            self.match = match
+            return self._finish()
+        remaining = self._deadline - time.perf_counter()
+        if remaining <= 0:
+            poller.timeouts += 1
+            return self._finish()
+        return min(self.poll_interval, remaining)
+
+    def _finish(self):
+        self.poller.wait_time += time.perf_counter() - self._started
+        return None
@@ -0,0 +1,203 @@
+# --- Node Type Registry ---
+# Everything that depends on a node's type lives in one NodeType entry: its ports,
+# default properties, size, properties-panel schema and execution handler. Plain
+# Python (no PyQt6), shared by the model, the editor and the engine.
+#
+# Port geometry is computed once per type at registration: every port's local
+# center and hit rectangle, so painting, hit-testing and edge routing are dict
+# lookups instead of scans over the port lists.
+#
+# Plugins add types with register_node_type(); modules listed in the VBB_PLUGINS
+# environment variable (comma separated) are imported by load_plugins() at startup:
+#
+#   register_node_type("Screenshot", defaults={"folder": "shots"}, handler=compile_screenshot,
+#                      schema=(PropertyField("folder", "Folder:", default="shots"),))
+import importlib
+import os
+import sys
+
+NODE_WIDTH = 150
+NODE_HEIGHT = 80
+PORT_RADIUS = 6
+
+# Step factories by node type name (see flow_engine.register_handler); NodeType.handler reads it
+NODE_HANDLERS = {}
+
+
+# --- Property schema ---
+class PropertyField:
+    """One editable node property, as shown by the properties panel.
+
+    kind is "text", "int" (a spin box; `scale` converts stored floats, e.g. 0.8 <-> 80 %),
+    "choice" (a combo box of `choices`), "image" (read-only path with a Browse button)
+    or "heading" (a bold label, no property). visible_when=(key, value) shows the
+    field only while another property has that value.
+    """
+    __slots__ = ("key", "label", "kind", "default", "minimum", "maximum", "suffix", "special_text",
+                 "scale", "choices", "visible_when")
+
+    def __init__(self, key, label, kind="text", default=None, minimum=0, maximum=100, suffix="",
+                 special_text="", scale=1, choices=(), visible_when=None):
+        self.key = key
+        self.label = label
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.suffix = suffix
+        self.special_text = special_text
+        self.scale = scale
+        self.choices = tuple(choices)
+        self.visible_when = visible_when
+
+    def widget_value(self, value):
+        """Converts a stored property value for this field's editor. Returns (widget value, valid).
+
+        Flow files can hold values the editor cannot show (e.g. "abc" in a number field);
+        those give the default's widget value and valid=False.
+        """
+        if self.kind == "int":
+            try:
+                return round(float(value) * self.scale), True
+            except (TypeError, ValueError, OverflowError):
+                return round(float(self.default or 0) * self.scale), False
+        if self.kind == "choice":
+            if value in self.choices:
+                return value, True
+            return (self.default if self.default in self.choices else self.choices[0]), False
+        if value is None:
+            return "", True
+        return str(value), True
+
+
+# --- Node types ---
+class NodeType:
+    """Ports, defaults, size, schema and precomputed port geometry of one node type. Treat as read-only."""
+    def __init__(self, name, inputs=("in",), outputs=("out",), defaults=None, schema=(),
+                 width=NODE_WIDTH, height=NODE_HEIGHT, palette=True):
+        self.name = sys.intern(name)
+        self.width = width
+        self.height = height
+        self.schema = tuple(schema)
+        self.palette = palette # Listed in the editor's node palette
+        # Defaults of the schema's fields, overridden by explicit ones; filled into every new Node
+        self.defaults = {field.key: field.default for field in self.schema if field.key is not None}
+        self.defaults.update(defaults or {})
+
+        # Port descriptors are shared by every node of this type
+        self.input_ports = tuple({"name": sys.intern(port), "type": "input"} for port in inputs)
+        self.output_ports = tuple({"name": sys.intern(port), "type": "output"} for port in outputs)
+        self.input_names = frozenset(port["name"] for port in self.input_ports)
+        self.output_index = {port["name"]: i for i, port in enumerate(self.output_ports)} # Successor table slot
+
+        # Inputs are spread evenly down the left edge, outputs down the right edge
+        self.port_offsets = {} # (port type, port name) -> local (x, y) of the port's center
+        for x, ports in ((0.0, self.input_ports), (float(width), self.output_ports)):
+            for i, port in enumerate(ports):
+                self.port_offsets[(port["type"], port["name"])] = (x, height / (len(ports) + 1) * (i + 1))
+        # (port_info, (x, y, w, h)) local hit/paint rectangles, inputs first
+        r = PORT_RADIUS
+        self.port_rects = tuple(
+            (port, (cx - r, cy - r, 2 * r, 2 * r))
+            for port in self.input_ports + self.output_ports
+            for cx, cy in (self.port_offsets[(port["type"], port["name"])],)
+        )
+
+    def port_at(self, x, y):
+        """Returns the port whose rectangle contains local (x, y), or None. Constant time: the
+        edge picks the port list and y picks the slot, no scan over the ports."""
+        r = PORT_RADIUS
+        if -r <= x <= r:
+            ports = self.input_ports
+        elif self.width - r <= x <= self.width + r:
+            ports = self.output_ports
+        else:
+            return None
+        spacing = self.height / (len(ports) + 1)
+        i = round(y / spacing) - 1
+        if 0 <= i < len(ports) and abs(y - spacing * (i + 1)) <= r:
+            return ports[i]
+        return None
+
+    @property
+    def handler(self):
+        """Execution step factory, or None (the engine registers the built-in ones when imported)."""
+        return NODE_HANDLERS.get(self.name)
+
+    def __repr__(self):
+        return f"NodeType('{self.name}')"
+
+
+NODE_TYPES = {} # name -> NodeType, in registration (palette) order
+_UNKNOWN_TYPES = {} # name -> fallback NodeType for names that were never registered (see get_node_type)
+
+
+def register_node_type(name, inputs=("in",), outputs=("out",), defaults=None, schema=(),
+                       width=NODE_WIDTH, height=NODE_HEIGHT, handler=None, palette=True):
+    """Adds (or replaces) a node type. handler is an optional flow_engine step factory."""
+    node_type = NodeType(name, inputs, outputs, defaults, schema, width, height, palette)
+    NODE_TYPES[node_type.name] = node_type
+    _UNKNOWN_TYPES.pop(node_type.name, None)
+    if handler is not None:
+        NODE_HANDLERS[node_type.name] = handler
+    return node_type
+
+
+def get_node_type(name):
+    """Returns the NodeType for name. Unknown types (e.g. from a file saved with a plugin that is
+    not loaded) get a generic one-input, one-output type that is not shown in the palette. That
+    type is not registered, so validate_flow still reports the missing plugin."""
+    node_type = NODE_TYPES.get(name)
+    if node_type is None:
+        node_type = _UNKNOWN_TYPES.get(name)
+        if node_type is None:
+            node_type = _UNKNOWN_TYPES[name] = NodeType(name, palette=False)
+    return node_type
+
+
+def palette_types():
+    return [node_type for node_type in NODE_TYPES.values() if node_type.palette]
+
+
+def load_plugins(spec=None):
+    """Imports the plugin modules named in spec (default: the VBB_PLUGINS environment variable)."""
+    spec = spec if spec is not None else os.environ.get("VBB_PLUGINS", "")
+    return [importlib.import_module(name) for name in filter(None, (n.strip() for n in spec.split(",")))]
+
+
+# --- Built-in types ---
+_IN_RECTANGLE = ("search_mode", "Rectangle")
+
+register_node_type("Start", inputs=())
+register_node_type("End", outputs=())
+register_node_type("Find Window", schema=(
+    PropertyField("window_title", "Window Title:", default=""),
+))
+register_node_type("Find Image", schema=(
+    PropertyField("image_path", "Image Path:", "image", ""),
+    PropertyField("confidence", "Confidence:", "int", 0.8, 0, 100, " %", scale=100),
+    PropertyField("wait_timeout_ms", "Wait Until Found:", "int", 0, 0, 600000, " ms", "Search once"),
+    PropertyField("poll_interval_ms", "Poll Every:", "int", 100, 10, 60000, " ms"),
+    PropertyField(None, "Search Region:", "heading"),
+    PropertyField("search_mode", "Search Mode:", "choice", "FullScreen", choices=("FullScreen", "Rectangle")),
+    PropertyField("search_rect_x", "Rect X:", "int", 0, -10000, 10000, visible_when=_IN_RECTANGLE),
+    PropertyField("search_rect_y", "Rect Y:", "int", 0, -10000, 10000, visible_when=_IN_RECTANGLE),
+    PropertyField("search_rect_w", "Rect W:", "int", 100, 1, 10000, visible_when=_IN_RECTANGLE),
+    PropertyField("search_rect_h", "Rect H:", "int", 100, 1, 10000, visible_when=_IN_RECTANGLE),
+))
+register_node_type("Mouse Action", schema=(
+    PropertyField("action", "Action:", "choice", "click", choices=("click", "double_click", "move")),
+    PropertyField("x", "X:", "int", 0, -10000, 10000),
+    PropertyField("y", "Y:", "int", 0, -10000, 10000),
+    PropertyField("button", "Button:", "choice", "left", choices=("left", "right", "middle")),
+))
+register_node_type("Keyboard Action", schema=(
+    PropertyField("text", "Text:", default=""),
+))
+register_node_type("Delay/Wait", schema=(
+    PropertyField("duration_ms", "Duration:", "int", 1000, 0, 600000, " ms"),
+))
+register_node_type("Conditional (If/Else)", outputs=("true", "false"))
+register_node_type("Log Message", schema=(
+    PropertyField("message", "Message:", default="Default log message"),
+))
@@ -0,0 +1,167 @@
+# --- Parallel Image Matching ---
+# Spreads template matching over a process pool, for steps that look for several
+# templates at once or search very large (e.g. 4K FullScreen) regions.
+#
+# The frame is copied once per search into a shared memory block that the workers map
+# directly, so only small task tuples are pickled. Work is split by template and by
+# horizontal screen bands; bands overlap by the template height so no position is
+# lost, and start on multiples of the coarsest pyramid step so each band is reduced
+# exactly as a whole-screen search would be. Every worker keeps its own ImageMatcher
+# (and template cache) for the life of the pool. Parallel searches from several
+# threads take turns: there is one shared block, and one search already keeps the
+# whole pool busy.
+#
+# The pool always uses the "spawn" start method, whatever the platform default is.
+# Forking a process that has other threads running (the async runner's executor,
+# the journal writer) can copy held locks into the workers. Spawn is also the only
+# method that behaves the same everywhere. A spawned POSIX child is handed the
+# parent's resource tracker, and Windows has no tracker at all.
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from image_matcher import ImageMatcher, Match
+
+BAND_ALIGN = 8 # 2 ** (max pyramid levels - 1)
+START_METHOD = "spawn"
+
+
+# --- Worker side ---
+_worker_matcher = None
+_worker_frame = None # (shared memory name, SharedMemory) of the frame currently mapped
+
+
+def _init_worker():
+    global _worker_matcher
+    _worker_matcher = ImageMatcher()
+
+
+def _attach(name):
+    global _worker_frame
+    if _worker_frame is not None and _worker_frame[0] == name:
+        return _worker_frame[1]
+    if _worker_frame is not None:
+        _worker_frame[1].close()
+    # Attaching registers the segment with the resource tracker. With START_METHOD the worker uses
+    # the parent's tracker, so this is the parent's own entry again. The worker never unlinks it.
+    # The parent's unlink() (or its tracker, if the parent dies) removes the segment.
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_frame = (name, shm)
+    return shm
+
+
+def _match_task(name, shape, image_path, confidence, region):
+    shm = _attach(name)
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    match = _worker_matcher.find(frame, image_path, confidence, region)
+    if match is None:
+        return None
+    return image_path, match.x, match.y, match.width, match.height, match.score
+
+
+# --- Parent side ---
+class ParallelImageMatcher(ImageMatcher):
+    """ImageMatcher whose find()/find_any() fan large searches out to a process pool.
+
+    Searches smaller than min_parallel_pixels stay in-process, where pool overhead would dominate.
+    """
+    def __init__(self, processes=None, min_parallel_pixels=1920 * 1080, bands=None, **kwargs):
+        super().__init__(**kwargs)
+        self.processes = processes or os.cpu_count() or 1
+        self.min_parallel_pixels = min_parallel_pixels
+        self.bands = bands or self.processes # Screen bands per template
+        self._pool = None
+        self._shm = None
+        self._lock = threading.Lock() # Guards _pool and _shm: one parallel search at a time
+        self.parallel_searches = 0
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context(START_METHOD))
+        return self._pool
+
+    def _share(self, screen):
+        """Copies screen into the shared block (re-allocated only when it grows) and returns its name."""
+        if self._shm is None or self._shm.size < screen.nbytes:
+            self._release_shm()
+            self._shm = shared_memory.SharedMemory(create=True, size=screen.nbytes)
+        np.copyto(np.ndarray(screen.shape, dtype=np.uint8, buffer=self._shm.buf), screen)
+        return self._shm.name
+
+    def _release_shm(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def find(self, screen, image_path, confidence=0.8, region=None):
+        match = self.find_any(screen, [image_path], confidence, region)
+        return match[1] if match else None
+
+    def find_any(self, screen, image_paths, confidence=0.8, region=None):
+        """Looks for several templates at once. Returns (image_path, Match) for the best match, or None."""
+        ox, oy, roi = self.crop(screen, region)
+        height, width = roi.shape[:2]
+        if height * width * len(image_paths) < self.min_parallel_pixels:
+            return self._find_any_serial(screen, image_paths, confidence, region)
+
+        screen = np.ascontiguousarray(screen, dtype=np.uint8)
+        with self._lock:
+            self.searches += 1
+            self.parallel_searches += 1
+            name = self._share(screen)
+            pool = self._ensure_pool()
+            futures = []
+            for image_path in image_paths:
+                template_height = self.cache.get(image_path).shape[0] # Also validates the path up front
+                for y0, y1 in self._bands(height, template_height):
+                    futures.append(pool.submit(_match_task, name, screen.shape, image_path, confidence,
+                                               (ox, oy + y0, width, y1 - y0)))
+
+            best = None
+            for future in futures:
+                result = future.result()
+                if result is not None and (best is None or result[5] > best[5]):
+                    best = result
+        if best is None:
+            return None
+        self.matches += 1
+        return best[0], Match(*best[1:])
+
+    def _bands(self, height, template_height):
+        """Splits rows 0..height into overlapping, aligned (y0, y1) bands."""
+        step = max(BAND_ALIGN, -(-height // self.bands) // BAND_ALIGN * BAND_ALIGN)
+        bands = []
+        for y0 in range(0, height, step):
+            y1 = min(height, y0 + step + template_height - 1)
+            if y1 - y0 >= template_height:
+                bands.append((y0, y1))
+            if y1 == height:
+                break
+        return bands
+
+    def _find_any_serial(self, screen, image_paths, confidence, region):
+        best = None
+        for image_path in image_paths:
+            match = super().find(screen, image_path, confidence, region)
+            if match is not None and (best is None or match.score > best[1].score):
+                best = (image_path, match)
+        return best
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            self._release_shm()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
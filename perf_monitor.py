@@ -0,0 +1,140 @@
+# --- Editor Performance Counters ---
+# Cheap counters for the editor's hot paths, shown by the canvas HUD (FlowCanvas.set_hud_visible)
+# and readable from scripts and tests:
+#
+#   from perf_monitor import perf
+#   perf.reset()
+#   ... drag some nodes ...
+#   assert perf.stats()["update_path_calls"] <= expected
+#
+# Recording is a couple of attribute updates, so the counters are always on. The
+# profiling hooks wrap cProfile (imported on first use) around a user interaction:
+#
+#   perf.start_profile()  ...  perf.stop_profile("drag.prof")   # or: with perf.profile("drag.prof"):
+import collections
+import time
+
+_now = time.perf_counter
+
+
+class PerfMonitor:
+    def __init__(self, window=1.0):
+        self.window = window # Seconds covered by the rolling frame statistics and rates
+        self._profiler = None
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.frame_time_total = 0.0
+        self.frame_time_last = 0.0
+        self.item_paints = 0 # Item paint() calls since reset
+        self.paints_last_frame = 0
+        self._paints_at_frame_start = 0
+        self._frame_started = None
+        self._recent_frames = collections.deque() # (end time, duration, item paints) within the window
+        self.update_path_calls = 0
+        self._rate_sample = (_now(), 0) # (time, update_path_calls) the rate is measured from
+        self.update_path_rate = 0.0
+        self.properties_rebuilds = 0
+        self.properties_rebuild_last = 0.0
+        self.properties_rebuild_max = 0.0
+
+    # --- Recording ---
+    def frame_started(self):
+        self._frame_started = _now()
+        self._paints_at_frame_start = self.item_paints
+
+    def frame_finished(self):
+        if self._frame_started is None:
+            return
+        end = _now()
+        duration = end - self._frame_started
+        self._frame_started = None
+        self.frames += 1
+        self.frame_time_total += duration
+        self.frame_time_last = duration
+        self.paints_last_frame = self.item_paints - self._paints_at_frame_start
+        recent = self._recent_frames
+        recent.append((end, duration, self.paints_last_frame))
+        while recent and recent[0][0] < end - self.window:
+            recent.popleft()
+
+    def properties_rebuilt(self, seconds):
+        self.properties_rebuilds += 1
+        self.properties_rebuild_last = seconds
+        self.properties_rebuild_max = max(self.properties_rebuild_max, seconds)
+
+    # item_paints and update_path_calls are incremented directly by the graphics items
+
+    # --- Reading ---
+    def sample_rates(self):
+        """Updates update_path_rate from the calls made since the previous sample (at most once per window)."""
+        now = _now()
+        sampled_at, calls = self._rate_sample
+        if now - sampled_at >= self.window:
+            self.update_path_rate = (self.update_path_calls - calls) / (now - sampled_at)
+            self._rate_sample = (now, self.update_path_calls)
+        return self.update_path_rate
+
+    def stats(self):
+        recent = [frame for frame in self._recent_frames if frame[0] >= _now() - self.window]
+        return {
+            "frames": self.frames,
+            "frame_time_last_ms": 1000 * self.frame_time_last,
+            "frame_time_mean_ms": 1000 * self.frame_time_total / self.frames if self.frames else 0.0,
+            "frame_time_max_recent_ms": 1000 * max((f[1] for f in recent), default=0.0),
+            "frames_per_s": len(recent) / self.window,
+            "item_paints": self.item_paints,
+            "paints_last_frame": self.paints_last_frame,
+            "update_path_calls": self.update_path_calls,
+            "update_path_per_s": self.sample_rates(),
+            "properties_rebuilds": self.properties_rebuilds,
+            "properties_rebuild_last_ms": 1000 * self.properties_rebuild_last,
+            "properties_rebuild_max_ms": 1000 * self.properties_rebuild_max,
+        }
+
+    # --- Profiling hooks ---
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profile(self):
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profile(self, path=None, sort="cumulative", limit=30):
+        """Stops profiling. Saves the raw stats to path (for snakeviz/pstats) if given; returns a text report."""
+        if self._profiler is None:
+            return ""
+        import io
+        import pstats
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+        return report.getvalue()
+
+    def profile(self, path=None):
+        """Context manager that profiles its body; the report ends up in .report of the returned object."""
+        return _ProfileBlock(self, path)
+
+
+class _ProfileBlock:
+    def __init__(self, monitor, path):
+        self.monitor = monitor
+        self.path = path
+        self.report = ""
+
+    def __enter__(self):
+        self.monitor.start_profile()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.report = self.monitor.stop_profile(self.path)
+
+
+perf = PerfMonitor()
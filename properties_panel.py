@@ -0,0 +1,218 @@
+# --- Properties Panel ---
+# Form that edits the selected node. Imported and built on first use, so it is not
+# part of the editor's startup.
+#
+# The fields of each node type are described by its schema in the node type
+# registry (node_types). The panel builds one NodeForm per node type the first time such a node is selected
+# and keeps it; selecting another node only rebinds the cached form (sets widget
+# values with signals blocked), so no widgets, lambdas or event filters are created
+# per selection.
+from PyQt6.QtWidgets import (
+    QWidget, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, QSpinBox,
+    QFormLayout, QComboBox, QScrollArea, QStackedWidget, QSizePolicy
+)
+from PyQt6.QtCore import Qt, QObject, QEvent
+
+from flow_model import Node
+from node_types import get_node_type
+
+INVALID_STYLE = "border: 1px solid #d04040;"
+
+
+# --- Event Filter for SpinBoxes ---
+class SpinBoxWheelEventFilter(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Wheel and isinstance(obj, QSpinBox):
+            if not obj.hasFocus():
+                event.ignore() # Tell the event system this event should be ignored by this widget
+                return True    # Event handled (ignored), stop further processing by this widget
+        return super().eventFilter(obj, event) # Continue with default event processing
+
+
+# --- Per-type form ---
+class NodeForm(QWidget):
+    """Editor widgets for one node type, built once from its schema and rebound to each selected node."""
+    def __init__(self, panel, node_type, fields, parent=None):
+        super().__init__(parent)
+        self.panel = panel
+        self.main_window = panel.main_window # Edits go through MainWindow so they are journaled
+        self.node_type = node_type
+        self.fields = fields
+        self.data_node = None
+        self._editors = {} # property key -> (PropertyField, widget that holds its value)
+        self._invalid = set() # Keys whose stored value could not be shown (marked until edited or rebound)
+        self._conditional_rows = [] # (PropertyField, row widget) shown only while visible_when holds
+
+        self.form_layout = QFormLayout(self)
+        self.form_layout.setContentsMargins(10, 10, 10, 10)
+        self.form_layout.setSpacing(7)
+
+        self.form_layout.addRow(QLabel(f"<b>Type:</b> {node_type}"))
+        self.id_label = QLabel()
+        self.form_layout.addRow(self.id_label)
+        self.name_edit = QLineEdit()
+        self.name_edit.textChanged.connect(self._name_edited)
+        self.form_layout.addRow("Name:", self.name_edit)
+
+        for field in fields:
+            self._add_field(field)
+
+        self.pos_label = QLabel()
+        self.form_layout.addRow(self.pos_label)
+
+    def _add_field(self, field):
+        if field.kind == "heading":
+            self.form_layout.addRow(QLabel(f"<b>{field.label}</b>"))
+            return
+
+        key = field.key
+        if field.kind == "int":
+            editor = QSpinBox()
+            editor.setFocusPolicy(Qt.FocusPolicy.StrongFocus) # Keep this for keyboard focus behavior
+            editor.installEventFilter(self.panel.spinbox_wheel_filter)
+            editor.setRange(field.minimum, field.maximum)
+            editor.setSuffix(field.suffix)
+            editor.setSpecialValueText(field.special_text)
+            editor.valueChanged.connect(lambda value: self._edited(key, value / field.scale if field.scale != 1 else value))
+            row = editor
+        elif field.kind == "choice":
+            editor = QComboBox()
+            editor.addItems(field.choices)
+            editor.currentIndexChanged.connect(lambda index: self._edited(key, field.choices[index]))
+            row = editor
+        elif field.kind == "image":
+            editor = QLineEdit()
+            editor.setReadOnly(True)
+            browse_button = QPushButton("Browse...")
+            browse_button.clicked.connect(lambda: self.panel.browse_image(self.data_node, editor))
+            row = QWidget()
+            row_layout = QHBoxLayout(row)
+            row_layout.setContentsMargins(0, 0, 0, 0)
+            row_layout.addWidget(editor)
+            row_layout.addWidget(browse_button)
+        else:
+            editor = QLineEdit()
+            editor.textChanged.connect(lambda text: self._edited(key, text))
+            row = editor
+
+        self._editors[key] = (field, editor)
+        self.form_layout.addRow(field.label, row)
+        if field.visible_when:
+            self._conditional_rows.append((field, row))
+
+    def bind(self, data_node: Node):
+        """Shows data_node's values. Widget signals are blocked, so binding is not reported as an edit."""
+        self.data_node = data_node
+        properties = data_node.properties
+        self.id_label.setText(f"<b>ID:</b> {data_node.uid}")
+        self._set_quietly(self.name_edit, self.name_edit.setText, data_node.name)
+        for key, (field, editor) in self._editors.items():
+            value = properties.get(key, field.default)
+            widget_value, valid = field.widget_value(value)
+            if field.kind == "int":
+                self._set_quietly(editor, editor.setValue, widget_value)
+            elif field.kind == "choice":
+                self._set_quietly(editor, editor.setCurrentIndex, max(0, editor.findText(widget_value)))
+            else:
+                self._set_quietly(editor, editor.setText, widget_value)
+            if not valid:
+                self._mark_invalid(key, f"Stored value {value!r} is not valid here; showing the default")
+            elif key in self._invalid:
+                self._mark_invalid(key, None)
+        self.pos_label.setText(f"Pos: ({data_node.x:.0f}, {data_node.y:.0f})")
+        self._update_visibility()
+
+    def _mark_invalid(self, key, message):
+        """Highlights the editor of key with message as its tooltip, or clears that when message is None."""
+        editor = self._editors[key][1]
+        editor.setStyleSheet(INVALID_STYLE if message else "")
+        editor.setToolTip(message or "")
+        if message:
+            self._invalid.add(key)
+        else:
+            self._invalid.discard(key)
+
+    @staticmethod
+    def _set_quietly(widget, setter, value):
+        was_blocked = widget.blockSignals(True)
+        setter(value)
+        widget.blockSignals(was_blocked)
+
+    def _update_visibility(self):
+        properties = self.data_node.properties
+        for field, row in self._conditional_rows:
+            key, value = field.visible_when
+            default = self._editors[key][0].default if key in self._editors else None
+            self.form_layout.setRowVisible(row, properties.get(key, default) == value)
+
+    def _name_edited(self, text):
+        if self.data_node is not None:
+            self.main_window.update_node_name(self.data_node, text)
+
+    def _edited(self, key, value):
+        if self.data_node is None:
+            return
+        self.main_window.update_node_property(self.data_node, key, value)
+        if key in self._invalid: # The stored value has been replaced
+            self._mark_invalid(key, None)
+        if self._conditional_rows:
+            self._update_visibility()
+
+
+# --- Panel ---
+class PropertiesPanel(QScrollArea):
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window # Edits go through MainWindow so they are journaled
+        self.setWidgetResizable(True)
+        self.setMinimumHeight(200)
+        self.setMaximumHeight(400)
+
+        self.spinbox_wheel_filter = SpinBoxWheelEventFilter(self)
+        self.forms = {} # node_type -> NodeForm, built on first selection of that type
+        self.forms_built = 0
+
+        self.stack = QStackedWidget()
+        self.empty_page = QLabel("No node selected.")
+        self.empty_page.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.empty_page.setContentsMargins(10, 10, 10, 10)
+        self.stack.addWidget(self.empty_page)
+        self.setWidget(self.stack)
+
+    def form_for(self, node_type):
+        form = self.forms.get(node_type)
+        if form is None:
+            form = NodeForm(self, node_type, get_node_type(node_type).schema)
+            self.forms[node_type] = form
+            self.forms_built += 1
+            form.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+            self.stack.addWidget(form)
+        return form
+
+    def show_node(self, data_node: Node):
+        if data_node is None:
+            for form in self.forms.values():
+                form.data_node = None # Late edits must not reach a deselected (or deleted) node
+            self._show_page(self.empty_page)
+            return
+        form = self.form_for(data_node.node_type)
+        form.bind(data_node)
+        self._show_page(form)
+
+    def _show_page(self, page):
+        # A stacked widget is as tall as its tallest page; ignoring the hidden pages' size keeps
+        # short forms from getting the scroll bar of a long one
+        current = self.stack.currentWidget()
+        if current is not page:
+            current.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+            page.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
+            self.stack.setCurrentWidget(page)
+
+    def browse_image(self, data_node: Node, path_edit_widget: QLineEdit):
+        if data_node is None:
+            return
+        file_name, _ = QFileDialog.getOpenFileName(self.main_window, "Open Image", "",
+                                                   "Image Files (*.png *.jpg *.bmp)")
+        if file_name:
+            self.main_window.update_node_property(data_node, "image_path", file_name)
+            path_edit_widget.setText(file_name)
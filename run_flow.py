@@ -0,0 +1,103 @@
+# --- Headless Flow Runner ---
+# Command-line entry point for scheduled and server-side runs:
+#
+#   python run_flow.py my_bot.flow [--backend default|stub|screen] [--match-workers N]
+#                                  [--max-steps N] [--stats]
+#
+# Loads a saved flow, compiles it and runs it without importing PyQt6. Only the
+# model, file format and engine modules are imported up front; the screen backend
+# (NumPy matching, screen capture) is imported only when it is selected.
+# --match-workers spreads the screen backend's large searches (e.g. full 4K screens)
+# over a pool of N processes (ParallelImageMatcher). It can also be set with
+# VBB_MATCH_WORKERS. The default of 0 matches in-process.
+#
+# Exit status: 0 flow completed, 1 stopped by --max-steps, 2 flow could not be
+# loaded or is invalid, 3 an action failed while running.
+import argparse
+import os
+import sys
+import time
+
+from flow_engine import ActionBackend, FlowValidationError, StubActionBackend, compile_flow, run_plan
+from flow_io import FlowFormatError, load_flow
+from node_types import load_plugins
+
+
+def make_matcher(match_workers):
+    """Image matcher for the screen backend: in-process, or a pool of match_workers processes."""
+    if match_workers > 0:
+        from parallel_matcher import ParallelImageMatcher
+        return ParallelImageMatcher(processes=match_workers)
+    from image_matcher import ImageMatcher
+    return ImageMatcher()
+
+
+def make_backend(name, match_workers=0):
+    if name == "stub":
+        return StubActionBackend(record_calls=False)
+    if name == "screen":
+        from screen_capture import MssCaptureBackend, ScreenActionBackend, ScreenCapture
+        return ScreenActionBackend(ScreenCapture(MssCaptureBackend()), make_matcher(match_workers))
+    return ActionBackend()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="run-flow", description="Run a saved Visual Bot Builder flow headless.")
+    parser.add_argument("flow", help="flow file (.flow or .flow.gz)")
+    parser.add_argument("--backend", choices=["default", "stub", "screen"], default="default",
+                        help="action backend: default only logs and waits, stub fakes every action, "
+                             "screen matches images on the real screen")
+    parser.add_argument("--match-workers", type=int, default=os.environ.get("VBB_MATCH_WORKERS", "0"),
+                        metavar="N", help="match images for --backend screen in N worker processes "
+                                          "(default 0: in-process, or VBB_MATCH_WORKERS)")
+    parser.add_argument("--max-steps", type=int, default=None, help="stop after this many steps")
+    parser.add_argument("--stats", action="store_true", help="print timings and backend counters to stderr")
+    args = parser.parse_args(argv)
+    if args.match_workers < 0:
+        parser.error("--match-workers must be 0 or more")
+    return args
+
+
+def main(argv=None):
+    started = time.perf_counter()
+    args = parse_args(argv)
+    try:
+        load_plugins() # Node types (and their handlers) from the modules listed in VBB_PLUGINS
+    except ImportError as e:
+        print(f"Error: Could not load plugin: {e}", file=sys.stderr)
+        return 2
+    try:
+        flow = load_flow(args.flow)
+        loaded = time.perf_counter()
+        plan = compile_flow(flow)
+    except (OSError, FlowFormatError) as e:
+        print(f"Error: Could not load {args.flow}: {e}", file=sys.stderr)
+        return 2
+    except FlowValidationError as e:
+        for problem in e.problems:
+            print(f"Error: {problem}", file=sys.stderr)
+        return 2
+    compiled = time.perf_counter()
+
+    backend = None
+    try:
+        backend = make_backend(args.backend, args.match_workers)
+        result = run_plan(plan, backend, args.max_steps)
+    except (NotImplementedError, OSError, ImportError) as e:
+        print(f"Error: Flow stopped: {e}", file=sys.stderr)
+        return 3
+    finally:
+        if backend is not None:
+            backend.close()
+    finished = time.perf_counter()
+
+    if args.stats:
+        print(f"load {1000 * (loaded - started):.1f} ms, compile {1000 * (compiled - loaded):.1f} ms, "
+              f"run {1000 * (finished - compiled):.1f} ms, {result.steps_run} steps", file=sys.stderr)
+        for key, value in result.stats.items():
+            print(f"  {key}: {value}", file=sys.stderr)
+    return 0 if result.completed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
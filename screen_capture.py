@@ -0,0 +1,254 @@
+# --- Screen Capture ---
+# One shared, reusable frame buffer for all Find Image steps of a run.
+#
+# ScreenCapture.frame() returns the latest screenshot, grabbing a new one only when
+# the buffered frame is older than `max_age` seconds (or was invalidated, e.g. after
+# a mouse or keyboard action changed the screen). Back-to-back searches share one
+# frame and nothing is copied. Frames are read-only views of reusable buffers.
+#
+# Searches that can run on several threads at once (flow_async's executor) use
+# pinned(). It yields (generation, frame) read together under the lock and keeps
+# that buffer from being overwritten until the block exits. A grab writes into a
+# buffer nobody has pinned: the current one when it is free, so a single-threaded
+# run still uses one buffer, otherwise another one from a small pool. frame() is
+# for single-threaded callers, and what it returns is only valid until the next
+# grab.
+#
+# Where pixels come from is up to a CaptureBackend: SyntheticScreenBackend serves an
+# in-memory image (tests, benchmarks, headless runs), MssCaptureBackend grabs the real
+# desktop through the optional `mss` package.
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+from flow_engine import ActionBackend
+from image_matcher import ImageMatcher
+from image_poller import ImagePoller
+
+
+# --- Backends ---
+class CaptureBackend:
+    """Source of screen pixels. grab() must fill `out` in place."""
+    channels = 3
+
+    def size(self):
+        """Returns the current screen size as (width, height)."""
+        raise NotImplementedError
+
+    def grab(self, out):
+        """Copies the current screen into out, an (height, width, channels) uint8 array."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SyntheticScreenBackend(CaptureBackend):
+    """An in-memory "screen". Tests change it with set_image() or paste().
+
+    `latency` (seconds) is added to every grab to model a real capture's cost.
+    """
+    def __init__(self, image, latency=0.0):
+        self.image = np.ascontiguousarray(image, dtype=np.uint8)
+        self.channels = self.image.shape[2] if self.image.ndim == 3 else 1
+        self.latency = latency
+        self.grabs = 0
+
+    def set_image(self, image):
+        self.image = np.ascontiguousarray(image, dtype=np.uint8)
+        self.channels = self.image.shape[2] if self.image.ndim == 3 else 1
+
+    def paste(self, x, y, patch):
+        """Draws patch onto the screen with its top-left corner at (x, y)."""
+        h, w = patch.shape[:2]
+        self.image[y:y + h, x:x + w] = patch
+
+    def size(self):
+        return self.image.shape[1], self.image.shape[0]
+
+    def grab(self, out):
+        self.grabs += 1
+        if self.latency:
+            time.sleep(self.latency)
+        np.copyto(out, self.image.reshape(out.shape))
+
+
+class MssCaptureBackend(CaptureBackend):
+    """Grabs a monitor with the `mss` package (imported on first use)."""
+    def __init__(self, monitor=1):
+        try:
+            import mss
+        except ImportError:
+            raise ImportError("Screen capture needs the mss package (pip install mss)") from None
+        self._mss = mss.mss()
+        self.monitor = self._mss.monitors[monitor]
+
+    def size(self):
+        return self.monitor["width"], self.monitor["height"]
+
+    def grab(self, out):
+        shot = self._mss.grab(self.monitor)
+        # mss returns BGRA; reorder into the RGB buffer
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        out[..., 0] = bgra[..., 2]
+        out[..., 1] = bgra[..., 1]
+        out[..., 2] = bgra[..., 0]
+
+    def close(self):
+        self._mss.close()
+
+
+# --- Shared frame buffer ---
+class _FrameBuffer:
+    __slots__ = ("array", "frame", "generation", "pins")
+
+    def __init__(self, shape):
+        self.array = np.empty(shape, dtype=np.uint8)
+        self.frame = self.array.view() # Read-only view handed out to callers
+        self.frame.flags.writeable = False
+        self.generation = 0
+        self.pins = 0 # Readers inside pinned() that are using this buffer
+
+
+class ScreenCapture:
+    """Serves the latest screen frame from a reusable buffer, grabbing only when it is stale."""
+    def __init__(self, backend, max_age=0.1):
+        self.backend = backend
+        self.max_age = max_age # Seconds a frame may be reused for
+        self.generation = 0 # Increases with every grab; lets callers cache work per frame
+        self._buffers = [] # _FrameBuffers of the current screen size
+        self._current = None # The _FrameBuffer holding the latest frame
+        self._grabbed_at = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0 # frame() served the buffered frame
+        self.misses = 0 # frame() had to grab
+        self.age_total = 0.0 # Sum of the ages of served frames
+        self.age_max = 0.0
+
+    def _free_buffer(self, width, height):
+        """A buffer of the screen size that no reader has pinned (the current one if possible)."""
+        if self._current is not None and self._current.array.shape[:2] != (height, width):
+            self._buffers = [] # Screen size changed; pinned old buffers are dropped on release
+        for buffer in ([self._current] if self._current is not None else []) + self._buffers:
+            if buffer.pins == 0 and buffer.array.shape[:2] == (height, width):
+                return buffer
+        buffer = _FrameBuffer((height, width, self.backend.channels))
+        self._buffers.append(buffer)
+        return buffer
+
+    def _latest(self):
+        """Grabs if the frame is stale and returns the current _FrameBuffer. Call with the lock held."""
+        now = time.perf_counter()
+        if self._grabbed_at is None or now - self._grabbed_at > self.max_age:
+            width, height = self.backend.size()
+            buffer = self._free_buffer(width, height)
+            self.backend.grab(buffer.array)
+            self._grabbed_at = now = time.perf_counter()
+            self.generation += 1
+            buffer.generation = self.generation
+            self._current = buffer
+            self.misses += 1
+        else:
+            self.hits += 1
+        age = now - self._grabbed_at
+        self.age_total += age
+        self.age_max = max(self.age_max, age)
+        return self._current
+
+    def frame(self):
+        """Returns the current frame as a read-only (height, width, channels) array, valid until the next grab."""
+        with self._lock:
+            return self._latest().frame
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Yields (generation, frame) of the current frame. The frame is not overwritten until the block exits."""
+        with self._lock:
+            buffer = self._latest()
+            buffer.pins += 1
+        try:
+            yield buffer.generation, buffer.frame
+        finally:
+            with self._lock:
+                buffer.pins -= 1
+
+    def invalidate(self):
+        """Forces the next frame() to grab, e.g. after an action that changed the screen."""
+        with self._lock:
+            self._grabbed_at = None
+
+    def stats(self):
+        served = self.hits + self.misses
+        return {
+            "frames_served": served,
+            "capture_hits": self.hits,
+            "capture_misses": self.misses,
+            "frame_age_mean_s": self.age_total / served if served else 0.0,
+            "frame_age_max_s": self.age_max,
+            "frame_buffers": len(self._buffers),
+        }
+
+    def close(self):
+        self.backend.close()
+        self._buffers = []
+        self._current = None
+
+
+# --- Action backend ---
+class ScreenActionBackend(ActionBackend):
+    """ActionBackend whose Find Image steps match against a shared ScreenCapture.
+
+    Mouse and keyboard actions are passed to `input_backend` (if any) and invalidate the
+    buffered frame, since they usually change what is on screen. Waiting for an image
+    polls through an ImagePoller, which skips matching while the region is unchanged.
+    """
+    def __init__(self, capture, matcher=None, input_backend=None, tile_size=64):
+        self.capture = capture
+        self.matcher = matcher if matcher is not None else ImageMatcher()
+        self.poller = ImagePoller(capture, self.matcher, tile_size)
+        self.input_backend = input_backend
+
+    def find_image(self, image_path, confidence, region):
+        with self.capture.pinned() as (_, frame):
+            match = self.matcher.find(frame, image_path, confidence, region)
+        return match.center if match else None
+
+    def wait_for_image(self, image_path, confidence, region, timeout, poll_interval):
+        match = self.poller.wait_for(image_path, confidence, region, timeout, poll_interval, sleep=self.wait)
+        return match.center if match else None
+
+    def find_window(self, title):
+        if self.input_backend is None:
+            return super().find_window(title)
+        return self.input_backend.find_window(title)
+
+    def mouse_action(self, action, x, y, button):
+        if self.input_backend is None:
+            super().mouse_action(action, x, y, button)
+        else:
+            self.input_backend.mouse_action(action, x, y, button)
+        self.capture.invalidate()
+
+    def keyboard_action(self, text):
+        if self.input_backend is None:
+            super().keyboard_action(text)
+        else:
+            self.input_backend.keyboard_action(text)
+        self.capture.invalidate()
+
+    def run_started(self):
+        self.capture.reset_stats()
+        self.poller.reset_stats()
+
+    def run_stats(self):
+        return {**self.capture.stats(), **self.poller.stats()}
+
+    def close(self):
+        self.capture.close()
+        if hasattr(self.matcher, "close"): # e.g. a ParallelImageMatcher's process pool
+            self.matcher.close()
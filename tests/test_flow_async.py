@@ -0,0 +1,133 @@
+import asyncio
+
+import numpy as np
+
+from flow_async import AsyncActionBackend, ExecutorActionBackend, FlowRun, compile_flow_async
+from flow_model import Connection, Flow, Node
+from image_matcher import ImageMatcher, TemplateCache
+from screen_capture import ScreenActionBackend, ScreenCapture, SyntheticScreenBackend
+
+
+class GateBackend(AsyncActionBackend):
+    """Delay/Wait steps block until `gate` is set; counts how many wait at the same time."""
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.messages = []
+
+    def log(self, message):
+        self.messages.append(message)
+
+    async def wait(self, seconds):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self.gate.wait()
+        finally:
+            self.waiting -= 1
+
+
+def fan_out(branch_types):
+    """Start fanning out to one branch per entry: the node, then a Log Message naming the branch."""
+    flow = Flow()
+    start = Node("Start")
+    flow.add_node(start)
+    for i, node_type in enumerate(branch_types):
+        node = Node(node_type, properties={"duration_ms": 1000})
+        log = Node("Log Message", properties={"message": f"branch {i}"})
+        flow.add_node(node)
+        flow.add_node(log)
+        flow.add_connection(Connection(start.id, "out", node.id, "in"))
+        flow.add_connection(Connection(node.id, "out", log.id, "in"))
+    return compile_flow_async(flow)
+
+
+async def until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.001)):
+        if condition():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("condition not reached")
+
+
+def test_fork_branches_run_concurrently():
+    async def main():
+        backend = GateBackend()
+        run = FlowRun(fan_out(["Delay/Wait"] * 3), backend).start()
+        await until(lambda: backend.waiting == 3) # All three waits are in progress at once
+        backend.gate.set()
+        await run
+        return run, backend
+
+    run, backend = asyncio.run(main())
+    assert run.status == FlowRun.COMPLETED
+    assert backend.max_waiting == 3
+    assert sorted(backend.messages) == ["branch 0", "branch 1", "branch 2"]
+    assert run.branches == 3
+    assert run.steps_run == 7
+
+
+def test_cancelling_run_cancels_every_branch():
+    async def main():
+        backend = GateBackend()
+        run = FlowRun(fan_out(["Delay/Wait"] * 3), backend).start()
+        await until(lambda: backend.waiting == 3)
+        run.cancel()
+        await asyncio.gather(run.task, return_exceptions=True)
+        return run, backend
+
+    run, backend = asyncio.run(main())
+    assert run.status == FlowRun.CANCELLED
+    assert backend.waiting == 0
+    assert backend.messages == []
+
+
+def test_timeout_cancels_every_branch():
+    async def main():
+        backend = GateBackend()
+        run = FlowRun(fan_out(["Delay/Wait"] * 2), backend, timeout=0.05).start()
+        await run
+        return run, backend
+
+    run, backend = asyncio.run(main())
+    assert run.status == FlowRun.TIMED_OUT
+    assert backend.waiting == 0
+
+
+def test_failing_branch_cancels_the_others():
+    async def main():
+        backend = GateBackend() # find_window is not implemented: that branch fails
+        run = FlowRun(fan_out(["Delay/Wait", "Find Window", "Delay/Wait"]), backend).start()
+        await run
+        return run, backend
+
+    run, backend = asyncio.run(main())
+    assert run.status == FlowRun.FAILED
+    assert isinstance(run.error, NotImplementedError)
+    assert backend.waiting == 0
+
+
+def test_executor_backend_waits_through_the_screen_poller(tmp_path):
+    rng = np.random.default_rng(0)
+    screen = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    target = rng.integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    template_path = str(tmp_path / "target.npy")
+    np.save(template_path, target)
+
+    capture_backend = SyntheticScreenBackend(screen)
+    screen_backend = ScreenActionBackend(ScreenCapture(capture_backend, max_age=0.0),
+                                         ImageMatcher(TemplateCache()))
+
+    async def main():
+        backend = ExecutorActionBackend(screen_backend)
+        waiting = asyncio.ensure_future(backend.wait_for_image(template_path, 0.9, None, 5.0, 0.01))
+        await until(lambda: screen_backend.poller.polls >= 3)
+        capture_backend.paste(200, 100, target)
+        return await waiting
+
+    assert asyncio.run(main()) == (200 + 16, 100 + 12)
+    stats = screen_backend.poller.stats()
+    assert stats["image_waits"] == 1 and stats["image_waits_found"] == 1
+    assert stats["polls_skipped"] >= 1 # Unchanged frames were not matched again
+    assert stats["polls_full"] == 1
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from flow_clipboard import FORMAT_NAME, FORMAT_VERSION, ClipboardFormatError, deserialize_subgraph, serialize_subgraph
+from flow_model import Connection, Flow, Node
+
+
+def sample_flow():
+    """Start -> Wait -> Log, plus an Outside node fed by Log."""
+    flow = Flow()
+    start = Node("Start", name="Start", position=(0, 0))
+    wait = Node("Delay/Wait", name="Wait", position=(200, 10), properties={"duration_ms": 250})
+    log = Node("Log Message", name="Log ✓", position=(400, -20.5), properties={"message": "héllo"})
+    outside = Node("End", name="Outside", position=(600, 0))
+    for node in (start, wait, log, outside):
+        flow.add_node(node)
+    flow.add_connection(Connection(start.id, "out", wait.id, "in"))
+    flow.add_connection(Connection(wait.id, "out", log.id, "in"))
+    flow.add_connection(Connection(log.id, "out", outside.id, "in"))
+    return flow, (start, wait, log, outside)
+
+
+def describe(nodes, connections):
+    """Node contents and connections by node name, independent of ids."""
+    names = {node.id: node.name for node in nodes}
+    node_rows = {node.name: (node.node_type, node.x, node.y, node.properties) for node in nodes}
+    connection_rows = {(names[c.from_node_id], c.from_port_name, names[c.to_node_id], c.to_port_name)
+                       for c in connections}
+    return node_rows, connection_rows
+
+
+def test_round_trip_keeps_types_properties_and_connections():
+    flow, (start, wait, log, _) = sample_flow()
+    text = serialize_subgraph(flow, [start.id, wait.id, log.id])
+
+    nodes, connections = deserialize_subgraph(text)
+    node_rows, connection_rows = describe(nodes, connections)
+    assert node_rows == {
+        "Start": ("Start", 0.0, 0.0, {}),
+        "Wait": ("Delay/Wait", 200.0, 10.0, {"duration_ms": 250}),
+        "Log ✓": ("Log Message", 400.0, -20.5, {"message": "héllo"}),
+    }
+    assert connection_rows == {("Start", "out", "Wait", "in"), ("Wait", "out", "Log ✓", "in")}
+
+
+def test_default_properties_are_not_stored_but_restored():
+    flow = Flow()
+    log = Node("Log Message", name="Log")
+    flow.add_node(log)
+    text = serialize_subgraph(flow, [log.id])
+
+    assert json.loads(text)["nodes"][0][4] == {}
+    (pasted,), _ = deserialize_subgraph(text)
+    assert pasted.properties == log.properties
+
+
+def test_connections_leaving_the_selection_are_dropped():
+    flow, (start, wait, log, outside) = sample_flow()
+    text = serialize_subgraph(flow, [wait.id, log.id])
+
+    nodes, connections = deserialize_subgraph(text)
+    assert {node.name for node in nodes} == {"Wait", "Log ✓"}
+    assert describe(nodes, connections)[1] == {("Wait", "out", "Log ✓", "in")}
+
+
+def test_unknown_ids_are_ignored():
+    flow, (start, *_rest) = sample_flow()
+    nodes, connections = deserialize_subgraph(serialize_subgraph(flow, [start.id, 10 ** 9]))
+    assert [node.name for node in nodes] == ["Start"] and connections == []
+
+
+def test_paste_gets_new_ids_and_uids():
+    flow, originals = sample_flow()
+    text = serialize_subgraph(flow, [node.id for node in originals[:3]])
+
+    first_nodes, first_connections = deserialize_subgraph(text)
+    second_nodes, second_connections = deserialize_subgraph(text)
+    old_ids = set(flow.nodes) | set(flow.connections)
+    old_uids = {node.uid for node in originals} | {c.uid for c in flow.connections.values()}
+    pasted = first_nodes + first_connections + second_nodes + second_connections
+    ids = [item.id for item in pasted]
+    uids = [item.uid for item in pasted]
+    assert len(set(ids)) == len(ids) and not old_ids & set(ids)
+    assert len(set(uids)) == len(uids) and not old_uids & set(uids)
+
+    # Connections point at the pasted nodes, and the result adds cleanly to the same flow
+    pasted_ids = {node.id for node in first_nodes}
+    assert all(c.from_node_id in pasted_ids and c.to_node_id in pasted_ids for c in first_connections)
+    flow.add_nodes(first_nodes)
+    for connection in first_connections:
+        flow.add_connection(connection)
+    assert len(flow.nodes) == 7 and len(flow.connections) == 5
+
+
+def test_offset_shifts_positions():
+    flow, (start, wait, *_rest) = sample_flow()
+    text = serialize_subgraph(flow, [start.id, wait.id])
+
+    nodes, _ = deserialize_subgraph(text, offset=(30, -40.5))
+    assert [node.position for node in nodes] == [(30.0, -40.5), (230.0, -30.5)]
+    assert (start.position, wait.position) == ((0.0, 0.0), (200.0, 10.0))
+
+
+def document(**changes):
+    base = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "types": ["Start", "End"],
+            "nodes": [[0, "A", 0, 0, {}], [1, "B", 10, 0, {}]], "conns": [[0, "out", 1, "in"]]}
+    base.update(changes)
+    return json.dumps(base)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "not json",
+    "[1, 2]",
+    "Some text someone copied",
+    json.dumps({"format": "other-app", "nodes": []}),
+    json.dumps({"nodes": [], "conns": []}),
+    document(version=FORMAT_VERSION + 1),
+    document(version="1"),
+    document(types=None),
+    document(nodes=None),
+    document(conns=None),
+    document(nodes=[[0, "A", 0]]),
+    document(nodes=[[5, "A", 0, 0, {}]]),
+    document(nodes=[[-1, "A", 0, 0, {}]]),
+    document(nodes=[[0, "A", "x", 0, {}]]),
+    document(nodes=[[0, "A", 0, 0, []]]),
+    document(conns=[[0, "out", 2, "in"]]),
+    document(conns=[[0, "out", -1, "in"]]),
+    document(conns=[[0, "out", "1", "in"]]),
+    document(conns=[[0, 5, 1, "in"]]),
+])
+def test_rejects_malformed_or_foreign_text(text):
+    with pytest.raises(ClipboardFormatError):
+        deserialize_subgraph(text)
+
+
+def test_valid_document_helper_is_accepted():
+    nodes, connections = deserialize_subgraph(document())
+    assert describe(nodes, connections)[1] == {("A", "out", "B", "in")}
@@ -0,0 +1,148 @@
+import pytest
+
+from flow_engine import FlowValidationError, StubActionBackend, compile_flow, fork_index, run_flow, run_plan, validate_flow
+from flow_model import Connection, Flow, Node
+from node_types import NODE_TYPES
+
+
+def add(flow, node_type, **properties):
+    node = Node(node_type, name=f"{node_type} {len(flow.nodes)}", properties=properties)
+    flow.add_node(node)
+    return node
+
+
+def connect(flow, from_node, port, to_node):
+    flow.add_connection(Connection(from_node.id, port, to_node.id, "in"))
+
+
+def logged(backend):
+    return [call[1] for call in backend.calls if call[0] == "log"]
+
+
+def test_chain_runs_in_order():
+    flow = Flow()
+    start = add(flow, "Start")
+    first = add(flow, "Log Message", message="one")
+    second = add(flow, "Log Message", message="two")
+    end = add(flow, "End")
+    connect(flow, start, "out", first)
+    connect(flow, first, "out", second)
+    connect(flow, second, "out", end)
+
+    backend = StubActionBackend()
+    result = run_flow(flow, backend)
+    assert logged(backend) == ["one", "two"]
+    assert result.steps_run == 4
+    assert result.completed
+    assert result.last_node_id == end.id
+
+
+def test_output_port_with_several_connections_runs_every_branch():
+    # Two hubs, each fanning out to 50 Log Message leaves (like fan_out_flow(103, width=50))
+    flow = Flow()
+    hub = add(flow, "Start")
+    leaves = []
+    for h in range(2):
+        if h:
+            next_hub = add(flow, "Delay/Wait", duration_ms=5)
+            connect(flow, hub, "out", next_hub)
+            hub = next_hub
+        for _ in range(50):
+            leaf = add(flow, "Log Message", message=f"leaf {len(leaves)}")
+            connect(flow, hub, "out", leaf)
+            leaves.append(leaf)
+
+    assert validate_flow(flow) == []
+    plan = compile_flow(flow)
+    assert plan.successors[0][0] < -1 # The Start hub's port is a fork of all 51 connections
+    assert len(plan.forks[fork_index(plan.successors[0][0])]) == 51
+
+    backend = StubActionBackend()
+    result = run_plan(plan, backend)
+    assert sorted(logged(backend)) == sorted(f"leaf {i}" for i in range(100))
+    assert result.steps_run == 102
+    assert result.completed
+
+
+def test_branches_run_in_connection_order_depth_first():
+    flow = Flow()
+    start = add(flow, "Start")
+    a1 = add(flow, "Log Message", message="a1")
+    a2 = add(flow, "Log Message", message="a2")
+    b1 = add(flow, "Log Message", message="b1")
+    connect(flow, start, "out", a1)
+    connect(flow, start, "out", b1)
+    connect(flow, a1, "out", a2)
+
+    backend = StubActionBackend()
+    run_flow(flow, backend)
+    assert logged(backend) == ["a1", "a2", "b1"]
+
+
+def test_each_branch_starts_from_the_find_result_at_the_fork():
+    flow = Flow()
+    start = add(flow, "Start")
+    find = add(flow, "Find Image", image_path="found.png")
+    # Branch 1 searches again (and misses) before branching; branch 2 branches on the first find
+    refind = add(flow, "Find Image", image_path="missing.png")
+    branch_1 = add(flow, "Conditional (If/Else)")
+    branch_2 = add(flow, "Conditional (If/Else)")
+    connect(flow, start, "out", find)
+    connect(flow, find, "out", refind)
+    connect(flow, find, "out", branch_2)
+    connect(flow, refind, "out", branch_1)
+    for branch, label in ((branch_1, "1"), (branch_2, "2")):
+        connect(flow, branch, "true", add(flow, "Log Message", message=f"{label} found"))
+        connect(flow, branch, "false", add(flow, "Log Message", message=f"{label} missing"))
+
+    backend = StubActionBackend(find_results={"found.png": (5, 5)})
+    run_flow(flow, backend)
+    assert logged(backend) == ["1 missing", "2 found"]
+
+
+def test_max_steps_stops_with_branches_left():
+    flow = Flow()
+    start = add(flow, "Start")
+    for i in range(3):
+        connect(flow, start, "out", add(flow, "Log Message", message=str(i)))
+
+    result = run_flow(flow, StubActionBackend(), max_steps=2)
+    assert result.steps_run == 2
+    assert not result.completed
+
+
+def test_validate_flow_reports_problems():
+    flow = Flow()
+    log = add(flow, "Log Message")
+    end = add(flow, "End")
+    flow.add_connection(Connection(log.id, "true", end.id, "in"))
+
+    problems = validate_flow(flow)
+    assert "Flow has no Start node" in problems
+    assert any("no output port 'true'" in problem for problem in problems)
+
+
+def test_validate_flow_reports_unknown_node_types():
+    flow = Flow()
+    start = add(flow, "Start")
+    connect(flow, start, "out", add(flow, "Test Unloaded Plugin Type"))
+
+    assert validate_flow(flow) == ["No handler for node type 'Test Unloaded Plugin Type' (Test Unloaded Plugin Type 1)"]
+    assert "Test Unloaded Plugin Type" not in NODE_TYPES
+
+
+def test_compile_flow_reports_unparsable_numbers():
+    flow = Flow()
+    start = add(flow, "Start")
+    delay = add(flow, "Delay/Wait", duration_ms="abc")
+    find = add(flow, "Find Image", image_path="x.png", wait_timeout_ms="1.5s", confidence=None)
+    connect(flow, start, "out", delay)
+    connect(flow, delay, "out", find)
+
+    assert validate_flow(flow) == []
+    with pytest.raises(FlowValidationError) as raised:
+        compile_flow(flow)
+    assert raised.value.problems == [
+        f"'{delay.name}' has an invalid property: duration_ms must be a whole number, not 'abc'",
+        f"'{find.name}' has an invalid property: confidence must be a number, not None",
+    ]
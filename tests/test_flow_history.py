@@ -0,0 +1,196 @@
+import os
+import subprocess
+import sys
+
+from flow_history import (
+    InsertCommand, MoveCommand, PropertyCommand, RemoveCommand, RenameCommand, UndoStack
+)
+from flow_model import Connection, Flow, Node
+
+
+class FakeEditor:
+    """Applies edits to a plain Flow and records them, like MainWindow does."""
+    def __init__(self, budget_bytes=1 << 30):
+        self.flow = Flow()
+        self.history = UndoStack(budget_bytes)
+
+    def insert_nodes(self, nodes, connections=()):
+        nodes, connections = list(nodes), list(connections)
+        self.flow.add_nodes(nodes)
+        replaced = self.flow.add_connections(connections)
+        self.history.record(InsertCommand(nodes, connections, replaced))
+
+    def delete_nodes(self, node_ids):
+        nodes = [self.flow.nodes[node_id] for node_id in node_ids if node_id in self.flow.nodes]
+        removed = [connection for node in nodes for connection in self.flow.remove_node(node.id)]
+        if nodes:
+            self.history.record(RemoveCommand(nodes, removed))
+
+    def remove_connections(self, connections):
+        removed = [c for c in list(connections) if self.flow.remove_connection(c.id) is not None]
+        if removed:
+            self.history.record(RemoveCommand((), removed))
+
+    def move_nodes(self, moves, mergeable=False):
+        deltas = [(node, node.x, node.y, x, y) for node, x, y in moves if (node.x, node.y) != (x, y)]
+        for node, _, _, x, y in deltas:
+            node.position = (x, y)
+        if deltas:
+            self.history.record(MoveCommand(deltas, mergeable))
+
+    def update_node_name(self, node, name):
+        self.history.record(RenameCommand(node, node.name, name))
+        node.name = name
+
+    def update_node_property(self, node, key, value):
+        self.history.record(PropertyCommand(node, key, node.properties.get(key), value))
+        node.properties[key] = value
+
+    def undo(self):
+        return self.history.undo(self)
+
+    def redo(self):
+        return self.history.redo(self)
+
+
+def state(flow):
+    nodes = {node.id: (node.name, node.position, dict(node.properties)) for node in flow.nodes.values()}
+    connections = sorted((c.from_node_id, c.from_port_name, c.to_node_id, c.to_port_name)
+                         for c in flow.connections.values())
+    return nodes, connections
+
+
+def test_undo_and_redo_round_trip():
+    editor = FakeEditor()
+    start, log, end = Node("Start"), Node("Log Message"), Node("End")
+    states = [state(editor.flow)]
+    editor.insert_nodes([start, log, end], [Connection(start.id, "out", log.id, "in"),
+                                            Connection(log.id, "out", end.id, "in")])
+    states.append(state(editor.flow))
+    editor.update_node_name(log, "Greet")
+    states.append(state(editor.flow))
+    editor.update_node_property(log, "message", "hi")
+    states.append(state(editor.flow))
+    editor.move_nodes([(log, 300, 120), (end, 500, 120)])
+    states.append(state(editor.flow))
+    editor.delete_nodes([log.id])
+    states.append(state(editor.flow))
+    editor.insert_nodes([], [Connection(start.id, "out", end.id, "in")])
+    states.append(state(editor.flow))
+    assert editor.history.stats()["undo_entries"] == len(states) - 1
+
+    for expected in reversed(states[:-1]):
+        editor.undo()
+        assert state(editor.flow) == expected
+    assert editor.undo() is None and not editor.history.can_undo()
+    for expected in states[1:]:
+        editor.redo()
+        assert state(editor.flow) == expected
+    assert editor.redo() is None
+    # Applying commands records nothing
+    assert editor.history.stats()["undo_entries"] == len(states) - 1
+
+
+def test_undo_restores_a_replaced_input_connection():
+    editor = FakeEditor()
+    a, b, target = Node("Start"), Node("Log Message"), Node("End")
+    editor.insert_nodes([a, b, target], [Connection(a.id, "out", target.id, "in")])
+    editor.insert_nodes([], [Connection(b.id, "out", target.id, "in")]) # Replaces a -> target
+    assert editor.flow.connection_to_port(target.id, "in").from_node_id == b.id
+    editor.undo()
+    assert editor.flow.connection_to_port(target.id, "in").from_node_id == a.id
+    editor.redo()
+    assert editor.flow.connection_to_port(target.id, "in").from_node_id == b.id
+    assert len(editor.flow.connections) == 1
+
+
+def test_property_edits_merge_until_closed():
+    editor = FakeEditor()
+    log = Node("Log Message", properties={"message": ""})
+    editor.insert_nodes([log])
+    for text in ("h", "he", "hel"): # Keystrokes
+        editor.update_node_property(log, "message", text)
+    assert editor.history.stats()["undo_entries"] == 2
+    assert editor.history.merged == 2
+
+    editor.update_node_name(log, "Other") # Another target starts a new entry
+    editor.update_node_property(log, "message", "help")
+    assert editor.history.stats()["undo_entries"] == 4
+    editor.history.close() # e.g. the selection changed
+    editor.update_node_property(log, "message", "hello")
+    assert editor.history.stats()["undo_entries"] == 5
+
+    editor.undo()
+    assert log.properties["message"] == "help"
+    editor.undo()
+    editor.undo()
+    assert log.properties["message"] == "hel"
+    editor.undo()
+    assert log.properties["message"] == ""
+
+
+def test_moves_merge_only_when_mergeable_and_of_the_same_nodes():
+    editor = FakeEditor()
+    a, b = Node("Start", position=(0, 0)), Node("End", position=(0, 0))
+    editor.insert_nodes([a, b])
+    for step in range(1, 4):
+        editor.move_nodes([(a, step * 10, 0)], mergeable=True)
+    assert editor.history.stats()["undo_entries"] == 2
+    editor.move_nodes([(a, 40, 0), (b, 40, 40)], mergeable=True) # Different nodes
+    editor.move_nodes([(a, 50, 0), (b, 50, 50)]) # A drag: never merges
+    editor.move_nodes([(a, 60, 0), (b, 60, 60)])
+    assert editor.history.stats()["undo_entries"] == 5
+
+    editor.undo()
+    editor.undo()
+    editor.undo()
+    assert (a.position, b.position) == ((30, 0), (0, 0))
+    editor.undo()
+    assert a.position == (0, 0)
+
+
+def test_new_edit_after_undo_drops_the_redo_entries():
+    editor = FakeEditor()
+    log = Node("Log Message", name="zero")
+    editor.insert_nodes([log])
+    editor.update_node_name(log, "one")
+    editor.history.close()
+    editor.update_node_name(log, "two")
+    editor.undo()
+    editor.undo()
+    assert editor.history.can_redo()
+    editor.update_node_property(log, "message", "new")
+    assert not editor.history.can_redo()
+    assert editor.redo() is None
+    assert log.name == "zero"
+    # The dropped entries no longer count towards the budget
+    assert editor.history.size == sum(command.size for command in editor.history._undo)
+
+
+def test_oldest_entries_are_evicted_over_the_budget():
+    editor = FakeEditor(budget_bytes=4000)
+    log = Node("Log Message")
+    editor.insert_nodes([log])
+    for i in range(20):
+        editor.history.close()
+        editor.update_node_property(log, "message", "x" * 500 + str(i))
+    stats = editor.history.stats()
+    assert stats["size_bytes"] <= 4000
+    assert stats["evicted"] > 0 and stats["undo_entries"] == 21 - stats["evicted"]
+    while editor.undo():
+        pass
+    assert log.properties["message"].endswith(str(stats["evicted"] - 2)) # Oldest kept edit undone
+
+    # The newest entry is kept even when it alone is over the budget
+    editor.update_node_property(log, "message", "y" * 10000)
+    assert editor.history.stats()["undo_entries"] == 1
+    editor.undo()
+    assert log.properties["message"] != "y" * 10000
+
+
+def test_budget_comes_from_the_environment():
+    env = dict(os.environ, VBB_UNDO_BUDGET_MB="0.5")
+    output = subprocess.run([sys.executable, "-c", "import flow_history; print(flow_history.UndoStack().budget_bytes)"],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert int(output) == 512 * 1024
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from flow_io import FORMAT_NAME, FORMAT_VERSION, FlowFormatError, FlowLoader, load_flow, read_header, save_flow
+from flow_model import Connection, Flow, Node
+
+
+def sample_flow():
+    flow = Flow()
+    start = Node("Start", name="Start", position=(0, 0))
+    wait = Node("Delay/Wait", name="Wait", position=(200, 10), properties={"duration_ms": 250})
+    log = Node("Log Message", name="Log ✓", position=(400, -20.5), properties={"message": "héllo"})
+    for node in (start, wait, log):
+        flow.add_node(node)
+    flow.add_connection(Connection(start.id, "out", wait.id, "in"))
+    flow.add_connection(Connection(wait.id, "out", log.id, "in"))
+    return flow
+
+
+def snapshot(flow):
+    """Flow contents keyed by uid, independent of the process-wide integer ids."""
+    nodes = {node.uid: (node.node_type, node.name, node.x, node.y, node.properties) for node in flow.nodes.values()}
+    connections = {(flow.nodes[c.from_node_id].uid, c.from_port_name, flow.nodes[c.to_node_id].uid, c.to_port_name)
+                   for c in flow.connections.values()}
+    return nodes, connections
+
+
+@pytest.mark.parametrize("file_name", ["flow.flow", "flow.flow.gz"])
+def test_round_trip(tmp_path, file_name):
+    flow = sample_flow()
+    path = str(tmp_path / file_name)
+    save_flow(flow, path, header={"journal_seq": 7})
+
+    loaded = load_flow(path)
+    assert snapshot(loaded) == snapshot(flow)
+    assert read_header(path)["journal_seq"] == 7
+    assert not (tmp_path / (file_name + ".tmp")).exists()
+
+
+def test_compressed_file_is_gzip(tmp_path):
+    path = str(tmp_path / "flow.flow.gz")
+    save_flow(sample_flow(), path)
+    with open(path, "rb") as f:
+        assert f.read(2) == b"\x1f\x8b"
+
+
+@pytest.mark.parametrize("file_name", ["flow.flow", "flow.flow.gz"])
+def test_truncated_file(tmp_path, file_name):
+    path = str(tmp_path / file_name)
+    save_flow(sample_flow(), path)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) * 2 // 3])
+
+    with pytest.raises(FlowFormatError):
+        load_flow(path)
+
+
+def test_missing_end_record(tmp_path):
+    path = tmp_path / "flow.flow"
+    save_flow(sample_flow(), str(path))
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    path.write_text("".join(lines[:-1]), encoding="utf-8")
+
+    with pytest.raises(FlowFormatError, match="truncated"):
+        load_flow(str(path))
+
+
+def test_newer_format_version(tmp_path):
+    path = tmp_path / "flow.flow"
+    path.write_text(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION + 1}) + "\n"
+                    + json.dumps({"t": "end", "nodes": 0, "connections": 0}) + "\n", encoding="utf-8")
+
+    with pytest.raises(FlowFormatError, match="newer"):
+        load_flow(str(path))
+
+
+def test_not_a_flow_file(tmp_path):
+    path = tmp_path / "flow.flow"
+    path.write_text('{"format": "something-else"}\n', encoding="utf-8")
+
+    with pytest.raises(FlowFormatError):
+        load_flow(str(path))
+
+
+HEADER = {"format": FORMAT_NAME, "version": FORMAT_VERSION}
+NODE = {"t": "node", "uid": "a", "type": "Log Message", "name": "A", "x": 0.0, "y": 0.0, "props": {}}
+END = {"t": "end", "nodes": 1, "connections": 0}
+
+
+def without(record, key):
+    return {k: v for k, v in record.items() if k != key}
+
+
+@pytest.mark.parametrize("records, line_number, message", [
+    ([dict(HEADER, version="1"), END], 1, "version must be an integer"),
+    ([HEADER, [NODE], END], 2, "expected a JSON object, got list"),
+    ([HEADER, "node", END], 2, "expected a JSON object, got str"),
+    ([HEADER, NODE, 42], 3, "expected a JSON object, got int"),
+    ([HEADER, without(NODE, "type"), END], 2, "node record has no 'type' field"),
+    ([HEADER, without(NODE, "uid"), END], 2, "node record has no 'uid' field"),
+    ([HEADER, dict(NODE, x="left"), END], 2, "invalid node record"),
+    ([HEADER, dict(NODE, props=["message"]), END], 2, "invalid node record"),
+    ([HEADER, NODE, {"t": "conn", "uid": "c", "from": "a", "to": "a", "to_port": "in"}, END], 3,
+     "conn record has no 'from_port' field"),
+    ([HEADER, NODE, {"t": "conn", "uid": "c", "from": "a", "from_port": "out", "to": "b", "to_port": "in"}, END], 3,
+     "refers to unknown node"),
+    ([HEADER, NODE, dict(END, nodes=2)], 3, "expected 2 nodes, read 1"),
+    ([HEADER, NODE, dict(END, connections=1)], 3, "expected 1 connections, read 0"),
+    ([HEADER, NODE, without(END, "connections")], 3, "expected None connections, read 0"),
+])
+def test_malformed_records(tmp_path, records, line_number, message):
+    path = tmp_path / "flow.flow"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    with pytest.raises(FlowFormatError) as raised:
+        load_flow(str(path))
+    assert f"flow.flow:{line_number}: " in str(raised.value)
+    assert message in str(raised.value)
+
+
+def test_load_in_chunks(tmp_path):
+    flow = Flow()
+    previous = None
+    for i in range(10):
+        node = Node("Log Message", name=f"log {i}", position=(i * 100, 0))
+        flow.add_node(node)
+        if previous is not None:
+            flow.add_connection(Connection(previous.id, "out", node.id, "in"))
+        previous = node
+    path = str(tmp_path / "flow.flow")
+    save_flow(flow, path)
+
+    loader = FlowLoader(path)
+    chunks = []
+    while not loader.done:
+        chunks.append(loader.load_chunk(max_records=4))
+    # 10 node records, 9 connection records and the end record, 4 at a time
+    assert [(len(nodes), len(connections)) for nodes, connections in chunks] == [(4, 0), (4, 0), (2, 2), (0, 4), (0, 3)]
+    assert snapshot(loader.flow) == snapshot(flow)
+    assert loader.load_chunk() == ([], [])
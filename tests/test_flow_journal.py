@@ -0,0 +1,105 @@
+import json
+
+from flow_io import load_flow, read_header, save_flow
+from flow_journal import FlowJournal, compact, journal_path
+from flow_model import Connection, Flow, Node
+
+
+def saved_flow(tmp_path, header=None):
+    flow = Flow()
+    start = Node("Start", name="Start", position=(0, 0))
+    log = Node("Log Message", name="Log", position=(200, 0), properties={"message": "saved"})
+    flow.add_node(start)
+    flow.add_node(log)
+    flow.add_connection(Connection(start.id, "out", log.id, "in"))
+    path = str(tmp_path / "flow.flow")
+    save_flow(flow, path, header=header)
+    return path, start, log
+
+
+def write_journal(flow_path, records, torn_tail=""):
+    with open(journal_path(flow_path), "w", encoding="utf-8", newline="\n") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write(torn_tail)
+
+
+def node_by_uid(flow, uid):
+    return next(node for node in flow.nodes.values() if node.uid == uid)
+
+
+def test_compact_ignores_torn_last_line(tmp_path):
+    path, _, log = saved_flow(tmp_path)
+    write_journal(path, [
+        {"seq": 1, "op": "set_prop", "uid": log.uid, "key": "message", "value": "edited"},
+        {"seq": 2, "op": "move", "uid": log.uid, "x": 300.0, "y": 40.0},
+    ], torn_tail='{"seq": 3, "op": "rename", "uid": "%s", "na' % log.uid)
+
+    assert compact(path) == 2
+
+    flow = load_flow(path)
+    node = node_by_uid(flow, log.uid)
+    assert node.properties["message"] == "edited"
+    assert node.position == (300.0, 40.0)
+    assert node.name == "Log"
+    assert read_header(path)["journal_seq"] == 2
+    assert not (tmp_path / "flow.flow.journal").exists()
+
+
+def test_compact_skips_records_already_in_snapshot(tmp_path):
+    # A crash after the snapshot was written but before the journal was deleted:
+    # the snapshot already includes seq 1 and 2
+    path, _, log = saved_flow(tmp_path, header={"journal_seq": 2})
+    write_journal(path, [
+        {"seq": 1, "op": "set_prop", "uid": log.uid, "key": "message", "value": "stale"},
+        {"seq": 2, "op": "rename", "uid": log.uid, "name": "stale"},
+        {"seq": 3, "op": "move", "uid": log.uid, "x": 500.0, "y": 0.0},
+    ])
+
+    assert compact(path) == 1
+
+    node = node_by_uid(load_flow(path), log.uid)
+    assert node.properties["message"] == "saved"
+    assert node.name == "Log"
+    assert node.position == (500.0, 0.0)
+    assert read_header(path)["journal_seq"] == 3
+
+
+def test_journal_continues_after_snapshot_seq(tmp_path):
+    path, _, log = saved_flow(tmp_path, header={"journal_seq": 41})
+    journal = FlowJournal(path, flush_interval=60)
+    journal.node_renamed(log)
+    journal.close(compact_on_stop=False)
+
+    with open(journal_path(path), encoding="utf-8") as f:
+        assert [json.loads(line)["seq"] for line in f] == [42]
+
+
+def test_move_after_undone_remove_is_not_coalesced_into_earlier_move(tmp_path):
+    path, start, log = saved_flow(tmp_path)
+    # A long flush interval keeps every record pending until close(), so they could coalesce
+    journal = FlowJournal(path, flush_interval=60)
+    log.position = (100.0, 100.0)
+    journal.node_moved(log)
+    journal.node_removed(log)
+    journal.node_added(log) # Undo of the delete re-adds the node at (100, 100)
+    log.position = (900.0, 900.0)
+    journal.node_moved(log)
+    journal.close()
+
+    node = node_by_uid(load_flow(path), log.uid)
+    assert node.position == (900.0, 900.0)
+
+
+def test_repeated_edits_coalesce_into_one_record(tmp_path):
+    path, _, log = saved_flow(tmp_path)
+    journal = FlowJournal(path, flush_interval=60)
+    for x in range(10):
+        log.position = (float(x), 0.0)
+        journal.node_moved(log)
+    journal.close(compact_on_stop=False)
+
+    assert journal.records_written == 1
+    with open(journal_path(path), encoding="utf-8") as f:
+        (record,) = [json.loads(line) for line in f]
+    assert record["x"] == 9.0
@@ -0,0 +1,156 @@
+import numpy as np
+
+import flow_layout
+from flow_layout import (
+    COLUMN_GAP, MIN_COLUMN_GAP, _break_cycles, _split_long_edges, layered_layout, layout_flow, layout_region
+)
+from flow_model import Connection, Flow, Node
+from node_types import NODE_HEIGHT, NODE_WIDTH, register_node_type
+
+PITCH = NODE_WIDTH + COLUMN_GAP
+JOIN = "Layout Test Join" # Built-in types have one input port, so every node has one predecessor
+register_node_type(JOIN, inputs=("a", "b"), palette=False)
+
+
+def add(flow, node_type="Log Message", position=(0, 0)):
+    node = Node(node_type, name=f"{node_type} {len(flow.nodes)}", position=position)
+    flow.add_node(node)
+    return node
+
+
+def connect(flow, from_node, to_node, port="out", to_port="in"):
+    flow.add_connection(Connection(from_node.id, port, to_node.id, to_port))
+
+
+def columns(positions, nodes):
+    return [positions[node.id][0] / PITCH for node in nodes]
+
+
+def overlaps(positions):
+    boxes = list(positions.values())
+    return [(a, b) for i, a in enumerate(boxes) for b in boxes[i + 1:]
+            if abs(a[0] - b[0]) < NODE_WIDTH and abs(a[1] - b[1]) < NODE_HEIGHT]
+
+
+def test_layers_follow_the_longest_path():
+    flow = Flow()
+    start, a, b, end = add(flow, "Start"), add(flow), add(flow, JOIN), add(flow, "End")
+    connect(flow, start, a)
+    connect(flow, a, b, to_port="a")
+    connect(flow, start, b, to_port="b") # Shortcut: b still goes after a
+    connect(flow, b, end)
+    positions = layered_layout(flow)
+    assert columns(positions, (start, a, b, end)) == [0, 1, 2, 3]
+    assert min(y for _, y in positions.values()) == 0
+
+
+def test_conditional_outputs_keep_port_order():
+    flow = Flow()
+    branch = add(flow, "Conditional (If/Else)")
+    on_false, on_true = add(flow), add(flow)
+    connect(flow, branch, on_false, "false") # Connected first, still placed below "true"
+    connect(flow, branch, on_true, "true")
+    positions = layered_layout(flow)
+    assert positions[on_true.id][1] < positions[on_false.id][1]
+    assert not overlaps(positions)
+
+
+def test_cycles_are_broken_by_reversing_back_edges():
+    src, dst = np.array([0, 1, 2, 2]), np.array([1, 2, 0, 3])
+    new_src, new_dst, visit_order = _break_cycles(4, src, dst, np.zeros(4, dtype=np.int64))
+    assert list(zip(new_src.tolist(), new_dst.tolist())) == [(0, 1), (1, 2), (0, 2), (2, 3)]
+    assert sorted(visit_order) == [0, 1, 2, 3]
+
+    flow = Flow()
+    start, a, b, c = add(flow, "Start"), add(flow, JOIN), add(flow), add(flow)
+    connect(flow, start, a, to_port="a")
+    connect(flow, a, b)
+    connect(flow, b, c)
+    connect(flow, c, a, to_port="b") # Loop back
+    assert columns(layered_layout(flow), (start, a, b, c)) == [0, 1, 2, 3]
+
+
+def test_long_edges_get_one_dummy_per_layer_crossed(monkeypatch):
+    layer = np.array([0, 1, 2, 3])
+    count, src, dst, new_layer = _split_long_edges(4, np.array([0, 1, 2, 0]), np.array([1, 2, 3, 3]), layer)
+    assert count == 6
+    assert new_layer.tolist() == [0, 1, 2, 3, 1, 2]
+    assert sorted(zip(src.tolist(), dst.tolist())) == [(0, 1), (0, 4), (1, 2), (2, 3), (4, 5), (5, 3)]
+
+    # The dummies keep the long edge's rows free: nothing overlaps
+    flow = Flow()
+    chain = [add(flow, "Start"), add(flow), add(flow), add(flow, JOIN)]
+    for from_node, to_node in zip(chain, chain[1:]):
+        connect(flow, from_node, to_node, to_port="a" if to_node is chain[3] else "in")
+    side = add(flow) # Sits in column 1, next to the long edge's first dummy
+    connect(flow, chain[0], side)
+    connect(flow, chain[0], chain[3], to_port="b") # Long edge over columns 1 and 2
+    node_counts = []
+    split = flow_layout._split_long_edges
+
+    def counting_split(*args):
+        result = split(*args)
+        node_counts.append(result[0])
+        return result
+
+    monkeypatch.setattr(flow_layout, "_split_long_edges", counting_split)
+    positions = layered_layout(flow)
+    assert node_counts == [len(flow.nodes) + 2]
+    assert columns(positions, chain + [side]) == [0, 1, 2, 3, 1]
+    assert not overlaps(positions)
+
+
+def test_layout_flow_keeps_the_top_left_corner():
+    flow = Flow()
+    start, end = add(flow, "Start", (300, 500)), add(flow, "End", (900, 200))
+    connect(flow, start, end)
+    assert layout_flow(flow) == {start.id: (300, 200), end.id: (300 + PITCH, 200)}
+
+
+class NoFullScan(dict):
+    """flow.connections that fails if the layout walks every connection of the flow."""
+    def values(self):
+        raise AssertionError("layout_region scanned every connection")
+
+    items = __iter__ = values
+
+
+def laid_out_chain(length):
+    flow = Flow()
+    nodes = [add(flow, "Start")] + [add(flow) for _ in range(length - 1)]
+    for from_node, to_node in zip(nodes, nodes[1:]):
+        connect(flow, from_node, to_node)
+    for node_id, position in layout_flow(flow).items():
+        flow.nodes[node_id].position = position
+    return flow, nodes
+
+
+def test_layout_region_only_reads_the_region():
+    flow, nodes = laid_out_chain(200)
+    flow.connections = NoFullScan(flow.connections)
+    positions = layout_region(flow, [nodes[100].id])
+    assert set(positions) == {node.id for node in nodes[98:103]}
+
+
+def test_layout_region_keeps_its_area():
+    flow, nodes = laid_out_chain(20)
+    middle = nodes[8:13]
+    # Squeeze the region's nodes together and shift them down: they stay within their box
+    for i, node in enumerate(middle):
+        node.position = (8 * PITCH + i * 10, 400 + 20 * i)
+    right = max(node.x for node in middle) + NODE_WIDTH
+    positions = layout_region(flow, [nodes[10].id])
+    xs = sorted(x for x, _ in positions.values())
+    assert xs[0] == 8 * PITCH
+    assert min(y for _, y in positions.values()) == 400
+    # Too narrow for the usual gap: columns are as close as MIN_COLUMN_GAP allows, left to right
+    assert np.allclose(np.diff(xs), NODE_WIDTH + MIN_COLUMN_GAP)
+    assert xs[-1] + NODE_WIDTH > right
+
+    # Enough room: the usual spacing, and the box's right edge is not crossed
+    for i, node in enumerate(middle):
+        node.position = (8 * PITCH + i * PITCH * 2, 400)
+    positions = layout_region(flow, [nodes[10].id])
+    xs = sorted(x for x, _ in positions.values())
+    assert np.allclose(np.diff(xs), PITCH)
+    assert xs[0] == 8 * PITCH
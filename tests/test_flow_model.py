@@ -0,0 +1,223 @@
+import random
+
+import pytest
+
+from flow_io import load_flow, save_flow
+from flow_model import Connection, Flow, Node
+from node_types import register_node_type
+
+JOIN = "Model Test Join"
+register_node_type(JOIN, inputs=("a", "b"), palette=False)
+
+
+def add(flow, node_type="Log Message"):
+    node = Node(node_type, name=f"n{len(flow.nodes)}")
+    flow.add_node(node)
+    return node
+
+
+# --- Compact objects ---
+@pytest.mark.parametrize("make", [lambda: Node("Log Message"), lambda: Connection(1, "out", 2, "in")])
+def test_objects_use_slots(make):
+    item = make()
+    assert not hasattr(item, "__dict__")
+    with pytest.raises(AttributeError):
+        item.extra = 1
+
+
+def test_integer_ids_and_lazy_uids():
+    node = Node("Log Message")
+    other = Node("Log Message")
+    connection = Connection(node.id, "out", other.id, "in")
+    assert all(isinstance(item.id, int) for item in (node, other, connection))
+    assert len({node.id, other.id, connection.id}) == 3
+
+    assert node._uid is None and connection._uid is None # No uid until something asks for one
+    uid = node.uid
+    assert isinstance(uid, str) and len(uid) == 32
+    assert node.uid == uid and node._uid == uid
+    assert connection.uid != uid and Node("Log Message", uid="given").uid == "given"
+
+
+def test_node_fields():
+    node = Node("Delay/Wait", name="Wait", position=(1, 2.5), properties={"extra": True})
+    assert (node.x, node.y) == (1.0, 2.5) and isinstance(node.x, float)
+    assert node.properties == {"extra": True, "duration_ms": 1000}
+    node.position = (3, 4)
+    assert node.position == (3.0, 4.0)
+    assert node.node_type is Node("".join(["Delay/", "Wait"])).node_type # Interned
+
+
+def test_flow_connections_is_a_dict_by_id():
+    flow = Flow()
+    a, b, c = add(flow), add(flow), add(flow)
+    connections = [Connection(a.id, "out", b.id, "in"), Connection(b.id, "out", c.id, "in")]
+    flow.add_connections(connections)
+
+    assert isinstance(flow.connections, dict)
+    assert flow.connections == {connection.id: connection for connection in connections}
+    assert list(flow.connections) == [connection.id for connection in connections] # Insertion ordered
+    assert flow.get_connection(connections[1].id) is connections[1]
+    assert flow.get_connection(-1) is None
+
+
+def test_node_for_uid_tracks_adds_and_removes():
+    flow = Flow()
+    a = add(flow)
+    assert flow.node_for_uid(a.uid) is a
+    b = add(flow)
+    assert flow.node_for_uid(b.uid) is b
+    flow.remove_node(a.id)
+    assert flow.node_for_uid(a.uid) is None
+
+
+# --- Adjacency indexes ---
+def as_sets(index):
+    return {key: set(edges) for key, edges in index.items()}
+
+
+def check_indexes(flow):
+    """Asserts the adjacency indexes match a rebuild from flow.connections."""
+    outgoing, incoming, input_ports = {}, {}, {}
+    for connection in flow.connections.values():
+        assert connection.from_node_id in flow.nodes and connection.to_node_id in flow.nodes
+        outgoing.setdefault(connection.from_node_id, []).append(connection)
+        incoming.setdefault(connection.to_node_id, []).append(connection)
+        port_key = (connection.to_node_id, connection.to_port_name)
+        assert port_key not in input_ports, "two connections feed one input port"
+        input_ports[port_key] = connection
+
+    assert as_sets(flow._outgoing) == as_sets(outgoing)
+    assert as_sets(flow._incoming) == as_sets(incoming)
+    assert all(len(edges) == len(set(edges)) for edges in (*flow._outgoing.values(), *flow._incoming.values()))
+    assert flow._input_ports == input_ports
+
+
+def test_add_connection_indexes_both_ends():
+    flow = Flow()
+    a, b = add(flow), add(flow)
+    connection = Connection(a.id, "out", b.id, "in")
+    assert flow.add_connection(connection) is None
+
+    check_indexes(flow)
+    assert list(flow.outgoing_connections(a.id)) == [connection]
+    assert list(flow.incoming_connections(b.id)) == [connection]
+    assert flow.connection_to_port(b.id, "in") is connection
+    assert flow.find_connection(a.id, "out", b.id, "in") is connection
+    assert flow.find_connection(b.id, "out", b.id, "in") is None
+    assert flow.outgoing_connections(b.id) == () and flow.incoming_connections(a.id) == ()
+
+
+def test_add_connection_replaces_occupied_input_port():
+    flow = Flow()
+    a, b, target = add(flow), add(flow), add(flow)
+    first = Connection(a.id, "out", target.id, "in")
+    second = Connection(b.id, "out", target.id, "in")
+    flow.add_connection(first)
+
+    assert flow.add_connection(second) is first
+    check_indexes(flow)
+    assert list(flow.connections) == [second.id]
+    assert a.id not in flow._outgoing # Emptied per-node lists are dropped
+    assert flow.connection_to_port(target.id, "in") is second
+
+
+def test_inputs_of_one_node_are_independent():
+    flow = Flow()
+    a, b, join = add(flow), add(flow), add(flow, JOIN)
+    flow.add_connection(Connection(a.id, "out", join.id, "a"))
+    flow.add_connection(Connection(b.id, "out", join.id, "b"))
+
+    check_indexes(flow)
+    assert len(flow.incoming_connections(join.id)) == 2
+
+
+def test_add_connections_returns_replaced_connections_already_in_flow():
+    flow = Flow()
+    a, b, c, target = add(flow), add(flow), add(flow), add(flow)
+    existing = Connection(a.id, "out", target.id, "in")
+    flow.add_connection(existing)
+    batch = [Connection(b.id, "out", target.id, "in"), Connection(c.id, "out", target.id, "in")]
+
+    assert flow.add_connections(batch) == [existing]
+    check_indexes(flow)
+    assert list(flow.connections.values()) == [batch[1]]
+
+
+def test_remove_connection():
+    flow = Flow()
+    a, b, c = add(flow), add(flow), add(flow)
+    ab = Connection(a.id, "out", b.id, "in")
+    ac = Connection(a.id, "out", c.id, "in")
+    flow.add_connections([ab, ac])
+
+    assert flow.remove_connection(ab.id) is ab
+    check_indexes(flow)
+    assert list(flow.outgoing_connections(a.id)) == [ac]
+    assert flow.connection_to_port(b.id, "in") is None
+    assert flow.remove_connection(ab.id) is None
+    check_indexes(flow)
+
+
+def test_remove_node_removes_attached_connections():
+    flow = Flow()
+    a, hub, b, c = add(flow), add(flow), add(flow), add(flow)
+    connections = [Connection(a.id, "out", hub.id, "in"), Connection(hub.id, "out", b.id, "in"),
+                   Connection(hub.id, "out", c.id, "in"), Connection(b.id, "out", c.id, "in")]
+    flow.add_connections(connections)
+
+    removed = flow.remove_node(hub.id)
+    assert set(removed) == set(connections[:2]) # hub -> c was already replaced by b -> c
+    check_indexes(flow)
+    assert hub.id not in flow.nodes
+    assert hub.id not in flow._outgoing and hub.id not in flow._incoming
+    assert list(flow.connections.values()) == [connections[3]]
+
+
+def test_remove_node_with_self_loop():
+    flow = Flow()
+    node = add(flow)
+    loop = Connection(node.id, "out", node.id, "in")
+    flow.add_connection(loop)
+    assert list(flow.connections_for_node(node.id)) == [loop]
+
+    assert flow.remove_node(node.id) == [loop]
+    check_indexes(flow)
+    assert flow.connections == {}
+
+
+def test_indexes_survive_random_edits():
+    rng = random.Random(5)
+    flow = Flow()
+    nodes = [add(flow, JOIN if i % 3 == 0 else "Log Message") for i in range(30)]
+    for _ in range(2000):
+        choice = rng.random()
+        if choice < 0.6:
+            target = rng.choice(nodes)
+            port = rng.choice(target.input_ports)["name"]
+            flow.add_connection(Connection(rng.choice(nodes).id, "out", target.id, port))
+        elif choice < 0.9 and flow.connections:
+            flow.remove_connection(rng.choice(list(flow.connections)))
+        else:
+            node = nodes.pop(rng.randrange(len(nodes)))
+            flow.remove_node(node.id)
+            nodes.append(add(flow, node.node_type))
+        check_indexes(flow)
+
+
+@pytest.mark.parametrize("file_name", ["flow.flow", "flow.flow.gz"])
+def test_indexes_after_reload(tmp_path, file_name):
+    flow = Flow()
+    a, b, join = add(flow), add(flow), add(flow, JOIN)
+    flow.add_connections([Connection(a.id, "out", b.id, "in"), Connection(a.id, "out", join.id, "a"),
+                          Connection(b.id, "out", join.id, "b"), Connection(join.id, "out", a.id, "in")])
+    path = str(tmp_path / file_name)
+    save_flow(flow, path)
+
+    loaded = load_flow(path)
+    check_indexes(loaded)
+    by_uid = {node.uid: node.id for node in loaded.nodes.values()}
+    loaded_join = by_uid[join.uid]
+    assert {c.to_port_name for c in loaded.incoming_connections(loaded_join)} == {"a", "b"}
+    assert len(loaded.outgoing_connections(by_uid[a.uid])) == 2
+    assert loaded.node_for_uid(b.uid).name == b.name
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from image_matcher import ImageMatcher, Template, TemplateCache, score_map
+
+
+def textured(rng, height, width):
+    """Smooth random texture (random noise averaged over 4x4 blocks), like UI content."""
+    noise = rng.integers(0, 256, (height // 4 + 1, width // 4 + 1, 3)).astype(np.float32)
+    return np.repeat(np.repeat(noise, 4, axis=0), 4, axis=1)[:height, :width].astype(np.uint8)
+
+
+@pytest.fixture
+def screen_and_target():
+    rng = np.random.default_rng(3)
+    screen = textured(rng, 480, 640)
+    target = textured(rng, 48, 64)
+    screen[301:349, 117:181] = target # Odd offsets: not aligned to any pyramid level
+    return screen, target
+
+
+def test_score_map_peaks_at_the_template():
+    rng = np.random.default_rng(1)
+    image = rng.random((60, 80), dtype=np.float32)
+    template = Template(image[20:36, 30:50].copy(), max_levels=1)
+    scores = score_map(image, template.levels[0], template.norms[0], template.means[0])
+    assert scores.shape == (60 - 16 + 1, 80 - 20 + 1)
+    assert np.unravel_index(np.argmax(scores), scores.shape) == (20, 30)
+    assert scores[20, 30] == pytest.approx(1.0, abs=1e-4)
+
+
+def test_finds_template_through_the_pyramid(screen_and_target):
+    screen, target = screen_and_target
+    matcher = ImageMatcher()
+    template = Template(target)
+    assert len(template.levels) > 1 # Coarse-to-fine search, not a single full-resolution pass
+
+    match = matcher.find_template(screen, template, confidence=0.95)
+    assert (match.x, match.y, match.width, match.height) == (117, 301, 64, 48)
+    assert match.score == pytest.approx(1.0, abs=1e-3)
+    assert match.center == (117 + 32, 301 + 24)
+
+
+def test_finds_template_inside_region(screen_and_target):
+    screen, target = screen_and_target
+    match = ImageMatcher().find_template(screen, Template(target), 0.95, region=(100, 280, 120, 100))
+    assert (match.x, match.y) == (117, 301)
+    # A region that does not contain the target
+    assert ImageMatcher().find_template(screen, Template(target), 0.95, region=(300, 0, 300, 200)) is None
+
+
+def test_brightness_change_still_matches(screen_and_target):
+    screen, target = screen_and_target
+    dimmed = (screen.astype(np.float32) * 0.6 + 20).astype(np.uint8)
+    match = ImageMatcher().find_template(dimmed, Template(target), 0.95)
+    assert (match.x, match.y) == (117, 301)
+
+
+def test_below_threshold_is_a_miss(screen_and_target):
+    screen, target = screen_and_target
+    rng = np.random.default_rng(9)
+    noisy = np.clip(screen.astype(np.int16) + rng.integers(-90, 90, screen.shape), 0, 255).astype(np.uint8)
+    matcher = ImageMatcher()
+    # Heavy noise: the target is still the best position, but it no longer scores 0.99
+    assert matcher.find_template(noisy, Template(target), confidence=0.99) is None
+    match = matcher.find_template(noisy, Template(target), confidence=0.5)
+    assert (match.x, match.y) == (117, 301)
+    assert match.score < 0.99
+
+
+def test_absent_template_is_a_miss(screen_and_target):
+    screen, _ = screen_and_target
+    other = textured(np.random.default_rng(11), 48, 64)
+    matcher = ImageMatcher()
+    assert matcher.find_template(screen, Template(other), confidence=0.8) is None
+    assert matcher.early_rejects == 1
+
+
+def test_template_cache_hits_and_evicts_least_recently_used(tmp_path):
+    rng = np.random.default_rng(4)
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"t{i}.npy")
+        np.save(path, textured(rng, 24, 24))
+        paths.append(path)
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return np.load(path)
+
+    cache = TemplateCache(max_entries=2, loader=loader)
+    first = cache.get(paths[0])
+    assert cache.get(paths[0]) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.get(paths[1])
+    cache.get(paths[0]) # paths[0] is now the most recently used
+    cache.get(paths[2]) # Evicts paths[1]
+    assert len(cache) == 2
+    cache.get(paths[0])
+    assert cache.hits == 3
+    cache.get(paths[1])
+    assert loads == [paths[0], paths[1], paths[2], paths[1]]
+
+
+def test_matcher_find_uses_the_cache(tmp_path, screen_and_target):
+    screen, target = screen_and_target
+    path = str(tmp_path / "target.npy")
+    np.save(path, target)
+    matcher = ImageMatcher()
+    for _ in range(3):
+        assert matcher.find(screen, path, 0.95).center == (149, 325)
+    assert (matcher.cache.hits, matcher.cache.misses) == (2, 1)
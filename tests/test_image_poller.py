@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from image_matcher import ImageMatcher
+from image_poller import ImagePoller, TileDiff, dirty_boxes
+from screen_capture import ScreenActionBackend, ScreenCapture, SyntheticScreenBackend
+
+
+@pytest.fixture
+def setup(tmp_path):
+    rng = np.random.default_rng(2)
+    screen = rng.integers(0, 256, (256, 384, 3), dtype=np.uint8)
+    target = rng.integers(0, 256, (32, 48, 3), dtype=np.uint8)
+    path = str(tmp_path / "target.npy")
+    np.save(path, target)
+    backend = SyntheticScreenBackend(screen)
+    matcher = ImageMatcher()
+    poller = ImagePoller(ScreenCapture(backend, max_age=0.0), matcher, tile_size=32)
+    return backend, matcher, poller, target, path
+
+
+class Script:
+    """Replaces sleeping between polls: runs the screen edit planned for each pause."""
+    def __init__(self, edits):
+        self.edits = edits
+        self.pauses = 0
+
+    def sleep(self, _seconds):
+        edit = self.edits.get(self.pauses)
+        if edit:
+            edit()
+        self.pauses += 1
+
+
+def test_tile_diff_reports_changed_tiles():
+    diff = TileDiff(tile_size=16)
+    region = np.zeros((64, 96, 3), dtype=np.uint8)
+    assert diff.changed_tiles(region) is None # Nothing to compare with yet
+    assert not diff.changed_tiles(region).any()
+
+    region[20, 70] = 1
+    dirty = diff.changed_tiles(region)
+    assert dirty.shape == (4, 6)
+    assert list(zip(*np.nonzero(dirty))) == [(1, 4)]
+    assert not diff.changed_tiles(region).any() # The change is now the reference
+
+
+def test_dirty_boxes_groups_neighbouring_tiles():
+    dirty = np.zeros((4, 6), dtype=bool)
+    dirty[0, 0] = dirty[0, 1] = dirty[1, 1] = True
+    dirty[3, 5] = True
+    assert sorted(dirty_boxes(dirty, 10)) == [(0, 0, 20, 20), (50, 30, 60, 40)]
+
+
+def test_unchanged_screen_is_not_matched_again(setup):
+    backend, matcher, poller, target, path = setup
+    script = Script({5: lambda: backend.paste(300, 200, target)})
+
+    match = poller.wait_for(path, 0.9, None, timeout=60.0, poll_interval=0.01, sleep=script.sleep)
+
+    assert (match.x, match.y) == (300, 200)
+    stats = poller.stats()
+    assert stats["polls"] == 7
+    assert stats["polls_full"] == 1 # Only the first poll matched the whole screen
+    assert stats["polls_skipped"] == 5 # Nothing changed on these polls: no matching at all
+    assert stats["polls_partial"] == 1 # The target's tiles were re-matched
+    assert matcher.searches < 1 + 1 + 4 # Only around the changed tiles, not the whole screen again
+
+
+def test_changes_away_from_the_target_only_rematch_their_tiles(setup):
+    backend, matcher, poller, target, path = setup
+    noise = np.random.default_rng(8).integers(0, 256, (10, 10, 3), dtype=np.uint8)
+    script = Script({1: lambda: backend.paste(5, 5, noise), 3: lambda: backend.paste(64, 96, target)})
+
+    match = poller.wait_for(path, 0.9, None, timeout=60.0, poll_interval=0.01, sleep=script.sleep)
+
+    assert (match.x, match.y) == (64, 96)
+    stats = poller.stats()
+    assert (stats["polls_full"], stats["polls_partial"], stats["polls_skipped"]) == (1, 2, 2)
+
+
+def test_timeout_returns_none(setup):
+    _, _, poller, _, path = setup
+    assert poller.wait_for(path, 0.9, None, timeout=0.05, poll_interval=0.01) is None
+    stats = poller.stats()
+    assert stats["image_waits_timed_out"] == 1
+    assert stats["polls_full"] == 1
+    assert stats["polls_skipped"] == stats["polls"] - 1
+
+
+def test_screen_backend_wait_for_image_uses_the_poller(setup):
+    backend, matcher, poller, target, path = setup
+    actions = ScreenActionBackend(poller.capture, matcher, tile_size=32)
+    backend.paste(100, 40, target)
+    assert actions.wait_for_image(path, 0.9, None, 1.0, 0.01) == (100 + 24, 40 + 16)
+    assert actions.run_stats()["image_waits_found"] == 1
+
+
+@pytest.mark.parametrize("region", [
+    (10000, 0, 100, 100), # Entirely off-screen
+    (0, 10000, 100, 100),
+    (370, 240, 100, 100), # Clipped to 14x16, smaller than the template
+    (0, 0, 20, 20), # Undersized
+])
+def test_region_that_cannot_hold_the_template_is_a_miss(setup, region):
+    backend, matcher, poller, target, path = setup
+    backend.paste(0, 0, target)
+    script = Script({2: lambda: backend.paste(300, 200, target)})
+    assert poller.wait_for(path, 0.9, region, timeout=0.05, poll_interval=0.01, sleep=script.sleep) is None
+    assert script.pauses >= 3
+    assert poller.stats()["polls_skipped"] == poller.stats()["polls"]
+    assert matcher.searches == 0
+
+
+def test_region_partly_off_screen_is_clipped(setup):
+    backend, matcher, poller, target, path = setup
+    script = Script({2: lambda: backend.paste(330, 220, target)})
+    match = poller.wait_for(path, 0.9, (300, 200, 500, 500), timeout=60.0, poll_interval=0.01, sleep=script.sleep)
+    assert (match.x, match.y) == (330, 220)
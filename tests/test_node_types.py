@@ -0,0 +1,156 @@
+import math
+import sys
+
+import pytest
+
+import node_types
+from node_types import NODE_HANDLERS, NODE_TYPES, PORT_RADIUS, PropertyField, get_node_type, load_plugins, \
+    palette_types, register_node_type
+
+
+@pytest.fixture
+def registry():
+    """Restores the node type registry after the test."""
+    saved = dict(NODE_TYPES), dict(NODE_HANDLERS), dict(node_types._UNKNOWN_TYPES)
+    yield
+    for current, old in zip((NODE_TYPES, NODE_HANDLERS, node_types._UNKNOWN_TYPES), saved):
+        current.clear()
+        current.update(old)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.57, (57, True)),
+    ("0.9", (90, True)),
+    (1, (100, True)),
+    ("abc", (80, False)),
+    (None, (80, False)),
+    ([1], (80, False)),
+    (math.inf, (80, False)),
+])
+def test_number_field_widget_value(value, expected):
+    field = PropertyField("confidence", "Confidence:", "int", 0.8, 0, 100, " %", scale=100)
+    assert field.widget_value(value) == expected
+
+
+def test_text_field_widget_value_is_a_string():
+    field = PropertyField("message", "Message:", default="hello")
+    assert field.widget_value("hi") == ("hi", True)
+    assert field.widget_value(123) == ("123", True)
+    assert field.widget_value(None) == ("", True)
+
+
+def test_choice_field_widget_value():
+    field = PropertyField("search_mode", "Search Mode:", "choice", "FullScreen", choices=("FullScreen", "Rectangle"))
+    assert field.widget_value("Rectangle") == ("Rectangle", True)
+    assert field.widget_value("Circle") == ("FullScreen", False)
+    assert field.widget_value(3) == ("FullScreen", False)
+
+
+# --- Registry ---
+def test_register_node_type(registry):
+    def handler(node):
+        return None
+
+    fields = (PropertyField("folder", "Folder:", default="shots"), PropertyField(None, "Advanced:", "heading"))
+    node_type = register_node_type("Test Screenshot", inputs=("in", "again"), outputs=(), schema=fields,
+                                   defaults={"extra": 1}, handler=handler)
+    assert get_node_type("Test Screenshot") is node_type
+    assert node_type.defaults == {"folder": "shots", "extra": 1}
+    assert node_type.input_names == {"in", "again"} and node_type.output_index == {}
+    assert node_type.handler is handler
+    assert node_type in palette_types()
+
+    hidden = register_node_type("Test Screenshot", palette=False)
+    assert get_node_type("Test Screenshot") is hidden
+    assert hidden not in palette_types()
+
+
+def test_unknown_type_is_not_registered(registry):
+    node_type = get_node_type("Test Missing Plugin")
+    assert node_type.input_names == {"in"} and list(node_type.output_index) == ["out"]
+    assert get_node_type("Test Missing Plugin") is node_type
+    assert "Test Missing Plugin" not in NODE_TYPES
+    assert node_type not in palette_types() and node_type.handler is None
+
+    # Loading the plugin later replaces the fallback
+    registered = register_node_type("Test Missing Plugin", outputs=("done",))
+    assert get_node_type("Test Missing Plugin") is registered
+
+
+def test_action_types_have_schema_fields_for_their_handler_properties():
+    keys = {name: [field.key for field in get_node_type(name).schema]
+            for name in ("Find Window", "Mouse Action", "Keyboard Action")}
+    assert keys == {"Find Window": ["window_title"], "Mouse Action": ["action", "x", "y", "button"],
+                    "Keyboard Action": ["text"]}
+    assert get_node_type("Mouse Action").defaults == {"action": "click", "x": 0, "y": 0, "button": "left"}
+
+
+# --- Port geometry ---
+def test_port_offsets_spread_ports_along_the_edges(registry):
+    node_type = register_node_type("Test Ports", inputs=("a", "b", "c"), outputs=("out",), width=100, height=120)
+    assert node_type.port_offsets == {
+        ("input", "a"): (0.0, 30.0), ("input", "b"): (0.0, 60.0), ("input", "c"): (0.0, 90.0),
+        ("output", "out"): (100.0, 60.0),
+    }
+    rects = {port["name"]: rect for port, rect in node_type.port_rects}
+    assert rects["b"] == (-PORT_RADIUS, 60.0 - PORT_RADIUS, 2 * PORT_RADIUS, 2 * PORT_RADIUS)
+    assert list(rects) == ["a", "b", "c", "out"]
+
+
+def test_port_at_matches_port_rects(registry):
+    node_type = register_node_type("Test Ports", inputs=("a", "b", "c"), outputs=("x", "y"), width=100, height=120)
+    for port, (x, y, w, h) in node_type.port_rects:
+        assert node_type.port_at(x + w / 2, y + h / 2) is port
+        assert node_type.port_at(x, y) is port and node_type.port_at(x + w, y + h) is port
+
+    # Scan every half pixel of the node: port_at agrees with a search over the rectangles
+    for ix in range(-20, 221):
+        for iy in range(-20, 261):
+            x, y = ix / 2, iy / 2
+            expected = next((port for port, (rx, ry, w, h) in node_type.port_rects
+                             if rx <= x <= rx + w and ry <= y <= ry + h), None)
+            assert node_type.port_at(x, y) is expected, (x, y)
+
+
+def test_start_has_no_input_port():
+    start = get_node_type("Start")
+    assert start.input_ports == ()
+    assert start.port_at(0, start.height / 2) is None
+    assert start.port_at(start.width, start.height / 2)["name"] == "out"
+
+
+# --- Plugins ---
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch, registry):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for i in (1, 2):
+        (tmp_path / f"vbb_test_plugin{i}.py").write_text(
+            "from node_types import register_node_type\n"
+            f"register_node_type('Test Plugin Type {i}')\n")
+    yield tmp_path
+    for i in (1, 2):
+        sys.modules.pop(f"vbb_test_plugin{i}", None)
+
+
+def test_load_plugins_reads_vbb_plugins(plugin_dir, monkeypatch):
+    monkeypatch.setenv("VBB_PLUGINS", " vbb_test_plugin1 , ,vbb_test_plugin2,")
+    modules = load_plugins()
+    assert [module.__name__ for module in modules] == ["vbb_test_plugin1", "vbb_test_plugin2"]
+    assert "Test Plugin Type 1" in NODE_TYPES and "Test Plugin Type 2" in NODE_TYPES
+
+
+def test_load_plugins_spec_overrides_environment(plugin_dir, monkeypatch):
+    monkeypatch.setenv("VBB_PLUGINS", "vbb_test_plugin1")
+    assert [module.__name__ for module in load_plugins("vbb_test_plugin2")] == ["vbb_test_plugin2"]
+    assert "Test Plugin Type 1" not in NODE_TYPES
+    assert load_plugins("") == []
+
+
+def test_load_plugins_without_setting(monkeypatch):
+    monkeypatch.delenv("VBB_PLUGINS", raising=False)
+    assert load_plugins() == []
+
+
+def test_load_plugins_missing_module(plugin_dir):
+    with pytest.raises(ImportError):
+        load_plugins("vbb_test_no_such_plugin")
@@ -0,0 +1,92 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import parallel_matcher
+import run_flow
+from image_matcher import ImageMatcher
+from parallel_matcher import ParallelImageMatcher
+from screen_capture import ScreenActionBackend, ScreenCapture, SyntheticScreenBackend
+from test_image_matcher import textured
+
+
+@pytest.fixture
+def screen_and_paths(tmp_path):
+    rng = np.random.default_rng(5)
+    screen = textured(rng, 480, 640)
+    target = textured(rng, 40, 56)
+    screen[213:253, 301:357] = target
+    target_path = str(tmp_path / "target.npy")
+    np.save(target_path, target)
+    other_path = str(tmp_path / "other.npy")
+    np.save(other_path, textured(rng, 40, 56))
+    return screen, target_path, other_path
+
+
+def test_parallel_search_matches_serial_search(screen_and_paths):
+    screen, target_path, other_path = screen_and_paths
+    serial = ImageMatcher().find(screen, target_path, 0.95)
+    with ParallelImageMatcher(processes=2, min_parallel_pixels=0) as matcher:
+        match = matcher.find(screen, target_path, 0.95)
+        assert (match.x, match.y, match.width, match.height) == (serial.x, serial.y, 56, 40) == (301, 213, 56, 40)
+        assert matcher.find(screen, other_path, 0.95) is None
+        path, match = matcher.find_any(screen, [other_path, target_path], 0.95)
+        assert (path, match.x, match.y) == (target_path, 301, 213)
+        assert matcher.parallel_searches == 3
+        name = matcher._shm.name
+        assert matcher._pool._mp_context.get_start_method() == parallel_matcher.START_METHOD
+    # close() unlinked the frame segment
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_concurrent_parallel_searches(screen_and_paths):
+    screen, target_path, _ = screen_and_paths
+    shifted = np.roll(screen, (40, -100), axis=(0, 1)) # Target at (201, 253)
+    results = {}
+    with ParallelImageMatcher(processes=2, min_parallel_pixels=0) as matcher:
+        def search(name, frame):
+            results[name] = [matcher.find(frame, target_path, 0.95) for _ in range(3)]
+
+        threads = [threading.Thread(target=search, args=("a", screen)),
+                   threading.Thread(target=search, args=("b", shifted))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert [(m.x, m.y) for m in results["a"]] == [(301, 213)] * 3
+    assert [(m.x, m.y) for m in results["b"]] == [(201, 253)] * 3
+
+
+def test_small_searches_stay_in_process(screen_and_paths):
+    screen, target_path, _ = screen_and_paths
+    with ParallelImageMatcher(processes=2) as matcher:
+        assert matcher.find(screen, target_path, 0.95).center == (301 + 28, 213 + 20)
+        assert matcher.parallel_searches == 0
+        assert matcher._pool is None
+
+
+def test_run_flow_match_workers_option(monkeypatch):
+    monkeypatch.delenv("VBB_MATCH_WORKERS", raising=False)
+    assert run_flow.parse_args(["a.flow"]).match_workers == 0
+    assert run_flow.parse_args(["a.flow", "--backend", "screen", "--match-workers", "3"]).match_workers == 3
+    monkeypatch.setenv("VBB_MATCH_WORKERS", "2")
+    assert run_flow.parse_args(["a.flow"]).match_workers == 2
+    with pytest.raises(SystemExit):
+        run_flow.parse_args(["a.flow", "--match-workers", "-1"])
+
+    assert type(run_flow.make_matcher(0)) is ImageMatcher
+    matcher = run_flow.make_matcher(3)
+    assert isinstance(matcher, ParallelImageMatcher) and matcher.processes == 3
+
+
+def test_screen_backend_close_shuts_down_the_pool(screen_and_paths):
+    screen, target_path, _ = screen_and_paths
+    matcher = ParallelImageMatcher(processes=2, min_parallel_pixels=0)
+    backend = ScreenActionBackend(ScreenCapture(SyntheticScreenBackend(screen)), matcher)
+    assert backend.find_image(target_path, 0.95, None) == (301 + 28, 213 + 20)
+    assert matcher._pool is not None
+    backend.close()
+    assert matcher._pool is None and matcher._shm is None
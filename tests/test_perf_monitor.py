@@ -0,0 +1,56 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt6.QtWidgets import QApplication, QListWidgetItem
+
+from main_app2 import MainWindow
+from perf_monitor import perf
+
+
+@pytest.fixture
+def window():
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow()
+    window.resize(1200, 700)
+    window.show()
+    window.build_deferred_ui()
+    for node_type in ("Start", "Find Image", "End"):
+        window.add_node_from_palette(QListWidgetItem(node_type))
+    start, find, end = window.current_flow.nodes
+    window.handle_connection_dropped(start, "out", find, "in")
+    window.handle_connection_dropped(find, "out", end, "in")
+    app.processEvents()
+    yield window
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def test_edit_pass_updates_counters(window):
+    start, find, _ = window.current_flow.nodes
+    perf.reset()
+    window.graphics_nodes[find].setSelected(True)
+    QApplication.processEvents()
+    assert perf.properties_rebuilds == 1
+    assert perf.properties_rebuild_last > 0
+
+    window.graphics_nodes[find].setPos(400, 300)
+    window.move_batcher.flush()
+    stats = perf.stats()
+    assert stats["update_path_calls"] >= 2 # Both connections of the moved node
+    assert stats["properties_rebuild_max_ms"] > 0
+
+
+def test_render_pass_updates_counters(window):
+    perf.reset()
+    window.flow_canvas.viewport().repaint()
+    stats = perf.stats()
+    assert stats["frames"] == 1
+    assert stats["item_paints"] > 0
+    assert stats["paints_last_frame"] == stats["item_paints"]
+    assert stats["frame_time_last_ms"] > 0
+
+    window.flow_canvas.viewport().repaint()
+    assert perf.stats()["frames"] == 2
@@ -0,0 +1,60 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+from flow_model import Node
+from properties_panel import PropertiesPanel
+
+
+class RecordingWindow:
+    """Stands in for MainWindow: records the edits the form reports."""
+    def __init__(self):
+        self.edits = []
+
+    def update_node_property(self, data_node, key, value):
+        data_node.properties[key] = value
+        self.edits.append((key, value))
+
+    def update_node_name(self, data_node, name):
+        data_node.name = name
+
+
+@pytest.fixture
+def panel():
+    app = QApplication.instance() or QApplication([])
+    window = RecordingWindow()
+    panel = PropertiesPanel(window)
+    yield panel
+    panel.deleteLater()
+    app.processEvents()
+
+
+def test_binding_values_the_form_cannot_show(panel):
+    delay = Node("Delay/Wait", name="Pause", properties={"duration_ms": "abc"})
+    panel.show_node(delay)
+    form = panel.forms["Delay/Wait"]
+    spin_box = form._editors["duration_ms"][1]
+    assert spin_box.value() == 1000 # The field default
+    assert "'abc'" in spin_box.toolTip()
+    assert panel.main_window.edits == [] # Binding is not an edit
+
+    log = Node("Log Message", name="Log", properties={"message": 123})
+    panel.show_node(log)
+    assert panel.forms["Log Message"]._editors["message"][1].text() == "123"
+
+    panel.show_node(Node("Delay/Wait", name="Ok", properties={"duration_ms": 250}))
+    assert spin_box.value() == 250
+    assert spin_box.toolTip() == "" and spin_box.styleSheet() == ""
+
+
+def test_editing_an_invalid_field_clears_the_mark(panel):
+    delay = Node("Delay/Wait", name="Pause", properties={"duration_ms": None})
+    panel.show_node(delay)
+    spin_box = panel.forms["Delay/Wait"]._editors["duration_ms"][1]
+    assert spin_box.styleSheet() != ""
+    spin_box.setValue(40)
+    assert delay.properties["duration_ms"] == 40
+    assert spin_box.styleSheet() == ""
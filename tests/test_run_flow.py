@@ -0,0 +1,28 @@
+import pytest
+
+import run_flow
+from flow_io import save_flow
+from flow_model import Connection, Flow, Node
+
+
+def write_flow(path, **delay_properties):
+    flow = Flow()
+    nodes = [Node("Start", name="Start"), Node("Delay/Wait", name="Pause", properties=delay_properties),
+             Node("End", name="End")]
+    for node in nodes:
+        flow.add_node(node)
+    for from_node, to_node in zip(nodes, nodes[1:]):
+        flow.add_connection(Connection(from_node.id, "out", to_node.id, "in"))
+    save_flow(flow, str(path))
+    return str(path)
+
+
+def test_runs_a_flow_to_completion(tmp_path):
+    assert run_flow.main([write_flow(tmp_path / "ok.flow", duration_ms=0), "--backend", "stub"]) == 0
+
+
+@pytest.mark.parametrize("value", ["abc", "", None, [1]])
+def test_bad_number_property_exits_with_status_2(tmp_path, capsys, value):
+    path = write_flow(tmp_path / "bad.flow", duration_ms=value)
+    assert run_flow.main([path, "--backend", "stub"]) == 2
+    assert "'Pause' has an invalid property: duration_ms must be a whole number" in capsys.readouterr().err
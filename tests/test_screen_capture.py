@@ -0,0 +1,123 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from screen_capture import ScreenActionBackend, ScreenCapture, SyntheticScreenBackend
+
+
+class RecordingInput:
+    def __init__(self):
+        self.calls = []
+
+    def mouse_action(self, action, x, y, button):
+        self.calls.append(("mouse", action, x, y, button))
+
+    def keyboard_action(self, text):
+        self.calls.append(("keyboard", text))
+
+
+def screen(value=0):
+    return np.full((40, 60, 3), value, dtype=np.uint8)
+
+
+def test_frame_is_shared_until_stale():
+    backend = SyntheticScreenBackend(screen())
+    capture = ScreenCapture(backend, max_age=60.0)
+    first = capture.frame()
+    second = capture.frame()
+    assert second is first
+    assert not first.flags.writeable
+    assert backend.grabs == 1
+    assert capture.stats()["capture_hits"] == 1
+
+
+def test_grabs_into_the_same_buffer():
+    backend = SyntheticScreenBackend(screen(1))
+    capture = ScreenCapture(backend, max_age=0.0)
+    first = capture.frame()
+    backend.set_image(screen(2))
+    second = capture.frame()
+    assert np.shares_memory(first, second)
+    assert second[0, 0, 0] == 2
+    assert capture.generation == 2
+
+
+def test_pinned_frame_is_not_overwritten_by_later_grabs():
+    backend = SyntheticScreenBackend(screen(1))
+    capture = ScreenCapture(backend, max_age=60.0)
+    with capture.pinned() as (generation, frame):
+        backend.set_image(screen(2))
+        capture.invalidate()
+        latest = capture.frame()
+        assert latest[0, 0, 0] == 2 and capture.generation == generation + 1
+        assert frame[0, 0, 0] == 1
+        assert not np.shares_memory(frame, latest)
+    assert capture.stats()["frame_buffers"] == 2
+
+
+def test_single_reader_reuses_one_buffer():
+    capture = ScreenCapture(SyntheticScreenBackend(screen()), max_age=0.0)
+    for i in range(5):
+        with capture.pinned() as (generation, _):
+            assert generation == i + 1
+    assert capture.stats()["frame_buffers"] == 1
+
+
+class CountingBackend(SyntheticScreenBackend):
+    """Every grab fills the whole frame with a new value."""
+    def grab(self, out):
+        self.grabs += 1
+        out[...] = self.grabs % 256
+
+
+def test_concurrent_readers_never_see_a_frame_change():
+    capture = ScreenCapture(CountingBackend(screen()), max_age=0.0) # Every pinned() grabs
+    problems = []
+
+    def read():
+        for _ in range(30):
+            with capture.pinned() as (generation, frame):
+                value = frame[0, 0, 0]
+                time.sleep(0.0005) # Let the other readers grab meanwhile
+                if not (frame == value).all() or value != generation % 256:
+                    problems.append((generation, value))
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert problems == []
+    assert capture.stats()["frame_buffers"] <= 5 # At most one per reader plus one
+
+
+def test_invalidate_forces_a_grab():
+    backend = SyntheticScreenBackend(screen())
+    capture = ScreenCapture(backend, max_age=60.0)
+    capture.frame()
+    capture.invalidate()
+    capture.frame()
+    assert backend.grabs == 2
+
+
+def test_input_actions_go_to_the_input_backend_and_invalidate_the_frame():
+    backend = SyntheticScreenBackend(screen())
+    capture = ScreenCapture(backend, max_age=60.0)
+    input_backend = RecordingInput()
+    actions = ScreenActionBackend(capture, input_backend=input_backend)
+    capture.frame()
+    actions.mouse_action("click", 10, 20, "left")
+    actions.keyboard_action("hello")
+    capture.frame()
+    assert input_backend.calls == [("mouse", "click", 10, 20, "left"), ("keyboard", "hello")]
+    assert backend.grabs == 2
+
+
+def test_input_actions_without_input_backend_raise():
+    actions = ScreenActionBackend(ScreenCapture(SyntheticScreenBackend(screen())))
+    with pytest.raises(NotImplementedError):
+        actions.mouse_action("click", 0, 0, "left")
+    with pytest.raises(NotImplementedError):
+        actions.keyboard_action("x")
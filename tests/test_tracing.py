@@ -0,0 +1,63 @@
+import gc
+import io
+import weakref
+
+import numpy as np
+
+from flow_model import Node
+from tracing import DEBUG, OFF, Tracer
+
+
+def make_tracer():
+    return Tracer(level=DEBUG, echo_level=OFF)
+
+
+def texts(tracer):
+    return [record.text() for record in tracer.records()]
+
+
+def test_dump_shows_arguments_as_they_were_when_logged():
+    tracer = make_tracer()
+    properties = {"duration_ms": 1000}
+    node = Node("Delay/Wait", name="Pause", properties=properties)
+    tracer.debug("editor", "Node '%s' %r properties: %s", node.name, node, properties)
+    tracer.info("editor", "Props %s", properties)
+    properties["duration_ms"] = 5
+    node.name = "Renamed"
+
+    expected = f"Node 'Pause' Node(id={node.id}, type='Delay/Wait', name='Pause') properties: {{'duration_ms': 1000}}"
+    assert texts(tracer) == [expected, "Props {'duration_ms': 1000}"]
+    out = io.StringIO()
+    tracer.dump(out)
+    assert "'duration_ms': 1000" in out.getvalue() and "Renamed" not in out.getvalue()
+
+
+def test_ring_does_not_keep_logged_objects_alive():
+    class Item: # Stands in for a graphics item or a deleted node's data
+        pass
+
+    tracer = make_tracer()
+    item = Item()
+    ref = weakref.ref(item)
+    tracer.debug("canvas", "Moved %s", item)
+    tracer.warning("canvas", "Gone %r", [item])
+    del item
+    gc.collect()
+    assert ref() is None
+    assert len(tracer.records()) == 2
+
+
+def test_plain_and_numeric_arguments_are_kept_as_is():
+    tracer = make_tracer()
+
+    class Named:
+        def __str__(self):
+            return "str form"
+
+        def __repr__(self):
+            return "repr form"
+
+    tracer.debug("engine", "%d steps in %.1f ms (%s, %r) %s %s", 3, np.float32(2.25), Named(), Named(), None, b"x")
+    record = tracer.records()[0]
+    assert record.text() == "3 steps in 2.2 ms (str form, repr form) None b'x'"
+    assert record.args[0] == 3 and record.args[4] is None
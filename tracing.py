@@ -0,0 +1,167 @@
+# --- Tracing ---
+# Leveled, categorized log records for the editor and engine, replacing print().
+#
+#   from tracing import tracer
+#   tracer.debug("canvas", "Path of %s updated: %s -> %s", conn_id, p1, p2)
+#
+# Messages use %-style arguments and are only formatted when a record is printed or
+# dumped, so a disabled call costs one dict lookup and a comparison. Hot loops can
+# check tracer.enabled(DEBUG, category) once and skip building arguments entirely.
+# Arguments other than plain numbers and strings (nodes, flows, property dicts,
+# QPointF) are reduced to their text when the record is made. That way a dump shows
+# the state at logging time, and the ring does not keep deleted objects alive.
+#
+# Records at or above a category's level go into an in-memory ring buffer (dumped on
+# demand with dump()); those at or above echo_level are also printed as they happen.
+# Levels can be set from the environment, e.g.  VBB_TRACE=debug  or
+# VBB_TRACE=info,canvas=debug,journal=warning
+import collections
+import numbers
+import os
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+_LEVELS_BY_NAME = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+_ECHO_PREFIXES = {WARNING: "Warning: ", ERROR: "Error: "}
+_now = time.time
+_thread_id = threading.get_ident
+_PLAIN_TYPES = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+class _ArgText:
+    """str() and repr() of a trace argument, taken when the record was made."""
+    __slots__ = ("_str", "_repr")
+
+    def __init__(self, value):
+        self._repr = repr(value)
+        self._str = self._repr if type(value).__str__ is object.__str__ else str(value)
+
+    def __str__(self):
+        return self._str
+
+    def __repr__(self):
+        return self._repr
+
+
+def _snapshot(args):
+    """args, with anything that is not an immutable number or string replaced by its _ArgText."""
+    for arg in args:
+        if type(arg) not in _PLAIN_TYPES:
+            break
+    else:
+        return args
+    return tuple(arg if type(arg) in _PLAIN_TYPES or isinstance(arg, numbers.Number) else _ArgText(arg)
+                 for arg in args)
+
+
+class TraceRecord:
+    __slots__ = ("time", "level", "category", "message", "args", "thread_id")
+
+    def __init__(self, time, level, category, message, args, thread_id):
+        self.time = time
+        self.level = level
+        self.category = category
+        self.message = message
+        self.args = args
+        self.thread_id = thread_id
+
+    def text(self):
+        """The formatted message (formatting happens here, not when the record is made)."""
+        if not self.args:
+            return self.message
+        try:
+            return self.message % self.args
+        except (TypeError, ValueError) as e:
+            return f"{self.message} {self.args!r} (format error: {e})"
+
+    def __str__(self):
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.time)) + f".{int(self.time * 1000) % 1000:03d}"
+        return f"{stamp} {LEVEL_NAMES.get(self.level, self.level):<7} [{self.category}] ({self.thread_id}) {self.text()}"
+
+
+class Tracer:
+    def __init__(self, level=INFO, echo_level=INFO, ring_size=10000, stream=None):
+        self.level = level # Default threshold for categories without their own
+        self.echo_level = echo_level # Records at or above this are also printed
+        self.stream = stream # None means sys.stdout at the time of printing
+        self._category_levels = {}
+        self._ring = collections.deque(maxlen=ring_size)
+
+    # --- Configuration ---
+    def set_level(self, level, category=None):
+        if category is None:
+            self.level = level
+        else:
+            self._category_levels[category] = level
+
+    def configure(self, spec):
+        """Applies a spec like "info,canvas=debug" (a bare level sets the default)."""
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            category, _, name = part.rpartition("=")
+            level = _LEVELS_BY_NAME.get(name.lower())
+            if level is None:
+                raise ValueError(f"Unknown trace level '{name}'")
+            self.set_level(level, category or None)
+
+    def enabled(self, level, category):
+        return level >= self._category_levels.get(category, self.level)
+
+    # --- Recording ---
+    def log(self, level, category, message, *args):
+        if level < self._category_levels.get(category, self.level):
+            return
+        # The ring holds plain tuples; TraceRecord objects are only made when reading it back
+        entry = (_now(), level, category, message, _snapshot(args), _thread_id())
+        self._ring.append(entry)
+        if level >= self.echo_level:
+            print(_ECHO_PREFIXES.get(level, "") + TraceRecord(*entry).text(), file=self.stream or sys.stdout)
+
+    def debug(self, category, message, *args):
+        # Same as log(DEBUG, ...) minus a call, since debug records are the ones in hot paths
+        if DEBUG < self._category_levels.get(category, self.level):
+            return
+        entry = (_now(), DEBUG, category, message, _snapshot(args), _thread_id())
+        self._ring.append(entry)
+        if DEBUG >= self.echo_level:
+            print(TraceRecord(*entry).text(), file=self.stream or sys.stdout)
+
+    def info(self, category, message, *args):
+        self.log(INFO, category, message, *args)
+
+    def warning(self, category, message, *args):
+        self.log(WARNING, category, message, *args)
+
+    def error(self, category, message, *args):
+        self.log(ERROR, category, message, *args)
+
+    # --- Ring buffer ---
+    def records(self, level=DEBUG, category=None):
+        return [TraceRecord(*entry) for entry in list(self._ring)
+                if entry[1] >= level and (category is None or entry[2] == category)]
+
+    def dump(self, target=None, level=DEBUG, category=None):
+        """Writes the buffered records to target (a path or a text stream; default stderr). Returns how many."""
+        records = self.records(level, category)
+        lines = "".join(f"{record}\n" for record in records)
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(lines)
+        else:
+            (target or sys.stderr).write(lines)
+        return len(records)
+
+    def clear(self):
+        self._ring.clear()
+
+
+tracer = Tracer()
+if os.environ.get("VBB_TRACE"):
+    tracer.configure(os.environ["VBB_TRACE"])